@@ -0,0 +1,63 @@
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+
+class HttpClient:
+    """HTTP-клиент с сессией (cookies) и входом в админку Django."""
+
+    def __init__(self, base_url: str, timeout: float) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies)
+        )
+
+    def _cookie(self, name: str) -> str | None:
+        return next((c.value for c in self.cookies if c.name == name), None)
+
+    def request(self, path: str, data: dict | None = None) -> tuple[int, bytes]:
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body)
+        if body is not None:
+            request.add_header("Referer", self.base_url + path)
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read()
+
+    def timed_get(self, path: str) -> tuple[int, float]:
+        """Статус и время ответа с чтением тела, секунды."""
+        started = time.perf_counter()
+        try:
+            status, _body = self.request(path)
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            status = 0
+        return status, time.perf_counter() - started
+
+    def login(self, username: str, password: str) -> None:
+        self.request("/admin/login/")
+        status, _body = self.request(
+            "/admin/login/?next=/admin/",
+            {
+                "csrfmiddlewaretoken": self._cookie("csrftoken") or "",
+                "username": username,
+                "password": password,
+                "next": "/admin/",
+            },
+        )
+        if status != 200 or self._cookie("sessionid") is None:
+            raise RuntimeError(f"Admin login failed for {username!r}: {status}")
+
+    def wait_ready(self, path: str, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status, _duration = self.timed_get(path)
+            if status == 200:
+                return
+            time.sleep(0.5)
+        raise RuntimeError(f"{self.base_url}{path} is not ready after {timeout}s")
@@ -0,0 +1,35 @@
+import argparse
+import json
+
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение двух отчетов нагрузки")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"{baseline['revision']} -> {candidate['revision']}")
+    print(f"{'endpoint':32}" + "".join(f" {metric:>20}" for metric in METRICS))
+    for name, stats in candidate["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        cells = []
+        for metric in METRICS:
+            if before is None or not before[metric]:
+                cells.append(f"{stats[metric]:>20}")
+                continue
+            change = (stats[metric] - before[metric]) / before[metric] * 100
+            cells.append(f"{f'{stats[metric]} ({change:+.0f}%)':>20}")
+        print(f"{name:32}" + " ".join([""] + cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import json
+import math
+import os
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable
+
+
+def percentile(values: list[float], rank: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(rank / 100 * len(values)) - 1)]
+
+
+def summarize(
+    samples: Iterable[tuple[str, int, float]], duration: float
+) -> dict[str, dict]:
+    """Задержки (мс), пропускная способность и ошибки по каждой конечной точке."""
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for name, status, latency in samples:
+        latencies[name].append(latency)
+        if status != 200:
+            errors[name] += 1
+    latencies["total"] = [
+        value for name in list(latencies) for value in latencies[name]
+    ]
+    errors["total"] = sum(errors.values())
+
+    result = {}
+    for name, values in sorted(latencies.items()):
+        if not values:
+            continue
+        values.sort()
+        result[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rps": round(len(values) / duration, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_report(reports_dir: str, config: dict, endpoints: dict[str, dict]) -> str:
+    os.makedirs(reports_dir, exist_ok=True)
+    revision = git_revision()
+    started = datetime.now(timezone.utc)
+    path = os.path.join(reports_dir, f"{started:%Y%m%dT%H%M%S}-{revision}.json")
+    with open(path, "w") as file:
+        json.dump(
+            {
+                "revision": revision,
+                "created_at": started.isoformat(),
+                "config": config,
+                "endpoints": endpoints,
+            },
+            file,
+            indent=2,
+            ensure_ascii=False,
+        )
+    return path
+
+
+def format_table(endpoints: dict[str, dict]) -> str:
+    header = f"{'endpoint':32} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    lines = [header, "-" * len(header)]
+    for name, stats in endpoints.items():
+        lines.append(
+            f"{name:32} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8}"
+            f" {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,172 @@
+import argparse
+import contextlib
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from client import HttpClient
+from report import format_table, save_report, summarize
+from scenarios import ENDPOINTS, Catalog, choose
+from settings import (
+    ADMIN_PASSWORD,
+    ADMIN_USERNAME,
+    APP_DIR,
+    CONCURRENCY,
+    DURATION,
+    GUNICORN_THREADS,
+    GUNICORN_WORKERS,
+    HOST,
+    PORT,
+    REPORTS_DIR,
+    REQUEST_TIMEOUT,
+    WARMUP,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def manage(*args: str) -> None:
+    subprocess.run([sys.executable, "manage.py", *args], cwd=APP_DIR, check=True)
+
+
+def prepare_app(films: int) -> None:
+    """Миграции, синтетический каталог и пользователь для входа в админку."""
+    manage("migrate", "--noinput")
+    if films:
+        manage("generate_catalog", "--films", str(films), "--persons", str(films * 2))
+        manage("refresh_film_search")
+    manage(
+        "shell",
+        "-c",
+        "from django.contrib.auth.models import User;"
+        f"User.objects.filter(username={ADMIN_USERNAME!r}).exists() or "
+        f"User.objects.create_superuser({ADMIN_USERNAME!r}, '', {ADMIN_PASSWORD!r})",
+    )
+
+
+@contextlib.contextmanager
+def gunicorn(workers: int, threads: int, asgi: bool):
+    env = {**os.environ, "ALLOWED_HOSTS": HOST}
+    # ASGI: один event loop на воркер, --threads не используется
+    app = (
+        ["config.asgi", "-k", "uvicorn.workers.UvicornWorker"]
+        if asgi
+        else ["config.wsgi"]
+    )
+    process = subprocess.Popen(
+        [
+            "gunicorn",
+            *app,
+            "--bind",
+            f"{HOST}:{PORT}",
+            "--workers",
+            str(workers),
+            "--threads",
+            str(threads),
+            "--log-level",
+            "warning",
+        ],
+        cwd=APP_DIR,
+        env=env,
+    )
+    try:
+        yield
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def worker(
+    base_url: str,
+    catalog: Catalog,
+    seed: int,
+    warmup_until: float,
+    stop_at: float,
+    samples: list,
+    lock: threading.Lock,
+) -> None:
+    client = HttpClient(base_url, REQUEST_TIMEOUT)
+    client.login(ADMIN_USERNAME, ADMIN_PASSWORD)
+    rnd = random.Random(seed)
+    local = []
+    while (now := time.monotonic()) < stop_at:
+        endpoint = choose(ENDPOINTS, rnd)
+        status, latency = client.timed_get(endpoint.path(catalog, rnd))
+        if now >= warmup_until:
+            local.append((endpoint.name, status, latency))
+    with lock:
+        samples.extend(local)
+
+
+def run(base_url: str, concurrency: int, duration: float, warmup: float) -> dict:
+    client = HttpClient(base_url, REQUEST_TIMEOUT)
+    client.wait_ready("/admin/login/", timeout=60)
+    client.login(ADMIN_USERNAME, ADMIN_PASSWORD)
+    catalog = Catalog.discover(client)
+    logger.info(
+        "Catalog: %s films, %s persons, %s genres",
+        len(catalog.film_ids),
+        len(catalog.person_ids),
+        len(catalog.genre_ids),
+    )
+
+    samples, lock = [], threading.Lock()
+    started = time.monotonic()
+    warmup_until, stop_at = started + warmup, started + warmup + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                worker, base_url, catalog, seed, warmup_until, stop_at, samples, lock
+            )
+            for seed in range(concurrency)
+        ]
+        for future in futures:
+            future.result()
+    return summarize(samples, duration)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест админки и API")
+    parser.add_argument("--url", help="Тестировать уже запущенное приложение")
+    parser.add_argument("--films", type=int, default=0, help="Сгенерировать каталог")
+    parser.add_argument("--workers", type=int, default=GUNICORN_WORKERS)
+    parser.add_argument("--threads", type=int, default=GUNICORN_THREADS)
+    parser.add_argument("--asgi", action="store_true", help="uvicorn-воркеры gunicorn")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--warmup", type=float, default=WARMUP)
+    args = parser.parse_args()
+
+    config = {
+        "url": args.url,
+        "films": args.films,
+        "workers": args.workers,
+        "threads": args.threads,
+        "asgi": args.asgi,
+        "settings": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"),
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+    }
+    if args.url:
+        endpoints = run(args.url, args.concurrency, args.duration, args.warmup)
+    else:
+        prepare_app(args.films)
+        with gunicorn(args.workers, args.threads, args.asgi):
+            endpoints = run(
+                f"http://{HOST}:{PORT}", args.concurrency, args.duration, args.warmup
+            )
+
+    print(format_table(endpoints))
+    logger.info("Report saved to %s", save_report(REPORTS_DIR, config, endpoints))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
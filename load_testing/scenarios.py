@@ -0,0 +1,148 @@
+import json
+import random
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Callable
+
+from client import HttpClient
+
+
+@dataclass
+class Catalog:
+    """Идентификаторы и слова для поиска, собранные с работающего приложения."""
+
+    film_ids: list[str] = field(default_factory=list)
+    person_ids: list[str] = field(default_factory=list)
+    genre_ids: list[str] = field(default_factory=list)
+    film_types: list[str] = field(default_factory=list)
+    words: list[str] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+
+    @classmethod
+    def discover(cls, client: HttpClient, pages: int = 4) -> "Catalog":
+        catalog = cls()
+        cursor = None
+        for _ in range(pages):
+            path = "/api/v1/movies/?page_size=100"
+            if cursor:
+                path += f"&cursor={cursor}"
+            data = _get_json(client, path)
+            for film in data["results"]:
+                catalog.film_ids.append(film["id"])
+                catalog.words.extend(word.lower() for word in film["title"].split())
+                for role in ("actors", "directors", "writers"):
+                    catalog.names.extend(film[role])
+            cursor = data["next"]
+            if not cursor:
+                break
+        catalog.words = sorted(set(w for w in catalog.words if w.isalpha()))
+        catalog.names = sorted(set(catalog.names))
+        catalog.genre_ids = [
+            g["id"] for g in _get_json(client, "/api/v1/genres/")["results"]
+        ]
+        catalog.film_types = [
+            t["slug"] for t in _get_json(client, "/api/v1/types/")["results"]
+        ]
+        for name in catalog.names[:50]:
+            params = urllib.parse.urlencode(
+                {
+                    "term": name,
+                    "app_label": "movies",
+                    "model_name": "personfimwork",
+                    "field_name": "person",
+                }
+            )
+            results = _get_json(client, f"/admin/autocomplete/?{params}")["results"]
+            catalog.person_ids.extend(person["id"] for person in results)
+        if not (catalog.film_ids and catalog.genre_ids and catalog.words):
+            raise RuntimeError("Catalog is empty, run manage.py generate_catalog first")
+        return catalog
+
+
+def _get_json(client: HttpClient, path: str) -> dict:
+    status, body = client.request(path)
+    if status != 200:
+        raise RuntimeError(f"GET {path}: {status}")
+    return json.loads(body)
+
+
+def _query(**params) -> str:
+    return urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    weight: int
+    path: Callable[[Catalog, random.Random], str]
+
+
+# Смесь запросов редактора: в основном просмотр и фильтрация списков, реже поиск,
+# открытие карточек и чтение API
+ENDPOINTS = (
+    Endpoint(
+        "admin:filmwork_changelist",
+        15,
+        lambda c, r: f"/admin/movies/filmwork/?{_query(p=r.randrange(5) or None)}",
+    ),
+    Endpoint(
+        "admin:filmwork_search",
+        15,
+        lambda c, r: f"/admin/movies/filmwork/?{_query(q=r.choice(c.words))}",
+    ),
+    Endpoint(
+        "admin:filmwork_filter",
+        15,
+        lambda c, r: "/admin/movies/filmwork/?"
+        + _query(
+            genre=r.choice(c.genre_ids),
+            type=r.choice(c.film_types) if r.random() < 0.5 else None,
+            rating=r.randrange(10) if r.random() < 0.5 else None,
+        ),
+    ),
+    Endpoint(
+        "admin:filmwork_change",
+        10,
+        lambda c, r: f"/admin/movies/filmwork/{r.choice(c.film_ids)}/change/",
+    ),
+    Endpoint(
+        "admin:person_changelist",
+        5,
+        lambda c, r: f"/admin/movies/person/?{_query(p=r.randrange(5) or None)}",
+    ),
+    Endpoint(
+        "admin:person_search",
+        5,
+        lambda c, r: "/admin/movies/person/?"
+        + _query(q=r.choice(c.names).rsplit(" ", 1)[0] if c.names else None),
+    ),
+    Endpoint(
+        "admin:person_change",
+        5,
+        lambda c, r: (
+            f"/admin/movies/person/{r.choice(c.person_ids)}/change/"
+            if c.person_ids
+            else "/admin/movies/person/"
+        ),
+    ),
+    Endpoint(
+        "api:movies_list",
+        10,
+        lambda c, r: "/api/v1/movies/?"
+        + _query(genre=r.choice(c.genre_ids), rating_gte=r.randrange(10)),
+    ),
+    Endpoint(
+        "api:movies_search",
+        10,
+        lambda c, r: f"/api/v1/movies/search/?{_query(query=r.choice(c.words))}",
+    ),
+    Endpoint(
+        "api:movies_detail",
+        10,
+        lambda c, r: f"/api/v1/movies/{r.choice(c.film_ids)}/",
+    ),
+)
+
+
+def choose(endpoints: tuple[Endpoint, ...], rnd: random.Random) -> Endpoint:
+    return rnd.choices(endpoints, weights=[e.weight for e in endpoints])[0]
@@ -0,0 +1,23 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+APP_DIR = os.environ.get("APP_DIR", "../movies_admin")
+HOST = os.environ.get("HOST", "127.0.0.1")
+PORT = int(os.environ.get("PORT", 8001))
+
+GUNICORN_WORKERS = int(os.environ.get("GUNICORN_WORKERS", 2))
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", 1))
+
+ADMIN_USERNAME = os.environ.get("ADMIN_USERNAME", "loadtest")
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "loadtest")
+
+CONCURRENCY = int(os.environ.get("CONCURRENCY", 8))
+DURATION = float(os.environ.get("DURATION", 60))
+WARMUP = float(os.environ.get("WARMUP", 5))
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", 30))
+
+REPORTS_DIR = os.environ.get("REPORTS_DIR", "reports")
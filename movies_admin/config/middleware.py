@@ -0,0 +1,246 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from config import routers
+
+
+logger = logging.getLogger("sql_profiling")
+
+_IN_LIST_RE = re.compile(r"IN \((?:%s, )*%s\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+def query_signature(sql: str) -> str:
+    """Нормализованный текст запроса без значений и длины IN-списков."""
+    return _NUMBER_RE.sub("N", _IN_LIST_RE.sub("IN (...)", sql))
+
+
+class QueryProfiler:
+    """execute_wrapper, собирающий время и сигнатуры запросов."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.queries: list[tuple[float, str]] = []
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            self.queries.append((duration, sql))
+            self.signatures[query_signature(sql)] += 1
+
+    def slowest(self, limit: int) -> list[dict]:
+        return [
+            {"ms": round(duration * 1000, 2), "sql": sql[:500]}
+            for duration, sql in sorted(self.queries, reverse=True)[:limit]
+        ]
+
+    def repeated(self, threshold: int) -> list[dict]:
+        return [
+            {"count": count, "sql": signature[:500]}
+            for signature, count in self.signatures.most_common()
+            if count >= threshold
+        ]
+
+
+_current_profiler: ContextVar[QueryProfiler | None] = ContextVar(
+    "query_profiler", default=None
+)
+
+
+def _profile_execute(execute, sql, params, many, context):
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return execute(sql, params, many, context)
+    return profiler(execute, sql, params, many, context)
+
+
+def install_profiler(connection, **kwargs) -> None:
+    """Подключает профилировщик к соединению один раз.
+
+    Соединения с БД привязаны к потоку, а под ASGI запросы к БД выполняются
+    в sync-потоках, поэтому текущий профилировщик передается через ContextVar.
+    """
+    if _profile_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_execute)
+
+
+class QueryProfilingMiddleware:
+    """Профилирование SQL для выборки запросов без DEBUG.
+
+    Для доли запросов SQL_PROFILING_SAMPLE_RATE пишет в лог число и время
+    SQL-запросов, самые медленные запросы и повторяющиеся сигнатуры (N+1).
+    Заголовок Server-Timing раскрывает время работы БД, поэтому добавляется
+    только для сотрудников (is_staff) или при DEBUG.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.sample_rate = settings.SQL_PROFILING_SAMPLE_RATE
+        self.slowest_limit = settings.SQL_PROFILING_SLOWEST
+        self.repeat_threshold = settings.SQL_PROFILING_REPEAT_THRESHOLD
+        if self.sample_rate > 0:
+            connection_created.connect(install_profiler, dispatch_uid=__name__)
+            for connection in connections.all(initialized_only=True):
+                install_profiler(connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profiler = QueryProfiler()
+        started = time.perf_counter()
+        token = _current_profiler.set(profiler)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profiler.reset(token)
+        self.report(request, response, profiler, started)
+        if self.exposes_timing(getattr(request, "user", None)):
+            self.add_timing(response, profiler, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profiler = QueryProfiler()
+        started = time.perf_counter()
+        token = _current_profiler.set(profiler)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profiler.reset(token)
+        self.report(request, response, profiler, started)
+        auser = getattr(request, "auser", None)
+        if self.exposes_timing(await auser() if auser else None):
+            self.add_timing(response, profiler, started)
+        return response
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def report(
+        self, request, response, profiler: QueryProfiler, started: float
+    ) -> None:
+        total = time.perf_counter() - started
+        repeated = profiler.repeated(self.repeat_threshold)
+        logger.log(
+            logging.WARNING if repeated else logging.INFO,
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "total_ms": round(total * 1000, 2),
+                    "sql_ms": round(profiler.duration * 1000, 2),
+                    "sql_count": profiler.count,
+                    "slowest": profiler.slowest(self.slowest_limit),
+                    "repeated": repeated,
+                },
+                ensure_ascii=False,
+            ),
+        )
+
+    @staticmethod
+    def exposes_timing(user) -> bool:
+        return settings.DEBUG or bool(user is not None and user.is_staff)
+
+    @staticmethod
+    def add_timing(response, profiler: QueryProfiler, started: float) -> None:
+        total = time.perf_counter() - started
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={profiler.duration * 1000:.2f};desc="{profiler.count} queries"',
+                f"app;dur={(total - profiler.duration) * 1000:.2f}",
+            )
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Закрепляет чтение за primary для записей и недавно писавших клиентов.
+
+    Небезопасные методы читают с primary, а ответ на них и на любой запрос,
+    записавший в БД, ставит cookie на REPLICA_STICKY_SECONDS, чтобы следующие
+    запросы клиента (например, после редиректа из админки) не читали с
+    отстающей реплики.
+
+    Тело потокового ответа (выгрузки) читается после выхода из middleware,
+    поэтому его итерирование идет в той же области: иначе запросы выгрузки
+    вне области ушли бы на primary.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routers.routing_scope(self.pinned(request)) as scope:
+            response = self.get_response(request)
+        return self.stick(request, self.keep_scope(response, scope), scope)
+
+    async def __acall__(self, request):
+        with routers.routing_scope(self.pinned(request)) as scope:
+            response = await self.get_response(request)
+        return self.stick(request, self.keep_scope(response, scope), scope)
+
+    @staticmethod
+    def keep_scope(response, scope):
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = routers.aiterate_in_scope(
+                    response.streaming_content, scope
+                )
+            else:
+                response.streaming_content = routers.iterate_in_scope(
+                    response.streaming_content, scope
+                )
+        return response
+
+    @staticmethod
+    def is_write(request) -> bool:
+        return request.method not in ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def pinned(self, request) -> bool:
+        sticky = settings.REPLICA_STICKY_COOKIE in request.COOKIES
+        return sticky or self.is_write(request)
+
+    def stick(self, request, response, scope):
+        if self.is_write(request) or scope.wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,197 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class _RoutingScope:
+    """Область маршрутизации: запрос, задача или команда.
+
+    Чтение идет с primary, если область закреплена: небезопасный метод, недавняя
+    запись клиента или запись внутри самой области.
+    """
+
+    __slots__ = ("primary", "wrote")
+
+    def __init__(self, primary: bool) -> None:
+        self.primary = primary
+        self.wrote = False
+
+
+# Вне области (команды, фоновые потоки без routing_scope) запись нельзя
+# закрепить без утечки, поэтому чтение идет с primary
+_scope: ContextVar[_RoutingScope | None] = ContextVar("routing_scope", default=None)
+
+REPLICA_LAG_SQL = """
+SELECT
+    pg_is_in_recovery(),
+    pg_last_wal_receive_lsn() IS NOT NULL,
+    r.status,
+    EXTRACT(EPOCH FROM now() - r.last_msg_receipt_time),
+    CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+FROM (SELECT 1) one
+LEFT JOIN pg_stat_wal_receiver r ON TRUE
+"""
+
+
+@contextmanager
+def _entered(scope: _RoutingScope) -> Iterator[_RoutingScope]:
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+@contextmanager
+def routing_scope(primary: bool = False) -> Iterator[_RoutingScope]:
+    """Открывает область; после выхода закрепление не действует."""
+    with _entered(_RoutingScope(primary)) as scope:
+        yield scope
+
+
+def iterate_in_scope(content: Iterable, scope: _RoutingScope) -> Iterator:
+    """Читает элементы content внутри области scope.
+
+    Тело потокового ответа читается сервером уже после выхода из middleware.
+    Область входит только на время получения элемента, чтобы не протекать
+    в контекст того, кто итерирует.
+    """
+    iterator = iter(content)
+    while True:
+        with _entered(scope):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+async def aiterate_in_scope(
+    content: AsyncIterable, scope: _RoutingScope
+) -> AsyncIterator:
+    """Асинхронный вариант iterate_in_scope."""
+    iterator = aiter(content)
+    while True:
+        with _entered(scope):
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+def pin_primary() -> None:
+    """Закрепляет чтение за primary до конца текущей области."""
+    scope = _scope.get()
+    if scope is not None:
+        scope.primary = scope.wrote = True
+
+
+def use_primary() -> bool:
+    scope = _scope.get()
+    return scope is None or scope.primary
+
+
+class ReplicaLagMonitor:
+    """Отставание реплик с кешированием на REPLICA_LAG_CHECK_INTERVAL секунд.
+
+    Реплика, отстающая больше REPLICA_MAX_LAG секунд или недоступная,
+    исключается из чтения до следующей проверки.
+    """
+
+    def __init__(self) -> None:
+        self.checked_at: dict[str, float] = {}
+        self.lag: dict[str, float | None] = {}
+        self.lock = threading.Lock()
+
+    def measure(self, alias: str) -> float | None:
+        """Отставание реплики в секундах; None - реплика непригодна для чтения.
+
+        Совпадение принятого и примененного LSN означает нулевое отставание, только
+        пока WAL receiver принимает поток: остановленный receiver дает то же
+        совпадение навсегда. Алиас, указывающий на primary, не находится в режиме
+        восстановления и принятого LSN не имеет.
+        """
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                in_recovery, receiving, status, silence, lag = cursor.fetchone()
+        except DatabaseError as exc:
+            logger.warning("Replica %s is unavailable: %s", alias, exc)
+            return None
+        if not in_recovery or not receiving:
+            logger.warning("Database %s is not a streaming replica", alias)
+            return None
+        if status != "streaming" or (
+            silence is None or silence > settings.REPLICA_RECEIVER_TIMEOUT
+        ):
+            logger.warning(
+                "Replica %s WAL receiver is %s, silent for %ss",
+                alias,
+                status or "stopped",
+                silence,
+            )
+            return None
+        return float(lag or 0)
+
+    def is_fresh(self, alias: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            due = (
+                now - self.checked_at.get(alias, float("-inf"))
+                > settings.REPLICA_LAG_CHECK_INTERVAL
+            )
+            if due:
+                self.checked_at[alias] = now
+        if due:
+            lag = self.measure(alias)
+            if lag is not None and lag > settings.REPLICA_MAX_LAG:
+                logger.warning("Replica %s lags %.1fs", alias, lag)
+            self.lag[alias] = lag
+        lag = self.lag.get(alias)
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+
+class PrimaryReplicaRouter:
+    """Чтение моделей movies с реплик, запись и чтение после записи - с primary."""
+
+    route_app_labels = {"movies"}
+
+    def __init__(self) -> None:
+        self.monitor = ReplicaLagMonitor()
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        if use_primary() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = [
+            alias
+            for alias in settings.REPLICA_DATABASES
+            if self.monitor.is_fresh(alias)
+        ]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
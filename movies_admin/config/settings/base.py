@@ -9,7 +9,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "top_secret")
 DEBUG = os.environ.get("DEBUG", "False") == "True"
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host
+]
 
 
 # Application definition
@@ -20,17 +22,20 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "movies",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "config.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.middleware.QueryProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -67,6 +72,45 @@ DATABASES = {
     }
 }
 
+# Read replicas of the primary as "host:port,host:port". Reads of the movies app
+# go to replicas lagging no more than REPLICA_MAX_LAG seconds; writes, reads
+# inside transactions and reads of clients that wrote during the last
+# REPLICA_STICKY_SECONDS go to the primary
+REPLICA_DATABASES = []
+for number, address in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICAS", "").split(",")), 1
+):
+    replica_host, _, replica_port = address.strip().partition(":")
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": replica_port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["config.routers.PrimaryReplicaRouter"]
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 5))
+# A replica whose WAL receiver is not streaming or has heard nothing from the
+# primary for this many seconds is treated as unavailable. An idle primary sends
+# keepalives only when asked, so keep it above wal_receiver_timeout (60s)
+REPLICA_RECEIVER_TIMEOUT = float(os.environ.get("REPLICA_RECEIVER_TIMEOUT", 90))
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+REPLICA_STICKY_COOKIE = "use_primary"
+
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "movies"),
+    }
+}
+MOVIES_CACHE_TIMEOUT = int(os.environ.get("MOVIES_CACHE_TIMEOUT", 300))
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -98,8 +142,66 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = "static/"
 
+# Uploaded files
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", BASE_DIR / "media")
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 CONTENT_SCHEMA = os.environ.get("CONTENT_SCHEMA", "content")
+SEARCH_CONFIG = os.environ.get("SEARCH_CONFIG", "english")
+
+# Import of CSV/NDJSON files through the admin
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 10000))
+IMPORT_IN_BACKGROUND = os.environ.get("IMPORT_IN_BACKGROUND", "True") == "True"
+
+# Import and bulk deletion jobs: a RUNNING job whose progress has not changed for
+# JOB_STALE_AFTER seconds is considered abandoned and is resumed by the commands
+JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 600))
+
+# Bulk deletion from the admin: selected rows are deleted with their link rows by
+# set-based DELETE in chunks of BULK_DELETE_CHUNK_SIZE, one transaction per chunk
+BULK_DELETE_CHUNK_SIZE = int(os.environ.get("BULK_DELETE_CHUNK_SIZE", 1000))
+BULK_DELETE_IN_BACKGROUND = (
+    os.environ.get("BULK_DELETE_IN_BACKGROUND", "True") == "True"
+)
+
+# SQL profiling of sampled requests: share of requests (0 - disabled), number of
+# slowest statements to report and repeat count that marks an N+1 signature
+SQL_PROFILING_SAMPLE_RATE = float(os.environ.get("SQL_PROFILING_SAMPLE_RATE", 0))
+SQL_PROFILING_SLOWEST = int(os.environ.get("SQL_PROFILING_SLOWEST", 5))
+SQL_PROFILING_REPEAT_THRESHOLD = int(
+    os.environ.get("SQL_PROFILING_REPEAT_THRESHOLD", 5)
+)
+
+# Admin changelists show the planner estimate instead of an exact COUNT(*)
+# when the estimated number of rows is above this limit
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get("ADMIN_EXACT_COUNT_LIMIT", 1000))
+
+# Hash partitioning of person_film_work/genre_film_work by film_work_id: number
+# of partitions (0 - plain tables), largest table the migration converts inline
+# (bigger ones are moved online by "manage.py partition_link_tables") and
+# lock_timeout of the final table swap
+LINK_TABLE_PARTITIONS = int(os.environ.get("LINK_TABLE_PARTITIONS", 8))
+PARTITION_INLINE_MAX_ROWS = int(os.environ.get("PARTITION_INLINE_MAX_ROWS", 1000000))
+PARTITION_LOCK_TIMEOUT = os.environ.get("PARTITION_LOCK_TIMEOUT", "5s")
+
+# In-process prefix index of film titles and person names for autocomplete:
+# rebuilt in the background every AUTOCOMPLETE_MAX_AGE seconds (changes made
+# through models are applied at once), best matches of prefixes with more than
+# AUTOCOMPLETE_MEMO_SIZE entries are memoized; disabled - word prefix tsquery in
+# Postgres. Lookups scanning more than AUTOCOMPLETE_MAX_LOOP_SCAN keys run in a
+# worker thread instead of the event loop
+AUTOCOMPLETE_ENABLED = os.environ.get("AUTOCOMPLETE_ENABLED", "True") == "True"
+AUTOCOMPLETE_MAX_AGE = int(os.environ.get("AUTOCOMPLETE_MAX_AGE", 600))
+AUTOCOMPLETE_MEMO_SIZE = int(os.environ.get("AUTOCOMPLETE_MEMO_SIZE", 20))
+AUTOCOMPLETE_MAX_LOOP_SCAN = int(os.environ.get("AUTOCOMPLETE_MAX_LOOP_SCAN", 2000))
+
+# Precomputed similar films ("manage.py compute_similar_films"): top
+# SIMILAR_FILMS_TOP_K neighbours per film by cosine similarity of genre, person,
+# type and description TF-IDF vectors; SIMILAR_FILMS_BATCH_SIZE films are scored
+# against the whole catalog at once (memory grows with batch size x films)
+SIMILAR_FILMS_TOP_K = int(os.environ.get("SIMILAR_FILMS_TOP_K", 20))
+SIMILAR_FILMS_BATCH_SIZE = int(os.environ.get("SIMILAR_FILMS_BATCH_SIZE", 256))
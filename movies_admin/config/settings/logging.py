@@ -10,8 +10,15 @@ LOGGING = {
         "default": {
             "format": "%(asctime)s %(levelname)s: %(message)s [in%(pathname)s:%(lineno)d]",
         },
+        "structured": {
+            "format": "%(asctime)s %(levelname)s %(name)s %(message)s",
+        },
     },
     "handlers": {
+        "structured-console": {
+            "class": "logging.StreamHandler",
+            "formatter": "structured",
+        },
         "debug-console": {
             "class": "logging.StreamHandler",
             "formatter": "default",
@@ -23,6 +30,11 @@ LOGGING = {
             "level": "DEBUG",
             "handlers": ["debug-console"],
             "propagate": False,
-        }
+        },
+        "sql_profiling": {
+            "level": "INFO",
+            "handlers": ["structured-console"],
+            "propagate": False,
+        },
     },
 }
@@ -0,0 +1,50 @@
+import os
+import sys
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .logging import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+# psycopg 3 connection pool: Django takes a connection from the pool for each
+# request and returns it at the end. Persistent connections are disabled because
+# the pool owns connection lifetime. The pool is per process and per database
+# alias, so workers * DB_POOL_MAX_SIZE must stay below max_connections.
+#
+# statement_timeout guards web requests against runaway queries. Management
+# commands (refresh_film_search, recount_counters, partition_link_tables, ...)
+# legitimately run for longer, so manage.py uses DB_COMMAND_STATEMENT_TIMEOUT
+# (0 - no limit) instead.
+if Path(sys.argv[0]).name == "manage.py":
+    STATEMENT_TIMEOUT = int(os.environ.get("DB_COMMAND_STATEMENT_TIMEOUT", 0))
+else:
+    STATEMENT_TIMEOUT = int(os.environ.get("DB_STATEMENT_TIMEOUT", 30000))
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = 0
+    database["CONN_HEALTH_CHECKS"] = True
+    database["OPTIONS"] = {
+        "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        "options": f"-c statement_timeout={STATEMENT_TIMEOUT}",
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            # Seconds to wait for a free connection before the request fails
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800)),
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+        },
+    }
+
+# Model signals invalidate the API cache only in the process that made the edit.
+# LocMemCache is per process, so other workers would keep serving stale responses
+# for MOVIES_CACHE_TIMEOUT: production needs a shared backend (Redis, Memcached).
+if CACHES["default"]["BACKEND"].endswith(".LocMemCache"):
+    raise ImproperlyConfigured(
+        "LocMemCache is per process and is for development only: set CACHE_BACKEND "
+        "and CACHE_LOCATION to a shared cache, e.g. "
+        "django.core.cache.backends.redis.RedisCache and redis://127.0.0.1:6379/1"
+    )
@@ -0,0 +1,12 @@
+# Gunicorn reads ./gunicorn.conf.py from the working directory by default
+
+
+def post_worker_init(worker) -> None:
+    """Запускает построение индекса автодополнения в каждом воркере.
+
+    Не при импорте config.wsgi: с --preload приложение загружается в мастере
+    до fork, и фоновый поток построения остался бы в мастере.
+    """
+    from movies import autocomplete
+
+    autocomplete.warm_up()
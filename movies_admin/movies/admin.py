@@ -1,27 +1,505 @@
-from django.contrib import admin
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import (
+    IS_POPUP_VAR,
+    ORDER_VAR,
+    TO_FIELD_VAR,
+    ChangeList,
+)
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.core.exceptions import EmptyResultSet, PermissionDenied, ValidationError
+from django.db import connection, transaction
+from django.db.models import F, FloatField, OuterRef, QuerySet, Value
+from django.db.models.functions import Greatest, Least
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from .models import Filmwork, FilmworkType, Genre, GenreFilmwork, Person, PersonFimwork
+from . import cache, deletion, similarity
+from .constants import RATING_MAX, PersonRoleChoice
+from .export import (
+    FILM_EXPORT_FIELDS,
+    FORMATS,
+    GENRE_EXPORT_FIELDS,
+    PERSON_EXPORT_FIELDS,
+    film_rows,
+    plain_rows,
+    streaming_export,
+)
+from .facets import FACETS, apply_facet_params, get_facets
+from .forms import AdjustRatingForm, AssignGenresForm, AttachPersonForm, ChangeTypeForm
+from .importer import start_import
+from .paginators import EstimatedCountPaginator, KnownCountPaginator
+from .models import (
+    DeleteJob,
+    Filmwork,
+    FilmworkType,
+    Genre,
+    GenreFilmwork,
+    ImportJob,
+    Person,
+    PersonFimwork,
+)
+
+
+class EstimatedCountChangeList(ChangeList):
+    """Список, согласующий номер страницы с уточненным числом строк.
+
+    EstimatedCountPaginator уточняет завышенную оценку на странице за концом
+    выборки; номер страницы и признаки пагинации пересчитываются по нему.
+    """
+
+    def get_results(self, request) -> None:
+        super().get_results(request)
+        if self.result_count != self.paginator.count:
+            self.result_count = self.paginator.count
+            self.can_show_all = self.result_count <= self.list_max_show_all
+            self.multi_page = self.result_count > self.list_per_page
+            self.page_num = min(self.page_num, self.paginator.num_pages)
+
+
+class FacetChangeList(EstimatedCountChangeList):
+    """Список, счетчики фасетов которого учитывают все его фильтры.
+
+    Фасеты считаются одним запросом с GROUPING SETS по выборке списка (поиск,
+    «Изменено», date_hierarchy и остальные фильтры) без условий самих фасетов:
+    get_facets применяет их сам, не сворачивая фасет до выбранного значения.
+    """
+
+    without_facets = False
+    facets = None
+
+    def get_filters(self, request):
+        filter_specs, *rest = super().get_filters(request)
+        if self.without_facets:
+            filter_specs = [
+                spec for spec in filter_specs if not isinstance(spec, FacetListFilter)
+            ]
+        return (filter_specs, *rest)
+
+    def get_facets(self, request) -> dict[str, list[dict]]:
+        if self.facets is not None:
+            return self.facets
+        # Полный перечень фасетов агрегирует всю выборку, поэтому кешируется
+        # по всей строке фильтров
+        cache_key = cache.make_key(
+            cache.FILM_LIST,
+            [
+                ("admin_facets", ["1"]),
+                *(
+                    (name, values)
+                    for name, values in self.filter_params.items()
+                    if name not in (ORDER_VAR, IS_POPUP_VAR, TO_FIELD_VAR)
+                ),
+            ],
+        )
+        self.facets = cache.load(cache_key)
+        if self.facets is None:
+            # get_queryset переопределяет фильтры и признаки списка
+            state = (
+                self.filter_specs,
+                self.has_filters,
+                self.has_active_filters,
+                self.clear_all_filters_qs,
+            )
+            self.without_facets = True
+            try:
+                queryset = self.get_queryset(request)
+            finally:
+                self.without_facets = False
+                (
+                    self.filter_specs,
+                    self.has_filters,
+                    self.has_active_filters,
+                    self.clear_all_filters_qs,
+                ) = state
+            try:
+                self.facets = get_facets(queryset, self.params)
+            except (ValueError, ValidationError):
+                self.facets = get_facets(queryset)
+            cache.store(cache_key, self.facets)
+        return self.facets
+
+
+class LargeTableMixin:
+    """Списки больших таблиц без полного сканирования.
+
+    Число строк оценивается планировщиком, поиск идет по GIN-индексу
+    полнотекстового вектора (префиксы слов), UUID ищется по первичному ключу.
+    В отличие от стандартного icontains, подстрока внутри слова не находится,
+    а слова запроса приводятся к основе по словарю search_vector.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_vector = None
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
+
+    def get_paginator(self, request, queryset, *args, **kwargs):
+        # Список упорядочен всегда, а автодополнение берет get_queryset без
+        # сортировки: без нее страницы отличались бы от запроса к запросу
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        return super().get_paginator(request, queryset, *args, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term: str):
+        search_term = search_term.strip()
+        if not search_term or self.search_vector is None:
+            return super().get_search_results(request, queryset, search_term)
+        try:
+            return queryset.filter(pk=uuid.UUID(search_term)), False
+        except ValueError:
+            pass
+        words = re.findall(r"\w+", search_term)
+        if not words:
+            return queryset.none(), False
+        search_query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            config=self.search_vector.config,
+            search_type="raw",
+        )
+        return (
+            queryset.alias(search_vector=self.search_vector).filter(
+                search_vector=search_query
+            ),
+            False,
+        )
+
+
+class RecentlyChangedFilter(admin.SimpleListFilter):
+    """Недавно измененные записи, новые изменения первыми."""
+
+    title = _("Изменено")
+    parameter_name = "changed"
+    periods = {
+        "1h": (_("За час"), timedelta(hours=1)),
+        "1d": (_("За сутки"), timedelta(days=1)),
+        "7d": (_("За неделю"), timedelta(days=7)),
+        "30d": (_("За 30 дней"), timedelta(days=30)),
+    }
+
+    def lookups(self, request, model_admin) -> list[tuple[str, str]]:
+        return [(value, label) for value, (label, _period) in self.periods.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.periods:
+            return queryset
+        _label, period = self.periods[self.value()]
+        return queryset.filter(updated_at__gte=timezone.now() - period)
+
+
+class AuditDatesMixin:
+    """Просмотр по времени изменения через B-tree индекс updated_at.
+
+    Внутри отобранного диапазона (фильтр «Изменено» или уровень date_hierarchy)
+    список сортируется по убыванию updated_at: индекс отдает строки диапазона
+    в этом порядке, и страница читается без сортировки всего диапазона.
+    """
+
+    date_hierarchy = "updated_at"
+    change_list_template = "admin/movies/audit_change_list.html"
+
+    def get_list_filter(self, request):
+        return (RecentlyChangedFilter, *super().get_list_filter(request))
+
+    def get_ordering(self, request):
+        if RecentlyChangedFilter.parameter_name in request.GET or any(
+            param.startswith(f"{self.date_hierarchy}__") for param in request.GET
+        ):
+            return ("-updated_at",)
+        return super().get_ordering(request)
+
+
+class ExportMixin:
+    """Потоковая выгрузка в CSV/NDJSON: действие и страница admin/.../export/<fmt>/."""
+
+    export_fields = ()
+    actions = ["export_csv", "export_ndjson"]
+
+    def export_rows(self, queryset):
+        return plain_rows(queryset, self.export_fields)
+
+    def export(self, queryset, fmt: str):
+        return streaming_export(
+            self.export_rows(queryset), self.export_fields, fmt, self.opts.model_name
+        )
+
+    @admin.action(description=_("Выгрузить в CSV"), permissions=["view"])
+    def export_csv(self, request, queryset):
+        return self.export(queryset, "csv")
+
+    @admin.action(description=_("Выгрузить в NDJSON"), permissions=["view"])
+    def export_ndjson(self, request, queryset):
+        return self.export(queryset, "ndjson")
+
+    def export_view(self, request, fmt: str):
+        if fmt not in FORMATS:
+            raise Http404
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        return self.export(self.get_queryset(request), fmt)
+
+    def get_urls(self):
+        return [
+            path(
+                "export/<str:fmt>/",
+                self.admin_site.admin_view(self.export_view),
+                name=f"{self.opts.app_label}_{self.opts.model_name}_export",
+            ),
+            *super().get_urls(),
+        ]
+
+
+class BulkDeleteMixin:
+    """Удаление выбранных записей фоновой задачей вместо delete_selected.
+
+    Стандартное действие собирает через Collector все каскадно удаляемые связи
+    в память и выводит их на странице подтверждения. Здесь подтверждение
+    показывает только число строк по таблицам, а записи со связями удаляются
+    set-based пачками (см. movies/deletion.py). Сигналы моделей не вызываются,
+    записи в журнал действий админки не пишутся.
+    """
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # delete_selected остается в списке, только если есть право на удаление
+        if actions.pop("delete_selected", None) is not None:
+            actions["bulk_delete"] = self.get_action("bulk_delete")
+        return actions
+
+    @admin.action(description=_("Удалить выбранные"), permissions=["delete"])
+    def bulk_delete(self, request, queryset):
+        if "apply" in request.POST:
+            job = deletion.create_job(queryset)
+            self.message_user(
+                request,
+                format_html(
+                    '{} <a href="{}">{}</a>',
+                    _("Запущено удаление записей: %(count)d.")
+                    % {"count": job.total_rows},
+                    reverse("admin:movies_deletejob_change", args=[job.pk]),
+                    job,
+                ),
+                messages.SUCCESS,
+            )
+            return None
+
+        return TemplateResponse(
+            request,
+            "admin/movies/bulk_delete.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": _("Удалить выбранные"),
+                "opts": self.model._meta,
+                "summary": deletion.summarize(queryset),
+                "action": request.POST["action"],
+                "select_across": request.POST.get("select_across") == "1",
+                # Без отмеченных строк changelist не вызывает действие, даже если
+                # выбраны все записи списка
+                "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            },
+        )
+
+
+class RelatedFilmsMixin:
+    """Постраничная секция кинопроизведений на странице изменения объекта.
+
+    Связи читаются по индексу обратного поиска таблицы связей, а общее число
+    берется из счетчика объекта, поэтому COUNT по таблице связей не нужен.
+    """
+
+    change_form_template = "admin/movies/related_films_change_form.html"
+    related_films_per_page = 20
+    related_films_page_var = "films_page"
+    related_films_ordering = (
+        F("film_work__creation_date").desc(nulls_last=True),
+        "film_work_id",
+        "id",
+    )
+    # Параметр фильтра списка кинопроизведений по объекту, если он есть
+    related_films_changelist_filter = None
+    # Обратная связь объекта с таблицей связей и его поле-счетчик;
+    # без related_films_lookup секция не выводится
+    related_films_lookup = None
+    related_films_count_field = None
+
+    def get_related_films(self, request, obj) -> tuple[QuerySet, int]:
+        """Выборка связей с кинопроизведениями и их число."""
+        links = getattr(obj, self.related_films_lookup).all()
+        return links, getattr(obj, self.related_films_count_field)
+
+    def get_related_films_context(self, request, obj) -> dict:
+        links, count = self.get_related_films(request, obj)
+        links = links.select_related("film_work").order_by(*self.related_films_ordering)
+        paginator = KnownCountPaginator(links, self.related_films_per_page, count)
+        return {
+            "related_films": paginator.get_page(
+                request.GET.get(self.related_films_page_var)
+            ),
+            "related_films_page_var": self.related_films_page_var,
+            "related_films_changelist_filter": self.related_films_changelist_filter,
+        }
+
+    def render_change_form(
+        self, request, context, add=False, change=False, form_url="", obj=None
+    ):
+        if obj is not None and self.related_films_lookup is not None:
+            context.update(self.get_related_films_context(request, obj))
+        return super().render_change_form(request, context, add, change, form_url, obj)
+
+
+class FacetListFilter(admin.SimpleListFilter):
+    """Фильтр со счетчиками, общими для всех фасетов одной страницы.
+
+    Счетчики зависят от всей выборки списка, которая известна только после
+    создания фильтров, поэтому значения подставляются при выводе (choices) из
+    FacetChangeList.get_facets.
+    """
+
+    def lookups(self, request, model_admin) -> list[tuple[str, str]]:
+        return []
+
+    def has_output(self) -> bool:
+        return True
+
+    def get_label(self, item: dict) -> str:
+        return str(item["value"])
+
+    def choices(self, changelist):
+        self.lookup_choices = [
+            (str(item["value"]), f"{self.get_label(item)} ({item['count']})")
+            for item in changelist.get_facets(self.request)[self.parameter_name]
+        ]
+        yield from super().choices(changelist)
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return apply_facet_params(queryset, {self.parameter_name: self.value()})
+        except (ValueError, ValidationError):
+            return queryset.none()
+
+
+class GenreFacetFilter(FacetListFilter):
+    title = _("Жанр")
+    parameter_name = "genre"
+
+    def get_label(self, item: dict) -> str:
+        return item["name"]
+
+
+class TypeFacetFilter(FacetListFilter):
+    title = _("Тип кинопроизведения")
+    parameter_name = "type"
+
+
+class RatingFacetFilter(FacetListFilter):
+    title = _("Рейтинг")
+    parameter_name = "rating"
+
+    def get_label(self, item: dict) -> str:
+        return f"{item['value']}–{item['value'] + 1}"
+
+
+class YearFacetFilter(FacetListFilter):
+    title = _("Год создания")
+    parameter_name = "year"
 
 
 @admin.register(Genre)
-class GenreAdmin(admin.ModelAdmin):
-    list_display = ("name", "created_at", "updated_at")
+class GenreAdmin(
+    LargeTableMixin,
+    ExportMixin,
+    BulkDeleteMixin,
+    RelatedFilmsMixin,
+    admin.ModelAdmin,
+):
+    list_display = ("name", "films_count", "created_at", "updated_at")
+    export_fields = GENRE_EXPORT_FIELDS
+    # Жанр велик для сортировки по дате: страницы идут в порядке индекса
+    # (genre_id, film_work_id), полный список с сортировкой и фасетами -
+    # в списке кинопроизведений с фильтром жанра
+    related_films_ordering = ("film_work_id",)
+    related_films_changelist_filter = GenreFacetFilter.parameter_name
+    related_films_lookup = "genre_filmworks"
+    related_films_count_field = "films_count"
 
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
-    list_display = ("full_name", "created_at", "updated_at")
+class PersonAdmin(
+    AuditDatesMixin,
+    LargeTableMixin,
+    ExportMixin,
+    BulkDeleteMixin,
+    RelatedFilmsMixin,
+    admin.ModelAdmin,
+):
+    # Счетчики ведут триггеры, сортировка по ним идет по индексам без COUNT
+    list_display = (
+        "full_name",
+        "actor_films_count",
+        "director_films_count",
+        "writer_films_count",
+        "created_at",
+        "updated_at",
+    )
+    search_fields = ("full_name",)
+    search_vector = SearchVector("full_name", config="simple")
+    search_help_text = _("Начала слов имени, все слова обязательны, или UUID")
+    export_fields = PERSON_EXPORT_FIELDS
+    related_films_lookup = "person_roles"
+    related_films_role_var = "films_role"
+
+    def get_related_films_role(self, request) -> str | None:
+        role = request.GET.get(self.related_films_role_var)
+        return role if role in PersonRoleChoice.values else None
+
+    def get_related_films(self, request, obj: Person) -> tuple[QuerySet, int]:
+        links = obj.person_roles.all()
+        role = self.get_related_films_role(request)
+        if role:
+            return links.filter(role=role), getattr(obj, f"{role}_films_count")
+        return links, sum(getattr(obj, field) for field in obj.counter_fields)
+
+    def get_related_films_context(self, request, obj: Person) -> dict:
+        return {
+            **super().get_related_films_context(request, obj),
+            "related_films_roles": PersonRoleChoice.choices,
+            "related_films_role_var": self.related_films_role_var,
+            "related_films_role": self.get_related_films_role(request),
+        }
 
 
 class GenreFilmworkInline(admin.TabularInline):
     model = GenreFilmwork
     extra = 0
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == "genre":
+            # Список жанров читается один раз на запрос, а не для каждой строки
+            if not hasattr(request, "_genre_choices"):
+                request._genre_choices = list(iter(formfield.choices))
+            formfield.choices = request._genre_choices
+        return formfield
+
 
 class PersonFimworkInline(admin.TabularInline):
     model = PersonFimwork
     extra = 0
+    autocomplete_fields = ("person",)
 
 
 @admin.register(FilmworkType)
@@ -30,21 +508,297 @@ class FilmworkTypeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Filmwork)
-class FilmworkAdmin(admin.ModelAdmin):
+class FilmworkAdmin(
+    AuditDatesMixin,
+    LargeTableMixin,
+    ExportMixin,
+    BulkDeleteMixin,
+    admin.ModelAdmin,
+):
     list_display = (
         "title",
         "rating",
         "type",
         "creation_date",
         "get_genres",
+        "persons_count",
         "created_at",
         "updated_at",
     )
-    list_filter = ("type", "creation_date")
+    # type допускает NULL, поэтому автоматический select_related его не подхватит
+    list_select_related = ("type",)
+    list_filter = (
+        GenreFacetFilter,
+        TypeFacetFilter,
+        RatingFacetFilter,
+        YearFacetFilter,
+    )
     search_fields = ("title", "description", "id")
+    search_vector = SearchVector("title", "description", config=settings.SEARCH_CONFIG)
+    search_help_text = _(
+        "Начала слов названия и описания с учетом словоформ, все слова "
+        "обязательны, или UUID"
+    )
 
     inlines = [GenreFilmworkInline, PersonFimworkInline]
+    actions = [
+        "assign_genres",
+        "change_type",
+        "adjust_rating",
+        "attach_person",
+        *ExportMixin.actions,
+    ]
+    export_fields = FILM_EXPORT_FIELDS
+    # Больше выбранных фильмов - кеш фильмов сбрасывается целиком
+    invalidate_ids_limit = 1000
+    # Похожие фильмы читаются из таблицы, пересчитанной compute_similar_films
+    change_form_template = "admin/movies/filmwork/change_form.html"
+    # Счетчики фасетов считает FacetChangeList; встроенные счетчики Django
+    # выполняли бы по запросу на каждое значение
+    show_facets = admin.ShowFacets.NEVER
+
+    def get_changelist(self, request, **kwargs):
+        return FacetChangeList
+
+    def export_rows(self, queryset):
+        return film_rows(queryset)
+
+    def _bulk_action(self, request, queryset, form_class, title: str, apply):
+        """Промежуточная форма массового действия.
+
+        Изменения выполняются set-based запросами с выборкой подзапросом, без
+        загрузки всех id в память, поэтому сигналы моделей не срабатывают и кеш
+        сбрасывается явно: по id выборки, если их не больше
+        invalidate_ids_limit, иначе целиком.
+        """
+        form = form_class(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            selection = queryset.order_by().values("id")
+            with transaction.atomic():
+                # Выборка читается до изменений: после них фильмы могут
+                # выпасть из фильтра списка, и кеш остался бы несброшенным
+                film_ids = list(
+                    selection.values_list("id", flat=True)[
+                        : self.invalidate_ids_limit + 1
+                    ]
+                )
+                if len(film_ids) > self.invalidate_ids_limit:
+                    count = queryset.count()
+                else:
+                    count = len(film_ids)
+                apply(selection, form.cleaned_data)
+                self._invalidate(film_ids)
+            self.message_user(
+                request,
+                _("%(title)s: обработано кинопроизведений: %(count)d")
+                % {"title": title, "count": count},
+                messages.SUCCESS,
+            )
+            return None
+
+        select_across = request.POST.get("select_across") == "1"
+        return TemplateResponse(
+            request,
+            "admin/movies/filmwork/bulk_action.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": title,
+                "opts": self.model._meta,
+                "form": form,
+                "action": request.POST["action"],
+                "select_across": select_across,
+                # Без отмеченных id Django не вызовет действие из формы
+                "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                "count": queryset.count(),
+            },
+        )
+
+    def _invalidate(self, film_ids: list[uuid.UUID]) -> None:
+        """Сбрасывает кеш выбранных фильмов, большой выборки - целиком.
+
+        film_ids - не больше invalidate_ids_limit + 1 id выборки.
+        """
+        if len(film_ids) > self.invalidate_ids_limit:
+            cache.invalidate_on_commit(
+                cache.FILM_DETAIL, cache.FILM_LIST, cache.FILM_SIMILAR
+            )
+        else:
+            cache.invalidate_films_on_commit(film_ids)
 
-    @admin.action(description=_("Жанры"))
+    @staticmethod
+    def _insert_links(
+        selection: QuerySet, model, columns: tuple[str, ...], source: str, params: list
+    ) -> None:
+        """Связи всех выбранных фильмов одним INSERT ... SELECT.
+
+        source - строки значений, которые соединяются с каждым фильмом выборки.
+        """
+        try:
+            films_sql, films_params = selection.query.sql_with_params()
+        except EmptyResultSet:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO {table} (id, film_work_id, {columns}, created_at) "
+                "SELECT gen_random_uuid(), s.id, {values}, now() "
+                "FROM ({films}) s CROSS JOIN {source} "
+                "ON CONFLICT DO NOTHING;".format(
+                    table=connection.ops.quote_name(model._meta.db_table),
+                    columns=", ".join(columns),
+                    values=", ".join(f"v.{column}" for column in columns),
+                    films=films_sql,
+                    source=source,
+                ),
+                [*films_params, *params],
+            )
+
+    @admin.action(description=_("Добавить жанры"), permissions=["change"])
+    def assign_genres(self, request, queryset):
+        def apply(selection, data) -> None:
+            self._insert_links(
+                selection,
+                GenreFilmwork,
+                ("genre_id",),
+                "unnest(%s::uuid[]) v(genre_id)",
+                [[genre.pk for genre in data["genres"]]],
+            )
+
+        return self._bulk_action(
+            request, queryset, AssignGenresForm, _("Добавить жанры"), apply
+        )
+
+    @admin.action(description=_("Изменить тип"), permissions=["change"])
+    def change_type(self, request, queryset):
+        def apply(selection, data) -> None:
+            Filmwork.objects.filter(id__in=selection).update(
+                type=data["type"], updated_at=timezone.now()
+            )
+
+        return self._bulk_action(
+            request, queryset, ChangeTypeForm, _("Изменить тип"), apply
+        )
+
+    @admin.action(description=_("Изменить рейтинг"), permissions=["change"])
+    def adjust_rating(self, request, queryset):
+        def apply(selection, data) -> None:
+            # Фильмы без рейтинга не получают его из ничего: GREATEST
+            # пропускает NULL и вернул бы 0
+            Filmwork.objects.filter(id__in=selection, rating__isnull=False).update(
+                rating=Least(
+                    Greatest(
+                        F("rating") + Value(data["delta"]),
+                        Value(0.0),
+                        output_field=FloatField(),
+                    ),
+                    Value(float(RATING_MAX)),
+                ),
+                updated_at=timezone.now(),
+            )
+
+        return self._bulk_action(
+            request, queryset, AdjustRatingForm, _("Изменить рейтинг"), apply
+        )
+
+    @admin.action(description=_("Добавить участника"), permissions=["change"])
+    def attach_person(self, request, queryset):
+        def apply(selection, data) -> None:
+            self._insert_links(
+                selection,
+                PersonFimwork,
+                ("person_id", "role"),
+                "(VALUES (%s::uuid, %s)) v(person_id, role)",
+                [data["person"].pk, data["role"]],
+            )
+
+        return self._bulk_action(
+            request, queryset, AttachPersonForm, _("Добавить участника"), apply
+        )
+
+    def render_change_form(
+        self, request, context, add=False, change=False, form_url="", obj=None
+    ):
+        if obj is not None:
+            context["similar_films"] = similarity.similar_films(obj.pk)
+        return super().render_change_form(request, context, add, change, form_url, obj)
+
+    def get_queryset(self, request):
+        # Подзапрос на строку читает одну секцию genre_film_work по индексу;
+        # prefetch со списком id страницы задевает все секции и читает их целиком
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                genre_names=ArraySubquery(
+                    GenreFilmwork.objects.filter(film_work=OuterRef("pk"))
+                    .order_by("genre__name")
+                    .values("genre__name")
+                )
+            )
+        )
+
+    @admin.display(description=_("Жанры"))
     def get_genres(self, obj: Filmwork) -> str:
-        return ", ".join(genre.name for genre in obj.genres.all())[:50]
+        return ", ".join(obj.genre_names)[:50]
+
+
+class JobProgressMixin:
+    @admin.display(description=_("Прогресс"))
+    def get_progress(self, obj) -> str:
+        if not obj.total_rows:
+            return f"{obj.processed_rows}"
+        percent = obj.processed_rows * 100 // obj.total_rows
+        return f"{obj.processed_rows} / {obj.total_rows} ({percent}%)"
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(JobProgressMixin, admin.ModelAdmin):
+    list_display = (
+        "entity",
+        "format",
+        "status",
+        "get_progress",
+        "invalid_rows",
+        "created_at",
+        "updated_at",
+    )
+    list_filter = ("status", "entity")
+    fields = (
+        "entity",
+        "format",
+        "file",
+        "status",
+        "total_rows",
+        "processed_rows",
+        "invalid_rows",
+        "errors",
+    )
+    readonly_fields = (
+        "status",
+        "total_rows",
+        "processed_rows",
+        "invalid_rows",
+        "errors",
+    )
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    def save_model(self, request, obj, form, change) -> None:
+        super().save_model(request, obj, form, change)
+        start_import(obj)
+
+
+@admin.register(DeleteJob)
+class DeleteJobAdmin(JobProgressMixin, admin.ModelAdmin):
+    """Задачи создаются действием «Удалить выбранные» в списках movies."""
+
+    list_display = ("entity", "status", "get_progress", "created_at", "updated_at")
+    list_filter = ("status", "entity")
+    fields = ("entity", "status", "total_rows", "processed_rows", "errors")
+    readonly_fields = fields
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
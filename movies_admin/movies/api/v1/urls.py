@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+
+urlpatterns = [
+    path("movies/", views.MoviesListApi.as_view(), name="movies-list"),
+    path("movies/search/", views.MoviesSearchApi.as_view(), name="movies-search"),
+    path("movies/facets/", views.MoviesFacetsApi.as_view(), name="movies-facets"),
+    path("movies/<uuid:pk>/", views.MoviesDetailApi.as_view(), name="movies-detail"),
+    path(
+        "movies/<uuid:pk>/similar/",
+        views.MoviesSimilarApi.as_view(),
+        name="movies-similar",
+    ),
+    path("autocomplete/", views.AutocompleteApi.as_view(), name="autocomplete"),
+    path("genres/", views.GenresListApi.as_view(), name="genres-list"),
+    path("types/", views.TypesListApi.as_view(), name="types-list"),
+]
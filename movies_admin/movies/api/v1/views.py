@@ -0,0 +1,409 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.exceptions import BadRequest
+from django.db import close_old_connections
+from django.db.models import F, FloatField, OuterRef, Q, QuerySet, Value
+from django.db.models.functions import Cast
+from django.http import Http404, JsonResponse
+from django.views import View
+from django.views.generic.detail import BaseDetailView
+from django.views.generic.list import BaseListView
+
+from movies import autocomplete, cache, similarity
+from movies.constants import PersonRoleChoice
+from movies.facets import get_facets
+from movies.models import (
+    Filmwork,
+    FilmworkSearch,
+    FilmworkType,
+    Genre,
+    GenreFilmwork,
+    PersonFimwork,
+)
+
+
+class JsonApiMixin:
+    """Асинхронный GET: ответ из кеша или из БД одним переходом в sync-поток.
+
+    Под ASGI ожидание БД не занимает воркер, а соединения берутся из пула.
+    Контекст собирается в потоке пула потоков (thread_sensitive=False): с общим
+    sync-потоком процесса запросы всех клиентов выполнялись бы по очереди.
+    Данные TestCase видны только соединению основного потока, поэтому тесты
+    API включают thread_sensitive.
+    """
+
+    http_method_names = ["get"]
+    thread_sensitive = False
+
+    def get_cache_key(self) -> str | None:
+        return None
+
+    def build_context(self) -> dict:
+        self.object_list = self.get_queryset()
+        return self.get_context_data()
+
+    def get_context(self) -> dict:
+        cache_key = self.get_cache_key()
+        if cache_key is not None:
+            context = cache.load(cache_key)
+            if context is not None:
+                return context
+        context = self.build_context()
+        if cache_key is not None:
+            cache.store(cache_key, context)
+        return context
+
+    def get_context_in_thread(self) -> dict:
+        try:
+            return self.get_context()
+        finally:
+            if not self.thread_sensitive:
+                # Соединения потока пула закрываются (возвращаются в пул БД)
+                # так же, как по сигналу request_finished
+                close_old_connections()
+
+    async def get(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            context = await sync_to_async(
+                self.get_context_in_thread, thread_sensitive=self.thread_sensitive
+            )()
+        except BadRequest as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        except Http404 as exc:
+            return JsonResponse({"error": str(exc) or "Not found"}, status=404)
+        return JsonResponse(context)
+
+
+class MoviesApiMixin(JsonApiMixin):
+    model = Filmwork
+    fields = ("id", "title", "description", "creation_date", "rating", "type")
+
+    @staticmethod
+    def _aggregate_persons(role: str) -> ArraySubquery:
+        """Имена участников роли подзапросом.
+
+        Однофамильцы не схлопываются, а связи с участниками не размножают
+        строки жанров.
+        """
+        return ArraySubquery(
+            PersonFimwork.objects.filter(film_work=OuterRef("pk"), role=role)
+            .order_by("person__full_name", "person_id")
+            .values("person__full_name")
+        )
+
+    def get_queryset(self) -> QuerySet:
+        """Фильмы с жанрами и участниками, собранными в одном запросе."""
+        return (
+            Filmwork.objects.values(*self.fields)
+            .annotate(
+                genres=ArrayAgg("genres__name", distinct=True, default=Value([])),
+                actors=self._aggregate_persons(PersonRoleChoice.ACTOR),
+                directors=self._aggregate_persons(PersonRoleChoice.DIRECTOR),
+                writers=self._aggregate_persons(PersonRoleChoice.WRITER),
+            )
+            .order_by("id")
+        )
+
+
+class QueryParamsMixin:
+    paginate_by = 50
+    max_paginate_by = 100
+
+    def _get_param(self, name: str, cast: type):
+        value = self.request.GET.get(name)
+        if value in (None, ""):
+            return None
+        try:
+            return cast(value)
+        except ValueError:
+            raise BadRequest(f"Invalid value for '{name}': {value}")
+
+    def filter_type_and_rating(self, queryset: QuerySet) -> QuerySet:
+        film_type = self._get_param("type", str)
+        if film_type is not None:
+            queryset = queryset.filter(type=film_type)
+        return self.filter_rating(queryset)
+
+    def filter_rating(self, queryset: QuerySet) -> QuerySet:
+        rating_gte = self._get_param("rating_gte", float)
+        if rating_gte is not None:
+            queryset = queryset.filter(rating__gte=rating_gte)
+        rating_lte = self._get_param("rating_lte", float)
+        if rating_lte is not None:
+            queryset = queryset.filter(rating__lte=rating_lte)
+        return queryset
+
+    def get_paginate_by(self, queryset: QuerySet) -> int:
+        page_size = self._get_param("page_size", int) or self.paginate_by
+        return max(1, min(page_size, self.max_paginate_by))
+
+
+class MoviesListApi(QueryParamsMixin, MoviesApiMixin, BaseListView):
+    def get_cache_key(self) -> str:
+        return cache.make_key(cache.FILM_LIST, self.request.GET.lists())
+
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()
+
+        genre = self._get_param("genre", uuid.UUID)
+        if genre is not None:
+            # Подзапрос вместо join, чтобы фильтр не сужал агрегат жанров
+            queryset = queryset.filter(
+                id__in=GenreFilmwork.objects.filter(genre_id=genre).values(
+                    "film_work_id"
+                )
+            )
+        queryset = self.filter_type_and_rating(queryset)
+
+        # Keyset-пагинация по первичному ключу вместо OFFSET
+        cursor = self._get_param("cursor", uuid.UUID)
+        if cursor is not None:
+            queryset = queryset.filter(id__gt=cursor)
+        return queryset
+
+    def get_context_data(self, *, object_list=None, **kwargs) -> dict:
+        queryset = object_list if object_list is not None else self.object_list
+        page_size = self.get_paginate_by(queryset)
+        results = list(queryset[: page_size + 1])
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            next_cursor = results[-1]["id"]
+        return {"next": next_cursor, "results": results}
+
+
+class MoviesSearchApi(QueryParamsMixin, JsonApiMixin, BaseListView):
+    """Полнотекстовый поиск по денормализованным документам без join-ов.
+
+    Keyset-пагинация: курсор - id последнего фильма страницы, при поиске
+    по запросу - ранг и id (порядок -rank, id).
+    """
+
+    fields = (
+        "id",
+        "title",
+        "description",
+        "creation_date",
+        "rating",
+        "type",
+        "genres",
+        "actors",
+        "directors",
+        "writers",
+    )
+
+    def get_cache_key(self) -> str:
+        return cache.make_key(cache.FILM_SEARCH, self.request.GET.lists())
+
+    def get_cursor(self, ranked: bool) -> tuple[float | None, uuid.UUID] | None:
+        cursor = self._get_param("cursor", str)
+        if cursor is None:
+            return None
+        try:
+            if not ranked:
+                return None, uuid.UUID(cursor)
+            rank, film_id = cursor.split("_", 1)
+            return float(rank), uuid.UUID(film_id)
+        except ValueError:
+            raise BadRequest(f"Invalid value for 'cursor': {cursor}")
+
+    def get_queryset(self) -> QuerySet:
+        queryset = FilmworkSearch.objects.values(*self.fields)
+
+        query = self._get_param("query", str)
+        cursor = self.get_cursor(ranked=query is not None)
+        if query is not None:
+            search_query = SearchQuery(
+                query, config=settings.SEARCH_CONFIG, search_type="websearch"
+            )
+            # ts_rank возвращает real; в double ранг из курсора сравнивается точно
+            rank = Cast(SearchRank(F("search"), search_query), FloatField())
+            queryset = (
+                queryset.filter(search=search_query)
+                .annotate(rank=rank)
+                .order_by("-rank", "id")
+            )
+            if cursor is not None:
+                rank, film_id = cursor
+                queryset = queryset.filter(
+                    Q(rank__lt=rank) | Q(rank=rank, id__gt=film_id)
+                )
+        else:
+            queryset = queryset.order_by("id")
+            if cursor is not None:
+                queryset = queryset.filter(id__gt=cursor[1])
+
+        genre = self._get_param("genre", uuid.UUID)
+        if genre is not None:
+            queryset = queryset.filter(genre_ids__contains=[genre])
+        return self.filter_type_and_rating(queryset)
+
+    def get_context_data(self, *, object_list=None, **kwargs) -> dict:
+        queryset = object_list if object_list is not None else self.object_list
+        page_size = self.get_paginate_by(queryset)
+        results = list(queryset[: page_size + 1])
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            next_cursor = (
+                str(last["id"])
+                if "rank" not in last
+                else f"{last['rank']!r}_{last['id']}"
+            )
+        for result in results:
+            result.pop("rank", None)
+        return {"next": next_cursor, "results": results}
+
+
+class MoviesFacetsApi(QueryParamsMixin, JsonApiMixin, BaseListView):
+    """Счетчики по жанрам, типам, рейтингу и годам для текущих фильтров."""
+
+    model = Filmwork
+
+    def get_cache_key(self) -> str:
+        return cache.make_key(
+            cache.FILM_LIST, [("facets", ["1"]), *self.request.GET.lists()]
+        )
+
+    def get_queryset(self) -> QuerySet:
+        # Тип, жанр, рейтинг и год - сами фасеты, они применяются в get_facets
+        queryset = self.filter_rating(Filmwork.objects.all())
+        query = self._get_param("query", str)
+        if query is not None:
+            search_query = SearchQuery(
+                query, config=settings.SEARCH_CONFIG, search_type="websearch"
+            )
+            queryset = queryset.filter(
+                id__in=FilmworkSearch.objects.filter(search=search_query).values("id")
+            )
+        return queryset
+
+    def get_context_data(self, **kwargs) -> dict:
+        return get_facets(
+            self.object_list,
+            {
+                "genre": self._get_param("genre", uuid.UUID),
+                "type": self._get_param("type", str),
+                "rating": self._get_param("rating", int),
+                "year": self._get_param("year", int),
+            },
+        )
+
+
+class MoviesDetailApi(MoviesApiMixin, BaseDetailView):
+    def get_cache_key(self) -> str:
+        return cache.film_key(self.kwargs["pk"])
+
+    def build_context(self) -> dict:
+        self.object = self.get_object()
+        return self.get_context_data()
+
+    def get_context_data(self, **kwargs) -> dict:
+        return self.object
+
+
+class MoviesSimilarApi(JsonApiMixin, View):
+    """Похожие фильмы из предрассчитанной таблицы по убыванию близости."""
+
+    fields = ("id", "title", "creation_date", "rating")
+
+    def get_cache_key(self) -> str:
+        return cache.make_key(cache.FILM_SIMILAR, [("id", [str(self.kwargs["pk"])])])
+
+    def build_context(self) -> dict:
+        links = list(similarity.similar_films(self.kwargs["pk"]))
+        # Пустой список - либо соседи не рассчитаны, либо фильма нет
+        if not links and not Filmwork.objects.filter(pk=self.kwargs["pk"]).exists():
+            raise Http404
+        return {
+            "results": [
+                {
+                    **{field: getattr(link.similar, field) for field in self.fields},
+                    "type": link.similar.type_id,
+                    "score": link.score,
+                }
+                for link in links
+            ]
+        }
+
+
+class GenresListApi(JsonApiMixin, BaseListView):
+    queryset = Genre.objects.values("id", "name").order_by("name")
+
+    def get_cache_key(self) -> str:
+        return cache.make_key(cache.GENRE_LIST, ())
+
+    def get_context_data(self, **kwargs) -> dict:
+        return {"results": list(self.object_list)}
+
+
+class TypesListApi(JsonApiMixin, BaseListView):
+    queryset = FilmworkType.objects.values("slug", "name").order_by("name")
+
+    def get_cache_key(self) -> str:
+        return cache.make_key(cache.TYPE_LIST, ())
+
+    def get_context_data(self, **kwargs) -> dict:
+        return {"results": list(self.object_list)}
+
+
+class AutocompleteApi(QueryParamsMixin, JsonApiMixin, View):
+    """Подсказки по началу слов названий фильмов или имен персон.
+
+    Отвечает из индекса в памяти процесса без перехода в sync-поток, кроме
+    незапомненных коротких префиксов, пока индекс строится - запросом к БД.
+    """
+
+    paginate_by = 10
+    # Вид -> поля подписи и ранга в ответе
+    fields = {
+        autocomplete.FILM: ("title", "rating"),
+        autocomplete.PERSON: ("full_name", "films_count"),
+    }
+
+    def get_kind(self) -> str:
+        kind = self._get_param("kind", str) or autocomplete.FILM
+        if kind not in self.fields:
+            raise BadRequest(f"Invalid value for 'kind': {kind}")
+        return kind
+
+    def get_limit(self) -> int:
+        page_size = self._get_param("page_size", int) or self.paginate_by
+        return max(1, min(page_size, settings.AUTOCOMPLETE_MEMO_SIZE))
+
+    def serialize(self, kind: str, entries: list[autocomplete.Entry]) -> dict:
+        label, rank = self.fields[kind]
+        return {
+            "results": [
+                {"id": entry.id, label: entry.label, rank: entry.rank}
+                for entry in entries
+            ]
+        }
+
+    def get_context(self) -> dict:
+        kind, limit = self.get_kind(), self.get_limit()
+        query = self._get_param("query", str) or ""
+        return self.serialize(kind, autocomplete.search_database(kind, query, limit))
+
+    async def get(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            kind, limit = self.get_kind(), self.get_limit()
+        except BadRequest as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        query = self._get_param("query", str) or ""
+        index = autocomplete.registry.get(kind)
+        if index is None:
+            return await super().get(request, *args, **kwargs)
+        entries = index.search(query, limit, settings.AUTOCOMPLETE_MAX_LOOP_SCAN)
+        if entries is None:
+            # Длинный диапазон короткого префикса разбирается вне event loop
+            entries = await sync_to_async(index.search, thread_sensitive=False)(
+                query, limit
+            )
+        return JsonResponse(self.serialize(kind, entries))
@@ -1,8 +1,26 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import pre_migrate
 from django.utils.translation import gettext_lazy as _
 
 
+def create_content_schema(using: str, **kwargs) -> None:
+    """Создает схему content до миграций: она нужна уже 0001_initial.
+
+    Схема создается не миграцией: миграция, которая выполняется раньше
+    0001_initial, сделала бы историю миграций уже развернутых БД несогласованной.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {settings.CONTENT_SCHEMA};")
+
+
 class MoviesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "movies"
     verbose_name = _("Фильмы")
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
+
+        pre_migrate.connect(create_content_schema, sender=self)
@@ -0,0 +1,309 @@
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import close_old_connections, connection
+from django.db.models import F, QuerySet
+from django.db.models.functions import Coalesce
+
+from .models import Filmwork, Person
+
+
+logger = logging.getLogger(__name__)
+
+FILM = "film"
+PERSON = "person"
+KINDS = (FILM, PERSON)
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+# Верхняя граница диапазона ключей с общим префиксом
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    """Ключ поиска: слова в нижнем регистре без диакритики и пунктуации."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def word_keys(text: str) -> list[str]:
+    """Ключи с каждого слова: «Star Wars» находится по «star» и по «wars»."""
+    words = normalize(text).split()
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+@dataclass(frozen=True)
+class Entry:
+    id: str
+    label: str
+    rank: float
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей с параллельным массивом id записей.
+
+    Записи с ключами на префикс лежат непрерывным диапазоном, который находится
+    двоичным поиском. Лучшие по рангу записи больших диапазонов (короткие
+    префиксы) запоминаются, при изменении записи сбрасываются запомненные
+    префиксы ее ключей. Диапазон разбирается вне блокировки, поэтому долгий
+    разбор не задерживает поиски в других потоках и в event loop.
+    """
+
+    def __init__(self, entries: Iterable[Entry], memo_size: int) -> None:
+        self.entries = {entry.id: entry for entry in entries}
+        pairs = sorted(
+            (key, entry.id)
+            for entry in self.entries.values()
+            for key in word_keys(entry.label)
+        )
+        self.keys = [key for key, _id in pairs]
+        self.ids = [entry_id for _key, entry_id in pairs]
+        self.memo_size = memo_size
+        self.memo: dict[str, list[Entry]] = {}
+        # Номер изменения: результат разбора, начатого до изменения, не запоминается
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def order(entry: Entry) -> tuple:
+        return -entry.rank, entry.label, entry.id
+
+    def search(
+        self, query: str, limit: int, max_scan: int | None = None
+    ) -> list[Entry] | None:
+        """Лучшие записи с ключом на префикс запроса.
+
+        None, если ответа нет среди запомненных, а диапазон длиннее max_scan
+        ключей: такой поиск выполняется вне event loop.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self.lock:
+            if prefix in self.memo:
+                return self.memo[prefix][:limit]
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + _PREFIX_END, start)
+            if max_scan is not None and end - start > max_scan:
+                return None
+            ids = self.ids[start:end]
+            generation = self.generation
+        found = {self.entries.get(entry_id) for entry_id in ids}
+        found.discard(None)
+        if len(found) <= self.memo_size:
+            return sorted(found, key=self.order)[:limit]
+        best = heapq.nsmallest(self.memo_size, found, key=self.order)
+        with self.lock:
+            if self.generation == generation:
+                self.memo[prefix] = best
+        return best[:limit]
+
+    def _forget(self, label: str) -> None:
+        for key in word_keys(label):
+            for end in range(1, len(key) + 1):
+                self.memo.pop(key[:end], None)
+
+    def _remove(self, entry_id: str) -> None:
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self.generation += 1
+        for key in word_keys(entry.label):
+            position = bisect_left(self.keys, key)
+            while self.ids[position] != entry_id:
+                position += 1
+            del self.keys[position], self.ids[position]
+        self._forget(entry.label)
+
+    def put(self, entry: Entry) -> None:
+        with self.lock:
+            self._remove(entry.id)
+            self.generation += 1
+            self.entries[entry.id] = entry
+            for key in word_keys(entry.label):
+                position = bisect_left(self.keys, key)
+                self.keys.insert(position, key)
+                self.ids.insert(position, entry.id)
+            self._forget(entry.label)
+
+    def remove(self, entry_id: str) -> None:
+        with self.lock:
+            self._remove(entry_id)
+
+
+def film_entries(queryset: QuerySet) -> QuerySet:
+    return queryset.annotate(rank=Coalesce("rating", 0.0)).values_list(
+        "id", "title", "rank"
+    )
+
+
+def person_entries(queryset: QuerySet) -> QuerySet:
+    return queryset.annotate(
+        rank=F("actor_films_count")
+        + F("director_films_count")
+        + F("writer_films_count")
+    ).values_list("id", "full_name", "rank")
+
+
+# Вид -> (модель, выборка (id, подпись, ранг), поле подписи)
+SOURCES = {
+    FILM: (Filmwork, film_entries, "title"),
+    PERSON: (Person, person_entries, "full_name"),
+}
+
+
+def _load(kind: str) -> PrefixIndex:
+    model, entries, _field = SOURCES[kind]
+    rows = entries(model.objects.all()).iterator(chunk_size=10000)
+    return PrefixIndex(
+        (Entry(str(pk), label, rank) for pk, label, rank in rows),
+        settings.AUTOCOMPLETE_MEMO_SIZE,
+    )
+
+
+class Registry:
+    """Индексы процесса: строятся в фоне и перестраиваются по возрасту.
+
+    Изменения через модели применяются сигналами сразу, а записи в обход
+    моделей (импорт, загрузчик, массовые действия) попадают в индекс при
+    перестройке раз в AUTOCOMPLETE_MAX_AGE секунд. Пока индекс не построен,
+    поиск возвращает None и представление идет в БД.
+    """
+
+    def __init__(self) -> None:
+        self.indexes: dict[str, PrefixIndex] = {}
+        self.built_at = 0.0
+        self.building = False
+        # Изменения за время перестройки, применяются к новым индексам
+        self.pending: list[tuple[str, str, Entry | None]] = []
+        self.lock = threading.Lock()
+
+    def build(self) -> None:
+        close_old_connections()
+        try:
+            started = time.monotonic()
+            indexes = {kind: _load(kind) for kind in KINDS}
+            with self.lock:
+                for kind, entry_id, entry in self.pending:
+                    if entry is None:
+                        indexes[kind].remove(entry_id)
+                    else:
+                        indexes[kind].put(entry)
+                self.indexes = indexes
+            logger.info(
+                "Autocomplete index built in %.1fs: %s",
+                time.monotonic() - started,
+                {kind: len(index) for kind, index in indexes.items()},
+            )
+        except Exception:
+            logger.exception("Autocomplete index build failed")
+        finally:
+            # После ошибки следующая попытка тоже через AUTOCOMPLETE_MAX_AGE
+            with self.lock:
+                self.built_at = time.monotonic()
+                self.building = False
+                self.pending = []
+            connection.close()
+
+    def refresh(self) -> None:
+        """Запускает перестройку в фоновом потоке, если она еще не идет."""
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(target=self.build, daemon=True).start()
+
+    def after_fork(self) -> None:
+        """Состояние дочернего процесса: потоки родителя в него не переходят.
+
+        Перестройка, начатая до fork (например, в мастере gunicorn с --preload),
+        в дочернем процессе не завершится, а захваченные блокировки не освободятся.
+        """
+        self.lock = threading.Lock()
+        if self.building:
+            self.building = False
+            self.built_at = 0.0
+        self.pending = []
+        for index in self.indexes.values():
+            index.lock = threading.Lock()
+
+    def get(self, kind: str) -> PrefixIndex | None:
+        if not settings.AUTOCOMPLETE_ENABLED:
+            return None
+        if time.monotonic() - self.built_at > settings.AUTOCOMPLETE_MAX_AGE:
+            self.refresh()
+        return self.indexes.get(kind)
+
+    def search(self, kind: str, query: str, limit: int) -> list[Entry] | None:
+        index = self.get(kind)
+        if index is None:
+            return None
+        return index.search(query, limit)
+
+    def _apply(self, kind: str, entry_id: str, entry: Entry | None) -> None:
+        with self.lock:
+            if self.building:
+                self.pending.append((kind, entry_id, entry))
+            index = self.indexes.get(kind)
+        if index is None:
+            return
+        if entry is None:
+            index.remove(entry_id)
+        else:
+            index.put(entry)
+
+    def put(self, kind: str, pk, label: str, rank: float) -> None:
+        self._apply(kind, str(pk), Entry(str(pk), label, rank))
+
+    def remove(self, kind: str, pk) -> None:
+        self._apply(kind, str(pk), None)
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.after_fork)
+
+
+def warm_up() -> None:
+    """Строит индексы при старте воркера, не задерживая его запуск.
+
+    Вызывается хуком post_worker_init (gunicorn.conf.py); без него индекс
+    строится при первом запросе автодополнения.
+    """
+    if settings.AUTOCOMPLETE_ENABLED:
+        registry.refresh()
+
+
+def search_database(kind: str, query: str, limit: int) -> list[Entry]:
+    """Поиск по началу любого слова подписи, как в индексе в памяти.
+
+    Слова запроса идут подряд, последнее - префикс: tsquery 'lone <-> st:*'
+    по GIN-индексу to_tsvector('simple', ...). В отличие от индекса в памяти
+    диакритика не снимается.
+    """
+    model, entries, field = SOURCES[kind]
+    words = _NON_WORD_RE.sub(" ", query.casefold()).split()
+    if not words:
+        return []
+    rows = (
+        entries(model.objects.alias(words=SearchVector(field, config="simple")))
+        .filter(
+            words=SearchQuery(
+                " <-> ".join(words) + ":*", search_type="raw", config="simple"
+            )
+        )
+        .order_by("-rank", field)
+    )
+    return [Entry(str(pk), label, rank) for pk, label, rank in rows[:limit]]
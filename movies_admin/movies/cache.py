@@ -0,0 +1,168 @@
+import hashlib
+import threading
+import time
+from typing import Iterable
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+FILM_DETAIL = "film"
+FILM_LIST = "films"
+FILM_SEARCH = "search"
+FILM_SIMILAR = "similar"
+GENRE_LIST = "genres"
+TYPE_LIST = "types"
+
+
+def _version_key(namespace: str) -> str:
+    return f"movies:{namespace}:version"
+
+
+def get_version(namespace: str) -> int:
+    """Текущая версия пространства ключей.
+
+    Начальное значение берется из времени, чтобы после вытеснения ключа версии
+    не переиспользовать старые закешированные ответы.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def make_key(namespace: str, params: Iterable[tuple[str, list[str]]]) -> str:
+    """Ключ кеша по нормализованным параметрам запроса."""
+    normalized = urlencode(
+        sorted(
+            (name, value)
+            for name, values in params
+            for value in values
+            if value not in ("", None)
+        )
+    )
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f"movies:{namespace}:{get_version(namespace)}:{digest}"
+
+
+def film_key(film_id) -> str:
+    """Ключ карточки: версия позволяет сбросить все карточки без перечня id."""
+    return f"movies:{FILM_DETAIL}:{get_version(FILM_DETAIL)}:{film_id}"
+
+
+def load(key: str):
+    return cache.get(key)
+
+
+def store(key: str, value) -> None:
+    cache.set(key, value, timeout=settings.MOVIES_CACHE_TIMEOUT)
+
+
+def invalidate(*namespaces: str) -> None:
+    """Сбрасывает пространства ключей сменой версии."""
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_films(film_ids: Iterable) -> None:
+    """Сбрасывает карточки фильмов и все закешированные списки фильмов."""
+    _invalidate_keys((FILM_LIST, FILM_SIMILAR), film_ids)
+
+
+def _invalidate_keys(namespaces: Iterable[str], film_ids: Iterable = ()) -> None:
+    film_keys = [film_key(film_id) for film_id in film_ids]
+    if film_keys:
+        cache.delete_many(film_keys)
+    invalidate(*namespaces)
+
+
+class _RepeatInvalidation:
+    """Повторные сбросы после отставания реплик одним таймером на процесс.
+
+    Каждый коммит добавляет свой сброс со сроком через задержку. Таймер
+    срабатывает к ближайшему сроку и одним вызовом сбрасывает все накопленные
+    пространства и карточки (ранний повтор безвреден), а наступившие сроки
+    убирает. Пачки импорта или удаления держат один поток, а не поток на коммит.
+    Поток не демон: команда manage.py ждет повторного сброса после своего
+    последнего коммита, не дольше одной задержки.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.pending: list[tuple[float, tuple[str, ...], list]] = []
+        self.timer: threading.Timer | None = None
+
+    def schedule(
+        self, delay: float, namespaces: tuple[str, ...], film_ids: list
+    ) -> None:
+        with self.lock:
+            self.pending.append((time.monotonic() + delay, namespaces, film_ids))
+            if self.timer is None:
+                self._start(delay)
+
+    def _start(self, delay: float) -> None:
+        self.timer = threading.Timer(delay, self.run)
+        self.timer.start()
+
+    def run(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            pending = list(self.pending)
+        namespaces = {namespace for _due, names, _ids in pending for namespace in names}
+        film_ids = {film_id for _due, _names, ids in pending for film_id in ids}
+        _invalidate_keys(namespaces, film_ids)
+        with self.lock:
+            self.pending = [entry for entry in self.pending if entry[0] > now]
+            if self.pending:
+                self._start(max(min(entry[0] for entry in self.pending) - now, 0))
+            else:
+                self.timer = None
+
+
+_repeat = _RepeatInvalidation()
+
+
+def _after_commit(
+    namespaces: Iterable[str], film_ids: Iterable = (), using: str | None = None
+) -> None:
+    """Сбрасывает кеш после коммита и, при репликах, еще раз после их отставания.
+
+    Сброс до коммита не помогает: параллельное чтение до COMMIT видит старые
+    строки и снова кладет их в кеш на MOVIES_CACHE_TIMEOUT. Так же и чтение с
+    реплики сразу после коммита: реплика может отставать на REPLICA_MAX_LAG
+    (плюс интервал проверки отставания), поэтому по истечении этого срока
+    кеш сбрасывается повторно.
+    """
+    namespaces, film_ids = tuple(namespaces), list(film_ids)
+
+    def invalidate_now_and_after_lag() -> None:
+        _invalidate_keys(namespaces, film_ids)
+        if settings.REPLICA_DATABASES:
+            _repeat.schedule(
+                settings.REPLICA_MAX_LAG + settings.REPLICA_LAG_CHECK_INTERVAL,
+                namespaces,
+                film_ids,
+            )
+
+    transaction.on_commit(invalidate_now_and_after_lag, using=using)
+
+
+def invalidate_on_commit(*namespaces: str) -> None:
+    """Сбрасывает пространства ключей после коммита текущей транзакции.
+
+    Вне транзакции сброс выполняется сразу.
+    """
+    _after_commit(namespaces)
+
+
+def invalidate_films_on_commit(film_ids: Iterable, using: str | None = None) -> None:
+    """Сбрасывает кеш фильмов после коммита; id читаются сразу, пока связи целы."""
+    _after_commit((FILM_LIST, FILM_SIMILAR), film_ids, using)
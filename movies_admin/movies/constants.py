@@ -1,8 +1,31 @@
 from django.db.models import TextChoices
 from django.utils.translation import gettext_lazy as _
 
+# Рейтинг кинопроизведения по десятибалльной шкале
+RATING_MAX = 10
+
 
 class PersonRoleChoice(TextChoices):
     ACTOR = "actor", _("Актер")
     DIRECTOR = "director", _("Режиссер")
     WRITER = "writer", _("Сценарист")
+
+
+class ImportEntityChoice(TextChoices):
+    FILM_WORK = "film_work", _("Кинопроизведения")
+    PERSON = "person", _("Персоны")
+    GENRE = "genre", _("Жанры")
+    GENRE_FILM_WORK = "genre_film_work", _("Жанры кинопроизведений")
+    PERSON_FILM_WORK = "person_film_work", _("Участники кинопроизведений")
+
+
+class ImportFormatChoice(TextChoices):
+    CSV = "csv", "CSV"
+    NDJSON = "ndjson", "NDJSON"
+
+
+class ImportStatusChoice(TextChoices):
+    PENDING = "pending", _("В очереди")
+    RUNNING = "running", _("Выполняется")
+    DONE = "done", _("Завершен")
+    FAILED = "failed", _("Ошибка")
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import connection, transaction
+
+from .constants import PersonRoleChoice
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+ROLES = tuple(PersonRoleChoice.values)
+
+# Таблица счетчиков -> (таблица связей, колонка связи, {счетчик: условие})
+RECOUNTED = {
+    "person": (
+        "person_film_work",
+        "person_id",
+        {f"{role}_films_count": f"l.role = '{role}'" for role in ROLES},
+    ),
+    "film_work": ("person_film_work", "film_work_id", {"persons_count": "true"}),
+    "genre": ("genre_film_work", "genre_id", {"films_count": "true"}),
+}
+
+
+def recount_sql(table: str) -> str:
+    link, key, columns = RECOUNTED[table]
+    counts = ", ".join(
+        f"count(l.{key}) FILTER (WHERE {condition}) AS {column}"
+        for column, condition in columns.items()
+    )
+    current = ", ".join(f"t.{column}" for column in columns)
+    actual = ", ".join(f"c.{column}" for column in columns)
+    return f"""
+        UPDATE {SCHEMA}.{table} t
+        SET {", ".join(f"{column} = c.{column}" for column in columns)}
+        FROM (
+            SELECT t.id, {counts}
+            FROM {SCHEMA}.{table} t
+            LEFT JOIN {SCHEMA}.{link} l ON l.{key} = t.id
+            GROUP BY t.id
+        ) c
+        WHERE t.id = c.id AND ({current}) IS DISTINCT FROM ({actual})
+    """
+
+
+def recount(tables=None, using=connection) -> dict[str, int]:
+    """Пересчитывает счетчики по таблицам связей, возвращает число исправленных строк.
+
+    Счетчики ведут триггеры, пересчет нужен после загрузки в обход них
+    (TRUNCATE, session_replication_role = replica). На время пересчета таблица
+    связей блокируется от записи, чтобы не потерять параллельные изменения.
+    """
+    fixed = {}
+    for table in tables or RECOUNTED:
+        link = RECOUNTED[table][0]
+        with transaction.atomic(using=using.alias), using.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {SCHEMA}.{link} IN SHARE MODE")
+            cursor.execute(recount_sql(table))
+            fixed[table] = cursor.rowcount
+    return fixed
@@ -0,0 +1,265 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import cache
+from .models import Person
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+# fmt: off
+CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+# fmt: on
+_TRANSLITERATION = str.maketrans(CYRILLIC)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    """Ключ имени: латиница без диакритики в нижнем регистре, слова по алфавиту.
+
+    Порядок слов не учитывается («Lucas George» и «George Lucas» совпадают),
+    кириллица транслитерируется.
+    """
+    name = unicodedata.normalize("NFKD", name.lower().translate(_TRANSLITERATION))
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return " ".join(sorted(_NON_WORD_RE.sub(" ", name).split()))
+
+
+def trigrams(normalized: str) -> frozenset[str]:
+    """Триграммы слов с дополнением пробелами, как в pg_trgm."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(left: frozenset[str], right: frozenset[str]) -> float:
+    """Коэффициент Жаккара множеств триграмм."""
+    if not left or not right:
+        return 0.0
+    common = len(left & right)
+    return common / (len(left) + len(right) - common)
+
+
+@dataclass(frozen=True)
+class Candidate:
+    person_id: str
+    name: str
+    birth_date: date | None
+    films: int
+    trigrams: frozenset[str]
+
+
+@dataclass(frozen=True)
+class Duplicate:
+    keep: Candidate
+    duplicate: Candidate
+    score: float
+
+
+def load_candidates(batch_size: int = 10000) -> list[Candidate]:
+    rows = Person.objects.values_list(
+        "id",
+        "full_name",
+        "birth_date",
+        "actor_films_count",
+        "director_films_count",
+        "writer_films_count",
+    ).iterator(chunk_size=batch_size)
+    return [
+        Candidate(
+            str(person_id),
+            name,
+            birth_date,
+            actor + director + writer,
+            trigrams(normalize_name(name)),
+        )
+        for person_id, name, birth_date, actor, director, writer in rows
+    ]
+
+
+def _compatible(left: Candidate, right: Candidate) -> bool:
+    # Разные известные даты рождения - разные люди при любом сходстве имен
+    return not (left.birth_date and right.birth_date) or (
+        left.birth_date == right.birth_date
+    )
+
+
+def find_duplicates(
+    candidates: list[Candidate], min_score: float = 0.6, max_block: int = 1000
+) -> Iterator[Duplicate]:
+    """Пары дублей со сходством имен не ниже min_score без попарного сравнения.
+
+    Префиксная фильтрация: если сходство по Жаккару не меньше min_score, то
+    множества пересекаются хотя бы по одной из |x| - ceil(min_score * |x|) + 1
+    самых редких триграмм x. Имена обходятся по возрастанию числа триграмм,
+    каждое сравнивается только с уже пройденными именами из блоков своих редких
+    триграмм (и подходящих по размеру), затем добавляется в эти блоки.
+    Блоки больше max_block (частые триграммы) не просматриваются.
+    В паре остается персона с большим числом фильмов.
+    """
+    frequency = Counter(gram for candidate in candidates for gram in candidate.trigrams)
+    buckets = defaultdict(list)
+    for index in sorted(
+        range(len(candidates)), key=lambda i: len(candidates[i].trigrams)
+    ):
+        candidate = candidates[index]
+        rarest = sorted(candidate.trigrams, key=lambda gram: (frequency[gram], gram))
+        prefix = rarest[: len(rarest) - math.ceil(min_score * len(rarest)) + 1]
+        min_size = min_score * len(rarest)
+        matches = {
+            other
+            for gram in prefix
+            if len(buckets[gram]) <= max_block
+            for other in buckets[gram]
+            if len(candidates[other].trigrams) >= min_size
+        }
+        for other in matches:
+            other = candidates[other]
+            score = similarity(candidate.trigrams, other.trigrams)
+            if score >= min_score and _compatible(candidate, other):
+                keep, duplicate = sorted(
+                    (candidate, other), key=lambda c: (-c.films, c.person_id)
+                )
+                yield Duplicate(keep, duplicate, round(score, 3))
+        for gram in prefix:
+            buckets[gram].append(index)
+
+
+def resolve(
+    pairs: Iterable[tuple[str, str]], birth_dates: dict[str, date] | None = None
+) -> dict[str, str]:
+    """Дубль -> итоговая персона с учетом цепочек (A <- B <- C).
+
+    Пара пропускается, если в объединяемых группах известны разные даты
+    рождения: иначе через персону без даты слились бы два разных человека.
+    """
+    parent = {}
+    birth_dates = dict(birth_dates or {})
+
+    def root(person_id: str) -> str:
+        while parent.get(person_id, person_id) != person_id:
+            person_id = parent[person_id]
+        return person_id
+
+    for keep, duplicate in pairs:
+        keep, duplicate = root(keep), root(duplicate)
+        if keep == duplicate:
+            continue
+        kept, merged = birth_dates.get(keep), birth_dates.get(duplicate)
+        if kept and merged and kept != merged:
+            continue
+        birth_dates[keep] = kept or merged
+        parent[duplicate] = keep
+    return {duplicate: root(duplicate) for duplicate in parent}
+
+
+MERGE_SQL = f"""
+    WITH m AS (
+        SELECT * FROM unnest(%(duplicates)s::uuid[], %(targets)s::uuid[])
+            AS m(duplicate, target)
+    ),
+    ranked AS (
+        SELECT l.id, l.film_work_id, row_number() OVER (
+            PARTITION BY l.film_work_id, l.role, coalesce(m.target, l.person_id)
+            ORDER BY m.duplicate IS NOT NULL, l.id
+        ) AS position
+        FROM {SCHEMA}.person_film_work l
+        LEFT JOIN m ON m.duplicate = l.person_id
+        WHERE l.person_id = ANY(%(duplicates)s::uuid[] || %(targets)s::uuid[])
+    ),
+    dropped AS (
+        DELETE FROM {SCHEMA}.person_film_work l
+        USING ranked r
+        WHERE l.id = r.id AND l.film_work_id = r.film_work_id AND r.position > 1
+        RETURNING l.film_work_id
+    ),
+    moved AS (
+        UPDATE {SCHEMA}.person_film_work l
+        SET person_id = m.target
+        FROM m
+        WHERE l.person_id = m.duplicate
+            AND NOT EXISTS (
+                SELECT 1 FROM ranked r
+                WHERE r.id = l.id AND r.film_work_id = l.film_work_id
+                    AND r.position > 1
+            )
+        RETURNING l.film_work_id
+    )
+    SELECT film_work_id FROM dropped UNION SELECT film_work_id FROM moved
+"""
+
+FILL_SQL = f"""
+    UPDATE {SCHEMA}.person p
+    SET birth_date = d.birth_date, updated_at = now()
+    FROM unnest(%(duplicates)s::uuid[], %(targets)s::uuid[]) AS m(duplicate, target)
+    JOIN {SCHEMA}.person d ON d.id = m.duplicate
+    WHERE p.id = m.target AND p.birth_date IS NULL AND d.birth_date IS NOT NULL
+"""
+
+
+def merge(
+    pairs: Iterable[tuple[str, str]],
+    batch_size: int = 1000,
+    using=connection,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Сливает дубли (keep, duplicate) пачками, возвращает число удаленных персон.
+
+    Связи дубля переносятся на итоговую персону одним UPDATE, а связи, которые
+    нарушили бы уникальность (film_work, person, role), удаляются заранее.
+    Дата рождения дубля переносится итоговой персоне, если у нее даты нет.
+    Счетчики пересчитывают триггеры таблицы связей, кеш кинопроизведений
+    сбрасывается явно, так как сигналы моделей не срабатывают.
+    """
+    pairs = list(pairs)
+    ids = {person_id for pair in pairs for person_id in pair}
+    birth_dates = {
+        str(person_id): birth_date
+        for person_id, birth_date in Person.objects.using(using.alias)
+        .filter(pk__in=ids, birth_date__isnull=False)
+        .values_list("id", "birth_date")
+        .iterator(chunk_size=batch_size)
+    }
+    mapping = list(resolve(pairs, birth_dates).items())
+    merged = 0
+    for start in range(0, len(mapping), batch_size):
+        chunk = mapping[start : start + batch_size]
+        params = {
+            "duplicates": [duplicate for duplicate, _target in chunk],
+            "targets": [target for _duplicate, target in chunk],
+        }
+        with transaction.atomic(using=using.alias), using.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM {SCHEMA}.person "
+                f"WHERE id = ANY(%(duplicates)s::uuid[] || %(targets)s::uuid[]) "
+                f"ORDER BY id FOR UPDATE",
+                params,
+            )
+            cursor.execute(MERGE_SQL, params)
+            film_ids = [film_id for (film_id,) in cursor.fetchall()]
+            cursor.execute(FILL_SQL, params)
+            cursor.execute(
+                f"DELETE FROM {SCHEMA}.person WHERE id = ANY(%(duplicates)s::uuid[])",
+                params,
+            )
+            merged += cursor.rowcount
+            cache.invalidate_films_on_commit(film_ids, using=using.alias)
+        if progress:
+            progress(merged)
+    return merged
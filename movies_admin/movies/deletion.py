@@ -0,0 +1,175 @@
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, models, transaction
+from django.db.models import Q, QuerySet
+
+from . import autocomplete, cache, jobs
+from .constants import ImportEntityChoice, ImportStatusChoice
+from .models import DeleteJob, DeleteJobItem, Filmwork, Genre, Person
+
+
+logger = logging.getLogger(__name__)
+
+ENTITY_MODELS = {
+    ImportEntityChoice.FILM_WORK: Filmwork,
+    ImportEntityChoice.PERSON: Person,
+    ImportEntityChoice.GENRE: Genre,
+}
+ENTITIES = {model: entity for entity, model in ENTITY_MODELS.items()}
+AUTOCOMPLETE_KINDS = {Filmwork: autocomplete.FILM, Person: autocomplete.PERSON}
+
+ITEMS_TABLE = connection.ops.quote_name(DeleteJobItem._meta.db_table)
+
+# Пачка id выбирается и удаляется из снимка в транзакции удаления записей,
+# поэтому прерванное удаление продолжается с места остановки
+NEXT_CHUNK_SQL = f"""
+DELETE FROM {ITEMS_TABLE}
+WHERE job_id = %(job_id)s AND object_id IN (
+    SELECT object_id FROM {ITEMS_TABLE}
+    WHERE job_id = %(job_id)s
+    ORDER BY object_id
+    LIMIT %(limit)s
+)
+RETURNING object_id;
+"""
+
+
+def cascades(model: type[models.Model]) -> list[tuple[type[models.Model], str]]:
+    """Таблицы со ссылками на модель (on_delete=CASCADE) и колонки ссылок.
+
+    Скрытые обратные связи (related_name="+") тоже учитываются, каскады
+    второго уровня не поддерживаются: у таблиц связей нет зависимых таблиц.
+    """
+    return [
+        (relation.related_model, relation.field.column)
+        for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created
+        and not relation.concrete
+        and relation.one_to_many
+        and relation.on_delete is models.CASCADE
+    ]
+
+
+def summarize(queryset: QuerySet) -> list[tuple[str, int]]:
+    """Число удаляемых записей и строк в зависимых таблицах, по запросу на таблицу."""
+    selection = queryset.order_by().values("pk")
+    summary = [(queryset.model._meta.verbose_name_plural, queryset.count())]
+    conditions: dict[type[models.Model], Q] = {}
+    for related_model, column in cascades(queryset.model):
+        condition = Q(**{f"{column}__in": selection})
+        conditions[related_model] = conditions.get(related_model, Q()) | condition
+    for related_model, condition in conditions.items():
+        summary.append(
+            (
+                related_model._meta.verbose_name_plural,
+                related_model.objects.filter(condition).count(),
+            )
+        )
+    return summary
+
+
+def create_job(queryset: QuerySet) -> DeleteJob:
+    """Задача удаления со снимком id выборки, записанным одним INSERT ... SELECT."""
+    with transaction.atomic():
+        job = DeleteJob.objects.create(entity=ENTITIES[queryset.model], total_rows=0)
+        try:
+            sql, params = queryset.order_by().values_list("pk").query.sql_with_params()
+        except EmptyResultSet:
+            sql = None
+        if sql is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {ITEMS_TABLE} (job_id, object_id) "
+                    f"SELECT %s, selection.{queryset.model._meta.pk.column} "
+                    f"FROM ({sql}) selection ON CONFLICT DO NOTHING;",
+                    (job.pk, *params),
+                )
+                job.total_rows = cursor.rowcount
+            job.save(update_fields=["total_rows"])
+        start_delete(job)
+    return job
+
+
+def delete_chunk(model: type[models.Model], ids: list) -> set:
+    """Удаляет записи и строки зависимых таблиц, возвращает затронутые фильмы.
+
+    Каждая таблица чистится одним DELETE по массиву id без загрузки объектов,
+    счетчики связей пересчитывают триггеры уровня оператора.
+    """
+    film_ids = set(ids) if model is Filmwork else set()
+    with connection.cursor() as cursor:
+        for related_model, column in cascades(model):
+            sql = "DELETE FROM {table} WHERE {column} = ANY(%s)".format(
+                table=connection.ops.quote_name(related_model._meta.db_table),
+                column=connection.ops.quote_name(column),
+            )
+            if model is Filmwork:
+                cursor.execute(sql, (ids,))
+                continue
+            # Связи персон и жанров: фильмы, карточки которых изменились
+            cursor.execute(f"{sql} RETURNING film_work_id;", (ids,))
+            film_ids.update(film_id for (film_id,) in cursor.fetchall())
+        cursor.execute(
+            "DELETE FROM {table} WHERE {pk} = ANY(%s);".format(
+                table=connection.ops.quote_name(model._meta.db_table),
+                pk=connection.ops.quote_name(model._meta.pk.column),
+            ),
+            (ids,),
+        )
+    return film_ids
+
+
+def _forget(model: type[models.Model], ids: list, film_ids: set) -> None:
+    """Сбрасывает кеш и убирает удаленные записи из индекса автодополнения."""
+    cache.invalidate_films_on_commit(film_ids)
+    if model is Genre:
+        cache.invalidate_on_commit(cache.GENRE_LIST)
+    kind = AUTOCOMPLETE_KINDS.get(model)
+    if kind is not None:
+        for pk in ids:
+            autocomplete.registry.remove(kind, pk)
+
+
+def run_delete(job_id: uuid.UUID, retry_failed: bool = False) -> bool:
+    """Выполняет задачу, если удалось ее забрать; возвращает, забрана ли задача.
+
+    Брошенная или упавшая задача продолжается с места остановки: пачка id
+    удаляется из снимка в одной транзакции с записями.
+    """
+    if not jobs.claim(DeleteJob, job_id, retry_failed):
+        return False
+    job = DeleteJob.objects.get(pk=job_id)
+    model = ENTITY_MODELS[job.entity]
+    processed = job.processed_rows
+    params = {"job_id": job.pk, "limit": settings.BULK_DELETE_CHUNK_SIZE}
+    errors = ""
+    try:
+        while True:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(NEXT_CHUNK_SQL, params)
+                    ids = [object_id for (object_id,) in cursor.fetchall()]
+                if not ids:
+                    break
+                film_ids = delete_chunk(model, ids)
+                processed += len(ids)
+                jobs.progress(DeleteJob, job.pk, processed_rows=processed)
+                transaction.on_commit(
+                    lambda ids=ids, film_ids=film_ids: _forget(model, ids, film_ids)
+                )
+        status = ImportStatusChoice.DONE
+    except Exception as exc:
+        logger.exception("Bulk delete %s failed", job.pk)
+        errors = f"row {processed + 1}+: {exc}"
+        status = ImportStatusChoice.FAILED
+    jobs.progress(DeleteJob, job.pk, status=status, errors=errors)
+    return True
+
+
+def start_delete(job: DeleteJob) -> None:
+    """Запускает удаление в фоновом потоке после коммита задачи."""
+    if settings.BULK_DELETE_IN_BACKGROUND:
+        jobs.start_in_thread(run_delete, job.pk)
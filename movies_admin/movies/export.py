@@ -0,0 +1,102 @@
+import csv
+import itertools
+import json
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+from .constants import PersonRoleChoice
+from .models import GenreFilmwork, PersonFimwork
+
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+FILM_FIELDS = ("id", "title", "description", "creation_date", "rating", "type")
+FILM_EXPORT_FIELDS = (
+    *FILM_FIELDS,
+    "genres",
+    *(f"{role}s" for role in PersonRoleChoice.values),
+)
+PERSON_EXPORT_FIELDS = ("id", "full_name", "birth_date")
+GENRE_EXPORT_FIELDS = ("id", "name", "description")
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def film_rows(queryset: QuerySet, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Фильмы с жанрами и участниками по ролям.
+
+    Фильмы читаются серверным курсором, связи подгружаются двумя запросами
+    на каждую пачку, поэтому память не зависит от размера выгрузки.
+    """
+    films = queryset.order_by().values(*FILM_FIELDS).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(films, chunk_size):
+        film_ids = [film["id"] for film in chunk]
+
+        genres = defaultdict(list)
+        for film_id, name in GenreFilmwork.objects.filter(
+            film_work_id__in=film_ids
+        ).values_list("film_work_id", "genre__name"):
+            genres[film_id].append(name)
+
+        persons = defaultdict(lambda: defaultdict(list))
+        for film_id, role, full_name in PersonFimwork.objects.filter(
+            film_work_id__in=film_ids
+        ).values_list("film_work_id", "role", "person__full_name"):
+            persons[film_id][role].append(full_name)
+
+        for film in chunk:
+            film["genres"] = genres[film["id"]]
+            for role in PersonRoleChoice.values:
+                film[f"{role}s"] = persons[film["id"]][role]
+            yield film
+
+
+def plain_rows(
+    queryset: QuerySet, fields: Iterable[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[dict]:
+    return queryset.order_by().values(*fields).iterator(chunk_size=chunk_size)
+
+
+def _csv_lines(rows: Iterable[dict], fields: Iterable[str]) -> Iterator[str]:
+    writer = csv.DictWriter(Echo(), fieldnames=fields)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(
+            {
+                key: "|".join(value) if isinstance(value, list) else value
+                for key, value in row.items()
+            }
+        )
+
+
+def _ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def streaming_export(
+    rows: Iterable[dict], fields: Iterable[str], fmt: str, filename: str
+) -> StreamingHttpResponse:
+    lines = _csv_lines(rows, fields) if fmt == "csv" else _ndjson_lines(rows)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
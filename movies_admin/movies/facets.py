@@ -0,0 +1,135 @@
+import uuid
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+
+from .models import GenreFilmwork
+
+
+FACETS = ("genre", "type", "rating", "year")
+
+FACETS_SQL = f"""
+SELECT
+    GROUPING(gn.id, fw.type, rating_bucket, year) AS grouping_id,
+    gn.id,
+    gn.name,
+    fw.type,
+    rating_bucket,
+    year,
+    {{counts}}
+FROM {settings.CONTENT_SCHEMA}.film_work fw
+LEFT JOIN {settings.CONTENT_SCHEMA}.genre_film_work gfw ON gfw.film_work_id = fw.id
+LEFT JOIN {settings.CONTENT_SCHEMA}.genre gn ON gn.id = gfw.genre_id
+CROSS JOIN LATERAL (
+    SELECT
+        floor(fw.rating)::int AS rating_bucket,
+        extract(year FROM fw.creation_date)::int AS year
+) derived
+WHERE fw.id IN ({{films}}) AND {{selection}}
+GROUP BY GROUPING SETS ((gn.id, gn.name), (fw.type), (rating_bucket), (year));
+"""
+
+# Условие выбранного значения фасета на уровне фильма
+_CONDITIONS = {
+    "genre": (
+        f"EXISTS (SELECT 1 FROM {settings.CONTENT_SCHEMA}.genre_film_work s "
+        "WHERE s.film_work_id = fw.id AND s.genre_id = %s)",
+        uuid.UUID,
+    ),
+    "type": ("fw.type = %s", str),
+    "rating": ("rating_bucket = %s", int),
+    "year": ("year = %s", int),
+}
+
+# GROUPING() возвращает битовую маску: 0 - в колонке, 1 - свернута
+_GROUPING_FACETS = {
+    0b0111: "genre",
+    0b1011: "type",
+    0b1101: "rating",
+    0b1110: "year",
+}
+
+
+def apply_facet_params(queryset: QuerySet, params) -> QuerySet:
+    """Применяет к фильмам выбранные значения фасетов."""
+    if genre := params.get("genre"):
+        queryset = queryset.filter(
+            id__in=GenreFilmwork.objects.filter(genre_id=genre).values("film_work_id")
+        )
+    if film_type := params.get("type"):
+        queryset = queryset.filter(type=film_type)
+    if (rating := params.get("rating")) not in (None, ""):
+        rating = int(rating)
+        queryset = queryset.filter(rating__gte=rating, rating__lt=rating + 1)
+    if year := params.get("year"):
+        queryset = queryset.filter(creation_date__year=int(year))
+    return queryset
+
+
+def _selected(params) -> dict[str, tuple[str, list]]:
+    """Условия выбранных значений фасетов; неверное значение - ValueError."""
+    conditions = {}
+    for facet, (condition, cast) in _CONDITIONS.items():
+        value = params.get(facet)
+        if value not in (None, ""):
+            conditions[facet] = (condition, [cast(str(value))])
+    return conditions
+
+
+def get_facets(queryset: QuerySet, params=None) -> dict[str, list[dict]]:
+    """Счетчики по всем фасетам для отобранных фильмов одним запросом.
+
+    Значения фасета считаются с выбором остальных фасетов, но без своего:
+    выбранный жанр не сворачивает фасет жанров до одного значения. Для этого
+    у каждого фасета свой COUNT ... FILTER, а в выборку попадают фильмы,
+    не прошедшие не больше одного выбранного фасета.
+    """
+    selected = _selected(params or {})
+    counts, count_params = [], []
+    for facet in FACETS:
+        others = [
+            selected[other] for other in FACETS if other in selected and other != facet
+        ]
+        condition = " AND ".join(sql for sql, _ in others) or "TRUE"
+        counts.append(f"COUNT(DISTINCT fw.id) FILTER (WHERE {condition})")
+        count_params.extend(value for _, values in others for value in values)
+    failed = " + ".join(f"(NOT ({sql}))::int" for sql, _ in selected.values())
+    selection = f"{failed} <= 1" if failed else "TRUE"
+    selection_params = [value for _, values in selected.values() for value in values]
+
+    films_sql, params = queryset.order_by().values("id").query.sql_with_params()
+    result = {facet: [] for facet in FACETS}
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            FACETS_SQL.format(
+                counts=",\n    ".join(counts), films=films_sql, selection=selection
+            ),
+            [*count_params, *params, *selection_params],
+        )
+        for (
+            grouping_id,
+            genre_id,
+            genre,
+            film_type,
+            rating,
+            year,
+            *facet_counts,
+        ) in cursor:
+            facet = _GROUPING_FACETS.get(grouping_id)
+            if facet is None:
+                continue
+            count = facet_counts[FACETS.index(facet)]
+            if not count:
+                continue
+            if facet == "genre" and genre_id is not None:
+                result[facet].append({"value": genre_id, "name": genre, "count": count})
+            elif facet == "type" and film_type is not None:
+                result[facet].append({"value": film_type, "count": count})
+            elif facet == "rating" and rating is not None:
+                result[facet].append({"value": rating, "count": count})
+            elif facet == "year" and year is not None:
+                result[facet].append({"value": year, "count": count})
+    for values in result.values():
+        values.sort(key=lambda item: (-item["count"], str(item["value"])))
+    return result
@@ -0,0 +1,43 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.utils.translation import gettext_lazy as _
+
+from .constants import PersonRoleChoice
+from .models import FilmworkType, Genre, Person, PersonFimwork
+
+
+class AssignGenresForm(forms.Form):
+    genres = forms.ModelMultipleChoiceField(
+        label=_("Жанры"), queryset=Genre.objects.order_by("name")
+    )
+
+
+class ChangeTypeForm(forms.Form):
+    type = forms.ModelChoiceField(
+        label=_("Тип кинопроизведения"),
+        queryset=FilmworkType.objects.order_by("name"),
+        required=False,
+    )
+
+
+class AdjustRatingForm(forms.Form):
+    delta = forms.FloatField(
+        label=_("Изменение рейтинга"),
+        help_text=_(
+            "Прибавляется к текущему рейтингу, результат от 0 до 10; фильмы "
+            "без рейтинга не меняются"
+        ),
+    )
+
+
+class AttachPersonForm(forms.Form):
+    person = forms.ModelChoiceField(
+        label=_("Персона"),
+        queryset=Person.objects.all(),
+        # Выбор по id с поиском во всплывающем окне вместо списка всех персон
+        widget=ForeignKeyRawIdWidget(
+            PersonFimwork._meta.get_field("person").remote_field, admin.site
+        ),
+    )
+    role = forms.ChoiceField(label=_("Роль"), choices=PersonRoleChoice.choices)
@@ -0,0 +1,336 @@
+import csv
+import io
+import itertools
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from functools import cached_property
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.db import connection, models, transaction
+
+from . import cache, jobs
+from .constants import (
+    ImportEntityChoice,
+    ImportFormatChoice,
+    ImportStatusChoice,
+    PersonRoleChoice,
+)
+from .models import (
+    Filmwork,
+    FilmworkType,
+    Genre,
+    GenreFilmwork,
+    ImportJob,
+    Person,
+    PersonFimwork,
+)
+from .pgcopy import copy_rows
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = settings.CONTENT_SCHEMA
+MAX_REPORTED_ERRORS = 100
+
+
+def _uuid(value: str) -> str:
+    return str(uuid.UUID(value))
+
+
+def _date(value: str) -> str:
+    return date.fromisoformat(value).isoformat()
+
+
+def _float(value: str) -> float:
+    return float(value)
+
+
+def _role(value: str) -> str:
+    if value not in PersonRoleChoice.values:
+        raise ValueError(f"unknown role {value!r}")
+    return value
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """Колонки файла, их разбор, staging-таблица и set-based слияние в content.
+
+    `choices` - загрузчики допустимых значений колонок-ссылок, которые слияние
+    не может отклонить само (неизвестный тип стал бы NULL через LEFT JOIN).
+    """
+
+    model: type[models.Model]
+    staging_table: str
+    columns: dict[str, tuple[str, Callable | None]]
+    required: tuple[str, ...]
+    merge_sql: str
+    choices: dict[str, Callable[[], Iterable[str]]] = field(default_factory=dict)
+
+    @cached_property
+    def max_lengths(self) -> dict[str, int]:
+        """Ограничения длины текстовых колонок из полей модели."""
+        lengths = {}
+        for column, (pg_type, _parse) in self.columns.items():
+            max_length = getattr(self.model._meta.get_field(column), "max_length", None)
+            if pg_type == "text" and max_length:
+                lengths[column] = max_length
+        return lengths
+
+
+SPECS = {
+    ImportEntityChoice.FILM_WORK: ImportSpec(
+        model=Filmwork,
+        staging_table="import_film_work",
+        columns={
+            "id": ("uuid", _uuid),
+            "title": ("text", None),
+            "description": ("text", None),
+            "creation_date": ("date", _date),
+            "rating": ("float", _float),
+            "type": ("text", None),
+        },
+        required=("id", "title"),
+        merge_sql=f"""
+            INSERT INTO {SCHEMA}.film_work (
+                id, title, description, creation_date, rating, type,
+                certificate, file_path, created_at, updated_at
+            )
+            SELECT DISTINCT ON (s.id)
+                s.id, s.title, COALESCE(s.description, ''), s.creation_date,
+                s.rating, t.slug, '', '', now(), now()
+            FROM {{staging}} s
+            LEFT JOIN {SCHEMA}.film_work_type t ON t.slug = s.type
+            ORDER BY s.id
+            ON CONFLICT (id) DO UPDATE SET
+                title = EXCLUDED.title,
+                description = EXCLUDED.description,
+                creation_date = EXCLUDED.creation_date,
+                rating = EXCLUDED.rating,
+                type = EXCLUDED.type,
+                updated_at = EXCLUDED.updated_at;
+        """,
+        choices={"type": lambda: FilmworkType.objects.values_list("slug", flat=True)},
+    ),
+    ImportEntityChoice.PERSON: ImportSpec(
+        model=Person,
+        staging_table="import_person",
+        columns={
+            "id": ("uuid", _uuid),
+            "full_name": ("text", None),
+            "birth_date": ("date", _date),
+        },
+        required=("id", "full_name"),
+        merge_sql=f"""
+            INSERT INTO {SCHEMA}.person (
+                id, full_name, birth_date, created_at, updated_at
+            )
+            SELECT DISTINCT ON (s.id) s.id, s.full_name, s.birth_date, now(), now()
+            FROM {{staging}} s
+            ORDER BY s.id
+            ON CONFLICT (id) DO UPDATE SET
+                full_name = EXCLUDED.full_name,
+                birth_date = EXCLUDED.birth_date,
+                updated_at = EXCLUDED.updated_at;
+        """,
+    ),
+    ImportEntityChoice.GENRE: ImportSpec(
+        model=Genre,
+        staging_table="import_genre",
+        columns={
+            "id": ("uuid", _uuid),
+            "name": ("text", None),
+            "description": ("text", None),
+        },
+        required=("id", "name"),
+        merge_sql=f"""
+            INSERT INTO {SCHEMA}.genre (id, name, description, created_at, updated_at)
+            SELECT DISTINCT ON (s.id)
+                s.id, s.name, COALESCE(s.description, ''), now(), now()
+            FROM {{staging}} s
+            ORDER BY s.id
+            ON CONFLICT (id) DO UPDATE SET
+                name = EXCLUDED.name,
+                description = EXCLUDED.description,
+                updated_at = EXCLUDED.updated_at;
+        """,
+    ),
+    # Связи на отсутствующие фильмы, жанры и персоны пропускаются join-ом
+    ImportEntityChoice.GENRE_FILM_WORK: ImportSpec(
+        model=GenreFilmwork,
+        staging_table="import_genre_film_work",
+        columns={
+            "film_work_id": ("uuid", _uuid),
+            "genre_id": ("uuid", _uuid),
+        },
+        required=("film_work_id", "genre_id"),
+        merge_sql=f"""
+            INSERT INTO {SCHEMA}.genre_film_work (
+                id, film_work_id, genre_id, created_at
+            )
+            SELECT gen_random_uuid(), s.film_work_id, s.genre_id, now()
+            FROM (SELECT DISTINCT film_work_id, genre_id FROM {{staging}}) s
+            JOIN {SCHEMA}.film_work fw ON fw.id = s.film_work_id
+            JOIN {SCHEMA}.genre g ON g.id = s.genre_id
+            ON CONFLICT DO NOTHING;
+        """,
+    ),
+    ImportEntityChoice.PERSON_FILM_WORK: ImportSpec(
+        model=PersonFimwork,
+        staging_table="import_person_film_work",
+        columns={
+            "film_work_id": ("uuid", _uuid),
+            "person_id": ("uuid", _uuid),
+            "role": ("text", _role),
+        },
+        required=("film_work_id", "person_id", "role"),
+        merge_sql=f"""
+            INSERT INTO {SCHEMA}.person_film_work (
+                id, film_work_id, person_id, role, created_at
+            )
+            SELECT gen_random_uuid(), s.film_work_id, s.person_id, s.role, now()
+            FROM (SELECT DISTINCT film_work_id, person_id, role FROM {{staging}}) s
+            JOIN {SCHEMA}.film_work fw ON fw.id = s.film_work_id
+            JOIN {SCHEMA}.person p ON p.id = s.person_id
+            ON CONFLICT DO NOTHING;
+        """,
+    ),
+}
+
+
+class InvalidRecord(ValueError):
+    """Строка файла, которую не удалось разобрать."""
+
+
+def read_records(
+    file: io.TextIOBase, fmt: str
+) -> Iterator[tuple[int, dict | InvalidRecord]]:
+    """Записи файла с номерами строк; неразборчивая строка - InvalidRecord."""
+    if fmt == ImportFormatChoice.CSV:
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as exc:
+                yield line_number, InvalidRecord(f"invalid JSON: {exc}")
+
+
+def validate(
+    records: Iterable[tuple[int, dict | InvalidRecord]],
+    spec: ImportSpec,
+    choices: dict[str, set[str]] | None = None,
+) -> tuple[list[tuple], list[str]]:
+    """Разбирает строки пачки, возвращает валидные кортежи и ошибки."""
+    choices = choices or {}
+    rows, errors = [], []
+    for line_number, record in records:
+        try:
+            if isinstance(record, InvalidRecord):
+                raise record
+            row = []
+            for column, (_pg_type, parse) in spec.columns.items():
+                value = record.get(column)
+                if value in (None, ""):
+                    if column in spec.required:
+                        raise ValueError(f"'{column}' is required")
+                    row.append(None)
+                    continue
+                value = parse(value) if parse else str(value)
+                max_length = spec.max_lengths.get(column)
+                if max_length and len(value) > max_length:
+                    raise ValueError(
+                        f"'{column}' is longer than {max_length} characters"
+                    )
+                if column in choices and value not in choices[column]:
+                    raise ValueError(f"unknown {column} {value!r}")
+                row.append(value)
+            rows.append(tuple(row))
+        except (ValueError, TypeError, AttributeError) as exc:
+            errors.append(f"line {line_number}: {exc}")
+    return rows, errors
+
+
+def load_chunk(spec: ImportSpec, rows: list[tuple]) -> None:
+    """COPY пачки во временную таблицу и слияние в content одним запросом.
+
+    Слияние идет SQL в обход моделей, сигналы не срабатывают, поэтому кеш
+    фильмов и жанров сбрасывается явно после коммита пачки.
+    """
+    staging = spec.staging_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ("
+            + ", ".join(
+                f"{column} {pg_type}" for column, (pg_type, _) in spec.columns.items()
+            )
+            + ") ON COMMIT DELETE ROWS;"
+        )
+        copy_rows(cursor, staging, spec.columns, rows)
+        cursor.execute(spec.merge_sql.format(staging=staging))
+        cache.invalidate_on_commit(
+            cache.FILM_DETAIL, cache.FILM_LIST, cache.FILM_SIMILAR, cache.GENRE_LIST
+        )
+
+
+def _open(job: ImportJob) -> io.TextIOWrapper:
+    file = job.file.storage.open(job.file.name, "rb")
+    return io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+
+def run_import(job_id: uuid.UUID, retry_failed: bool = False) -> bool:
+    """Выполняет задачу, если удалось ее забрать; возвращает, забрана ли задача.
+
+    Брошенная или упавшая задача продолжается после уже обработанных строк:
+    пачка сливается в content идемпотентно, поэтому повтор последней пачки,
+    прогресс которой не успел сохраниться, безопасен.
+    """
+    if not jobs.claim(ImportJob, job_id, retry_failed):
+        return False
+    job = ImportJob.objects.get(pk=job_id)
+    spec = SPECS[job.entity]
+    chunk_size = settings.IMPORT_CHUNK_SIZE
+    processed, invalid = job.processed_rows, job.invalid_rows
+    errors = job.errors.splitlines() if job.errors else []
+    try:
+        choices = {column: set(load()) for column, load in spec.choices.items()}
+        with _open(job) as file:
+            total = sum(1 for _ in read_records(file, job.format))
+        jobs.progress(ImportJob, job.pk, total_rows=total)
+
+        with _open(job) as file:
+            records = itertools.islice(read_records(file, job.format), processed, None)
+            while chunk := list(itertools.islice(records, chunk_size)):
+                rows, chunk_errors = validate(chunk, spec, choices)
+                if rows:
+                    load_chunk(spec, rows)
+                processed += len(chunk)
+                invalid += len(chunk_errors)
+                errors.extend(chunk_errors[: MAX_REPORTED_ERRORS - len(errors)])
+                jobs.progress(
+                    ImportJob,
+                    job.pk,
+                    processed_rows=processed,
+                    invalid_rows=invalid,
+                    errors="\n".join(errors),
+                )
+        status = ImportStatusChoice.DONE
+    except Exception as exc:
+        logger.exception("Import %s failed", job.pk)
+        errors.append(f"row {processed + 1}+: {exc}")
+        status = ImportStatusChoice.FAILED
+    jobs.progress(ImportJob, job.pk, status=status, errors="\n".join(errors))
+    return True
+
+
+def start_import(job: ImportJob) -> None:
+    """Запускает импорт в фоновом потоке после коммита задачи."""
+    if settings.IMPORT_IN_BACKGROUND:
+        jobs.start_in_thread(run_import, job.pk)
@@ -0,0 +1,510 @@
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+# Секции секционированных таблиц и их индексы сводятся к корню дерева
+ROOT = "coalesce(pg_partition_root({oid}), {oid})"
+
+INDEX_USAGE_SQL = f"""
+    SELECT
+        {ROOT.format(oid="s.indexrelid")}::regclass::text,
+        {ROOT.format(oid="s.relid")}::regclass::text,
+        sum(s.idx_scan)::bigint,
+        sum(pg_relation_size(s.indexrelid))::bigint,
+        EXISTS (
+            SELECT 1 FROM pg_constraint c
+            WHERE c.conindid = {ROOT.format(oid="s.indexrelid")}
+        )
+    FROM pg_stat_user_indexes s
+    WHERE s.schemaname = %s
+    GROUP BY 1, 2, 5
+"""
+
+TABLE_USAGE_SQL = f"""
+    SELECT
+        {ROOT.format(oid="s.relid")}::regclass::text,
+        sum(s.seq_scan)::bigint,
+        sum(s.seq_tup_read)::bigint,
+        sum(coalesce(s.idx_scan, 0))::bigint,
+        sum(s.n_live_tup)::bigint,
+        sum(s.n_tup_ins + s.n_tup_upd + s.n_tup_del)::bigint,
+        sum(pg_table_size(s.relid))::bigint,
+        sum(pg_indexes_size(s.relid))::bigint
+    FROM pg_stat_user_tables s
+    WHERE s.schemaname = %s
+    GROUP BY 1
+"""
+
+# Индексы верхнего уровня: индексы секций повторяют индекс родителя
+INDEX_DEFINITIONS_SQL = """
+    SELECT
+        i.indexrelid::regclass::text,
+        i.indrelid::regclass::text,
+        am.amname,
+        i.indkey::text,
+        i.indclass::text,
+        i.indnkeyatts,
+        i.indnatts,
+        pg_get_expr(i.indexprs, i.indrelid),
+        pg_get_expr(i.indpred, i.indrelid),
+        i.indisunique,
+        EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid),
+        pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = ic.relam
+    WHERE n.nspname = %s AND NOT t.relispartition
+"""
+
+# Секции дерева сверху вниз: индекс родителя должен существовать до ATTACH
+PARTITIONS_SQL = """
+    SELECT relid::regclass::text, parentrelid::regclass::text, isleaf
+    FROM pg_partition_tree(%s::regclass)
+    WHERE parentrelid IS NOT NULL
+    ORDER BY level, relid::regclass::text
+"""
+
+HEAVY_QUERIES_SQL = """
+    SELECT query, calls, total_exec_time, mean_exec_time
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+        AND query ~* '^\\s*(select|with)\\s' AND query LIKE %s
+    ORDER BY total_exec_time DESC
+    LIMIT %s
+"""
+
+# "(title)::text = 'x'", "rating >= 5", "(role)::text = ANY (...)" в условиях Filter
+_FILTER_COLUMN_RE = re.compile(
+    r"\(?\b([a-z_][a-z0-9_]*)\)?(?:::[a-z ]+)?\s*(=|<>|<=|>=|<|>|~~\*?|IS NULL)",
+    re.IGNORECASE,
+)
+_RANGE_OPERATORS = {"<", ">", "<=", ">="}
+
+
+@dataclass
+class IndexUsage:
+    name: str
+    table: str
+    scans: int
+    size: int
+    constraint: bool
+
+
+@dataclass
+class TableUsage:
+    name: str
+    seq_scans: int
+    seq_rows: int
+    idx_scans: int
+    live_rows: int
+    writes: int
+    table_size: int
+    indexes_size: int
+
+    @property
+    def rows_per_seq_scan(self) -> int:
+        return self.seq_rows // self.seq_scans if self.seq_scans else 0
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    name: str
+    table: str
+    method: str
+    keys: tuple[str, ...]
+    classes: tuple[str, ...]
+    includes: bool
+    expressions: str | None
+    predicate: str | None
+    unique: bool
+    constraint: bool
+    definition: str
+
+    @property
+    def signature(self) -> tuple:
+        return (
+            self.table,
+            self.method,
+            self.keys,
+            self.classes,
+            self.expressions,
+            self.predicate,
+        )
+
+
+@dataclass
+class Redundancy:
+    index: IndexDefinition
+    covered_by: IndexDefinition
+    exact: bool
+
+
+def _index_name(table: str, columns: tuple[str, ...]) -> str:
+    schema, _, name = table.rpartition(".")
+    index = f"{name}_{'_'.join(columns)}_idx"[:63]
+    return f"{schema}.{index}" if schema else index
+
+
+@dataclass
+class Candidate:
+    table: str
+    columns: tuple[str, ...]
+    query: str
+    calls: int | None = None
+    total_ms: float | None = None
+    cost_before: float | None = None
+    cost_after: float | None = None
+    uses_index: bool | None = None
+    notes: list[str] = field(default_factory=list)
+    # (секция, родитель, лист) для секционированной таблицы
+    partitions: list[tuple[str, str, bool]] = field(default_factory=list)
+
+    @property
+    def statement(self) -> str:
+        """DDL без долгой блокировки записи.
+
+        CREATE INDEX CONCURRENTLY не работает на секционированной таблице: индекс
+        создается только на родителе (ON ONLY, невалидный), индексы секций строятся
+        CONCURRENTLY и присоединяются, после последней секции индекс родителя
+        становится валидным.
+        """
+        columns = ", ".join(self.columns)
+        if not self.partitions:
+            return f"CREATE INDEX CONCURRENTLY ON {self.table} ({columns});"
+        index = _index_name(self.table, self.columns)
+        statements = [
+            f"CREATE INDEX {index.rpartition('.')[2]} ON ONLY {self.table} ({columns});"
+        ]
+        for partition, parent, leaf in self.partitions:
+            partition_index = _index_name(partition, self.columns)
+            name = partition_index.rpartition(".")[2]
+            if leaf:
+                statements.append(
+                    f"CREATE INDEX CONCURRENTLY {name} ON {partition} ({columns});"
+                )
+            else:
+                statements.append(
+                    f"CREATE INDEX {name} ON ONLY {partition} ({columns});"
+                )
+            statements.append(
+                f"ALTER INDEX {_index_name(parent, self.columns)} "
+                f"ATTACH PARTITION {partition_index};"
+            )
+        return "\n".join(statements)
+
+
+def _fetchall(cursor, sql: str, params=()) -> list[tuple]:
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def index_usage(cursor) -> list[IndexUsage]:
+    return [IndexUsage(*row) for row in _fetchall(cursor, INDEX_USAGE_SQL, (SCHEMA,))]
+
+
+def unused_indexes(cursor, max_scans: int = 0) -> list[IndexUsage]:
+    """Индексы с числом сканирований не больше max_scans.
+
+    Индексы ограничений (PK, UNIQUE, EXCLUDE) нужны для проверки данных и не
+    предлагаются к удалению, даже если по ним не читают.
+    """
+    return sorted(
+        (
+            usage
+            for usage in index_usage(cursor)
+            if usage.scans <= max_scans and not usage.constraint
+        ),
+        key=lambda usage: -usage.size,
+    )
+
+
+def table_usage(cursor) -> list[TableUsage]:
+    return [TableUsage(*row) for row in _fetchall(cursor, TABLE_USAGE_SQL, (SCHEMA,))]
+
+
+def seq_scan_tables(cursor, min_rows: int = 10000) -> list[TableUsage]:
+    """Таблицы, которые читаются в основном полным сканированием.
+
+    Маленькие таблицы дешевле читать целиком, поэтому учитываются только
+    таблицы от min_rows строк.
+    """
+    return sorted(
+        (
+            usage
+            for usage in table_usage(cursor)
+            if usage.live_rows >= min_rows and usage.seq_scans > usage.idx_scans
+        ),
+        key=lambda usage: -usage.seq_rows,
+    )
+
+
+def index_definitions(cursor) -> list[IndexDefinition]:
+    definitions = []
+    for (
+        name,
+        table,
+        method,
+        keys,
+        classes,
+        key_count,
+        column_count,
+        expressions,
+        predicate,
+        unique,
+        constraint,
+        definition,
+    ) in _fetchall(cursor, INDEX_DEFINITIONS_SQL, (SCHEMA,)):
+        definitions.append(
+            IndexDefinition(
+                name=name,
+                table=table,
+                method=method,
+                keys=tuple(keys.split()[:key_count]),
+                classes=tuple(classes.split()[:key_count]),
+                includes=column_count > key_count,
+                expressions=expressions,
+                predicate=predicate,
+                unique=unique,
+                constraint=constraint,
+                definition=definition,
+            )
+        )
+    return definitions
+
+
+def redundant_indexes(definitions: list[IndexDefinition]) -> list[Redundancy]:
+    """Точные дубли и btree-индексы, ключ которых - префикс ключа другого индекса.
+
+    Из пары дублей к удалению предлагается индекс без ограничения; уникальные
+    индексы и индексы ограничений префиксом не считаются - они проверяют данные.
+    """
+    found = {}
+    for index in definitions:
+        if index.constraint:
+            continue
+        for other in definitions:
+            if other is index or other.table != index.table:
+                continue
+            if other.signature == index.signature:
+                if index.unique and not other.unique:
+                    continue
+                # Из двух равноправных дублей оставляем первый по имени
+                if not other.constraint and other.name > index.name:
+                    continue
+                found[index.name] = Redundancy(index, other, exact=True)
+                break
+            if (
+                index.method == other.method == "btree"
+                and not index.unique
+                and not index.includes
+                and index.expressions is None
+                and other.expressions is None
+                and index.predicate == other.predicate
+                and len(index.keys) < len(other.keys)
+                and other.keys[: len(index.keys)] == index.keys
+                and other.classes[: len(index.classes)] == index.classes
+            ):
+                found.setdefault(index.name, Redundancy(index, other, exact=False))
+    return list(found.values())
+
+
+def heavy_queries(cursor, limit: int = 10) -> list[tuple[str, int, float, float]]:
+    """Самые затратные SELECT к схеме по pg_stat_statements (если расширение есть)."""
+    (installed,) = _fetchall(
+        cursor,
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements')",
+    )[0]
+    if not installed:
+        return []
+    return _fetchall(cursor, HEAVY_QUERIES_SQL, (f"%{SCHEMA}.%", limit))
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def explain(cursor, sql: str) -> dict:
+    """План запроса; для нормализованных запросов с $1 строится generic plan."""
+    options = "FORMAT JSON"
+    if re.search(r"\$\d+", sql):
+        options += ", GENERIC_PLAN"
+    cursor.execute(f"EXPLAIN ({options}) {sql}")
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _relation(cursor, relation: str) -> tuple[str, tuple[str, ...], int, int] | None:
+    """Корень дерева секций, его колонки, строк в корне и в самой relation.
+
+    None, если relation нет в схеме (план без VERBOSE не указывает схему).
+    """
+    rows = _fetchall(
+        cursor,
+        f"""
+        SELECT
+            {ROOT.format(oid="c.oid")}::regclass::text,
+            array_agg(a.attname::text ORDER BY a.attnum),
+            (
+                SELECT sum(greatest(p.reltuples, 0))::bigint
+                FROM pg_class p
+                WHERE {ROOT.format(oid="p.oid")} = {ROOT.format(oid="c.oid")}
+            ),
+            greatest(c.reltuples, 0)::bigint
+        FROM pg_class c
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0
+            AND NOT a.attisdropped
+        WHERE c.oid = to_regclass(%s)
+        GROUP BY c.oid
+        """,
+        (relation,),
+    )
+    return rows[0] if rows else None
+
+
+def candidates_for(
+    cursor, sql: str, min_rows: int = 10000, max_selectivity: float = 0.1
+) -> list[Candidate]:
+    """Индексы для Seq Scan с селективным фильтром по большой таблице.
+
+    Колонки равенства идут в ключе первыми, затем колонки диапазона.
+    """
+    found = {}
+    for node in _plan_nodes(explain(cursor, sql)):
+        if node["Node Type"] != "Seq Scan" or "Filter" not in node:
+            continue
+        relation = _relation(cursor, f"{SCHEMA}.{node['Relation Name']}")
+        if relation is None:
+            continue
+        table, columns, rows, scanned = relation
+        if rows < min_rows or node["Plan Rows"] > scanned * max_selectivity:
+            continue
+        equality, ranges = [], []
+        for column, operator in _FILTER_COLUMN_RE.findall(node["Filter"]):
+            if column not in columns or column in equality + ranges:
+                continue
+            (ranges if operator in _RANGE_OPERATORS else equality).append(column)
+        if equality or ranges:
+            key = tuple(equality + ranges)
+            if (table, key) not in found:
+                found[table, key] = Candidate(
+                    table, key, sql, partitions=partitions(cursor, table)
+                )
+    return list(found.values())
+
+
+def partitions(cursor, table: str) -> list[tuple[str, str, bool]]:
+    return _fetchall(cursor, PARTITIONS_SQL, (table,))
+
+
+def _index_names(plan: dict) -> set[str]:
+    return {node["Index Name"] for node in _plan_nodes(plan) if "Index Name" in node}
+
+
+def validate(cursor, candidate: Candidate, real_index: bool = False) -> Candidate:
+    """Сравнивает стоимость плана без индекса и с ним.
+
+    С расширением hypopg индекс гипотетический. Без него индекс строится
+    в транзакции, которая откатывается, только с real_index: на время построения
+    блокируется запись в таблицу.
+    """
+    (hypothetical,) = _fetchall(
+        cursor, "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'hypopg')"
+    )[0]
+    if not hypothetical and not real_index:
+        candidate.notes.append(
+            "not validated: hypopg is not installed, a real index blocks writes"
+        )
+        return candidate
+    definition = f"CREATE INDEX ON {candidate.table} ({', '.join(candidate.columns)})"
+    before = explain(cursor, candidate.query)
+    with transaction.atomic(using=cursor.db.alias):
+        if hypothetical:
+            cursor.execute("SELECT * FROM hypopg_create_index(%s)", (definition,))
+        else:
+            candidate.notes.append("validated with a real index, rolled back")
+            cursor.execute(definition)
+        after = explain(cursor, candidate.query)
+        transaction.set_rollback(True, using=cursor.db.alias)
+    if hypothetical:
+        cursor.execute("SELECT hypopg_reset()")
+    candidate.cost_before = before["Total Cost"]
+    candidate.cost_after = after["Total Cost"]
+    candidate.uses_index = bool(_index_names(after) - _index_names(before))
+    return candidate
+
+
+def candidates(
+    cursor,
+    queries: list[str] | None = None,
+    limit: int = 10,
+    min_rows: int = 10000,
+    validate_plans: bool = False,
+    real_indexes: bool = False,
+) -> list[Candidate]:
+    """Кандидаты в индексы для переданных запросов или тяжелых из pg_stat_statements."""
+    if queries:
+        sources = [(sql, None, None) for sql in queries]
+    else:
+        sources = [
+            (sql, calls, total_ms)
+            for sql, calls, total_ms, _mean_ms in heavy_queries(cursor, limit)
+        ]
+    found = []
+    for sql, calls, total_ms in sources:
+        try:
+            with transaction.atomic(using=cursor.db.alias):
+                query_candidates = candidates_for(cursor, sql, min_rows)
+        except Exception as exc:
+            note = str(exc).splitlines()[0]
+            found.append(Candidate("", (), sql, calls, total_ms, notes=[note]))
+            continue
+        if not query_candidates:
+            found.append(
+                Candidate("", (), sql, calls, total_ms, notes=["no candidate"])
+            )
+        for candidate in query_candidates:
+            candidate.calls, candidate.total_ms = calls, total_ms
+            if validate_plans:
+                validate(cursor, candidate, real_indexes)
+            found.append(candidate)
+    return found
+
+
+def report(
+    using=connection,
+    max_scans: int = 0,
+    min_rows: int = 10000,
+    queries: list[str] | None = None,
+    limit: int = 10,
+    validate_plans: bool = False,
+    real_indexes: bool = False,
+) -> dict:
+    """Все разделы отчета советника по индексам схемы CONTENT_SCHEMA."""
+    with using.cursor() as cursor:
+        (stats_reset,) = _fetchall(
+            cursor,
+            "SELECT stats_reset::text FROM pg_stat_database "
+            "WHERE datname = current_database()",
+        )[0]
+        return {
+            "stats_reset": stats_reset,
+            "unused": unused_indexes(cursor, max_scans),
+            "redundant": redundant_indexes(index_definitions(cursor)),
+            "seq_scan_tables": seq_scan_tables(cursor, min_rows),
+            "tables": sorted(table_usage(cursor), key=lambda usage: usage.name),
+            "candidates": candidates(
+                cursor, queries, limit, min_rows, validate_plans, real_indexes
+            ),
+        }
@@ -0,0 +1,63 @@
+import threading
+import uuid
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, models, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .constants import ImportStatusChoice
+
+
+def runnable(model: type[models.Model], retry_failed: bool = False) -> QuerySet:
+    """Задачи в очереди и брошенные.
+
+    Задача в статусе RUNNING считается брошенной, если ее прогресс (`updated_at`)
+    не менялся дольше `JOB_STALE_AFTER` секунд: процесс, выполнявший ее, умер.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    condition = Q(status=ImportStatusChoice.PENDING) | Q(
+        status=ImportStatusChoice.RUNNING, updated_at__lt=stale_before
+    )
+    if retry_failed:
+        condition |= Q(status=ImportStatusChoice.FAILED)
+    return model.objects.filter(condition)
+
+
+def claim(
+    model: type[models.Model], job_id: uuid.UUID, retry_failed: bool = False
+) -> bool:
+    """Забирает задачу одним UPDATE ... WHERE status = ...
+
+    Из нескольких конкурентных исполнителей задачу получает только один: остальные
+    после блокировки строки перепроверяют условие и видят свежий RUNNING.
+    """
+    return bool(
+        runnable(model, retry_failed)
+        .filter(pk=job_id)
+        .update(status=ImportStatusChoice.RUNNING, updated_at=timezone.now())
+    )
+
+
+def progress(model: type[models.Model], job_id: uuid.UUID, **fields) -> None:
+    """Сохраняет прогресс задачи; `updated_at` служит отметкой жизни исполнителя."""
+    model.objects.filter(pk=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def _run_in_thread(run: Callable[[uuid.UUID], object], job_id: uuid.UUID) -> None:
+    close_old_connections()
+    try:
+        run(job_id)
+    finally:
+        connection.close()
+
+
+def start_in_thread(run: Callable[[uuid.UUID], object], job_id: uuid.UUID) -> None:
+    """Запускает задачу в фоновом потоке после коммита транзакции."""
+    transaction.on_commit(
+        lambda: threading.Thread(
+            target=_run_in_thread, args=(run, job_id), daemon=True
+        ).start()
+    )
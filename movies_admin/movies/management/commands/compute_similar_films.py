@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from movies import similarity
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает похожие кинопроизведения по жанрам, участникам и описанию"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=settings.SIMILAR_FILMS_TOP_K,
+            help="Сколько похожих фильмов хранить для каждого фильма",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SIMILAR_FILMS_BATCH_SIZE,
+            help="Сколько фильмов сравнивать с каталогом за раз",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Повторять пересчет каждые N секунд (0 - выполнить один раз)",
+        )
+
+    def handle(
+        self, *args, top_k: int, batch_size: int, interval: int, **options
+    ) -> None:
+        while True:
+            started = time.monotonic()
+            stored = similarity.compute(top_k, batch_size)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{stored} similar films stored in "
+                    f"{time.monotonic() - started:.2f}s"
+                )
+            )
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,110 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies import dedupe
+
+
+FIELDS = ("keep_id", "duplicate_id", "score", "keep_name", "duplicate_name")
+
+
+class Command(BaseCommand):
+    help = (
+        "Поиск дублей персон по сходству имен (блоки по редким триграммам) "
+        "и слияние подтвержденных пар с переносом участий в фильмах"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--min-score",
+            type=float,
+            default=0.6,
+            help="Минимальное сходство имен по триграммам (0..1)",
+        )
+        parser.add_argument(
+            "--max-block",
+            type=int,
+            default=1000,
+            help="Блоки по триграмме с большим числом персон пропускаются",
+        )
+        parser.add_argument(
+            "--output",
+            help="CSV с найденными парами (по умолчанию stdout)",
+        )
+        parser.add_argument(
+            "--merge",
+            metavar="CSV",
+            help="Слить пары из CSV с колонками keep_id, duplicate_id",
+        )
+        parser.add_argument(
+            "--auto-merge",
+            type=float,
+            metavar="SCORE",
+            help="Сразу слить найденные пары со сходством не ниже SCORE",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(
+        self,
+        *args,
+        min_score: float,
+        max_block: int,
+        output: str | None,
+        merge: str | None,
+        auto_merge: float | None,
+        batch_size: int,
+        **options,
+    ) -> None:
+        if merge:
+            try:
+                with open(merge, newline="") as file:
+                    pairs = [
+                        (row["keep_id"], row["duplicate_id"])
+                        for row in csv.DictReader(file)
+                    ]
+            except (OSError, KeyError) as e:
+                raise CommandError(f"Cannot read pairs from {merge}: {e}")
+            self.merge(pairs, batch_size)
+            return
+
+        candidates = dedupe.load_candidates()
+        self.stderr.write(f"Loaded {len(candidates)} persons")
+        duplicates = list(dedupe.find_duplicates(candidates, min_score, max_block))
+        self.stderr.write(f"Found {len(duplicates)} candidate pairs")
+
+        file = open(output, "w", newline="") if output else sys.stdout
+        try:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            for pair in sorted(duplicates, key=lambda pair: -pair.score):
+                writer.writerow(
+                    (
+                        pair.keep.person_id,
+                        pair.duplicate.person_id,
+                        pair.score,
+                        pair.keep.name,
+                        pair.duplicate.name,
+                    )
+                )
+        finally:
+            if output:
+                file.close()
+
+        if auto_merge is not None:
+            self.merge(
+                [
+                    (pair.keep.person_id, pair.duplicate.person_id)
+                    for pair in duplicates
+                    if pair.score >= auto_merge
+                ],
+                batch_size,
+            )
+
+    def merge(self, pairs: list[tuple[str, str]], batch_size: int) -> None:
+        merged = dedupe.merge(
+            pairs,
+            batch_size=batch_size,
+            progress=lambda count: self.stderr.write(f"  merged {count} persons"),
+        )
+        self.stderr.write(self.style.SUCCESS(f"Merged {merged} duplicate persons"))
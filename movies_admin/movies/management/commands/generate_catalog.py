@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from movies.synthetic import generate_catalog
+
+
+class Command(BaseCommand):
+    help = "Заполняет БД синтетическим каталогом для тестов производительности"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--films", type=int, default=10000)
+        parser.add_argument("--persons", type=int, default=20000)
+        parser.add_argument("--genres", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(
+        self, *args, films: int, persons: int, genres: int, seed: int, **options
+    ):
+        generate_catalog(films=films, persons=persons, genres=genres, seed=seed)
+        self.stdout.write(self.style.SUCCESS("Catalog generated"))
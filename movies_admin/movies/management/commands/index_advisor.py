@@ -0,0 +1,146 @@
+import json
+from dataclasses import asdict
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from movies import index_advisor
+
+
+class Command(BaseCommand):
+    help = (
+        "Отчет по индексам схемы content: неиспользуемые и дублирующие индексы, "
+        "таблицы с Seq Scan, размеры и кандидаты в индексы для тяжелых запросов"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--max-scans",
+            type=int,
+            default=0,
+            help="Индекс с не большим числом сканирований считается неиспользуемым",
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Меньшие таблицы не рассматриваются для Seq Scan и кандидатов",
+        )
+        parser.add_argument(
+            "--sql",
+            action="append",
+            dest="queries",
+            help="Запрос для подбора индекса (по умолчанию - из pg_stat_statements)",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10, help="Число тяжелых запросов"
+        )
+        parser.add_argument(
+            "--explain",
+            action="store_true",
+            help="Проверить кандидатов EXPLAIN с индексом (hypopg или откат)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Без hypopg проверять --explain настоящим индексом в откатываемой "
+            "транзакции (блокирует запись в таблицу на время построения)",
+        )
+        parser.add_argument("--json", action="store_true", dest="as_json")
+
+    def handle(
+        self,
+        *args,
+        max_scans: int,
+        min_rows: int,
+        queries: list[str] | None,
+        limit: int,
+        explain: bool,
+        force: bool,
+        as_json: bool,
+        **options,
+    ) -> None:
+        report = index_advisor.report(
+            max_scans=max_scans,
+            min_rows=min_rows,
+            queries=queries,
+            limit=limit,
+            validate_plans=explain,
+            real_indexes=force,
+        )
+        if as_json:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        key: (
+                            [asdict(item) for item in value]
+                            if isinstance(value, list)
+                            else value
+                        )
+                        for key, value in report.items()
+                    },
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            )
+            return
+
+        self.stdout.write(f"Statistics since: {report['stats_reset'] or 'unknown'}")
+
+        self.section("Unused indexes (not backing constraints)")
+        for usage in report["unused"]:
+            self.stdout.write(
+                f"  {usage.name} on {usage.table}: {usage.scans} scans, "
+                f"{filesizeformat(usage.size)}"
+            )
+
+        self.section("Duplicate and prefix-redundant indexes")
+        for redundancy in report["redundant"]:
+            kind = "duplicate of" if redundancy.exact else "prefix of"
+            self.stdout.write(
+                f"  {redundancy.index.name} is a {kind} {redundancy.covered_by.name}\n"
+                f"    {redundancy.index.definition}"
+            )
+
+        self.section("Tables dominated by sequential scans")
+        for usage in report["seq_scan_tables"]:
+            self.stdout.write(
+                f"  {usage.name}: {usage.seq_scans} seq / {usage.idx_scans} idx scans, "
+                f"~{usage.rows_per_seq_scan} rows per seq scan"
+            )
+
+        self.section("Table and index sizes")
+        for usage in report["tables"]:
+            ratio = usage.indexes_size / usage.table_size if usage.table_size else 0
+            self.stdout.write(
+                f"  {usage.name}: table {filesizeformat(usage.table_size)}, "
+                f"indexes {filesizeformat(usage.indexes_size)} ({ratio:.1f}x), "
+                f"{usage.writes} writes"
+            )
+
+        self.section("Candidate indexes")
+        if not queries and not report["candidates"]:
+            self.stdout.write(
+                "  no heavy queries: pg_stat_statements is not installed or empty, "
+                "pass queries with --sql"
+            )
+        for candidate in report["candidates"]:
+            self.stdout.write(f"  {candidate.query[:200]}")
+            if candidate.calls is not None:
+                self.stdout.write(
+                    f"    {candidate.calls} calls, {candidate.total_ms:.0f} ms total"
+                )
+            if candidate.columns:
+                for statement in candidate.statement.splitlines():
+                    self.stdout.write(f"    {statement}")
+            if candidate.cost_before is not None:
+                self.stdout.write(
+                    f"    cost {candidate.cost_before:.0f} -> "
+                    f"{candidate.cost_after:.0f}, "
+                    f"index used: {'yes' if candidate.uses_index else 'no'}"
+                )
+            for note in candidate.notes:
+                self.stdout.write(f"    {note}")
+
+    def section(self, title: str) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{title}"))
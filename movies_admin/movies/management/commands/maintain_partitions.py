@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from movies import partitioning
+
+
+def _run(partition: str, statements: list[str]) -> float:
+    # Соединения привязаны к потоку: каждый поток работает в своем и закрывает его
+    started = time.monotonic()
+    try:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(
+                    sql.format(table=f"{settings.CONTENT_SCHEMA}.{partition}")
+                )
+    finally:
+        connection.close()
+    return time.monotonic() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "VACUUM ANALYZE и REINDEX CONCURRENTLY секций таблиц связей "
+        "параллельно, по секции на соединение"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--table",
+            choices=sorted(partitioning.LINK_TABLES),
+            action="append",
+            dest="tables",
+            help="Таблица связей (по умолчанию обе)",
+        )
+        parser.add_argument("--vacuum", action="store_true")
+        parser.add_argument("--reindex", action="store_true")
+        parser.add_argument(
+            "--jobs", type=int, default=2, help="Число секций, обслуживаемых сразу"
+        )
+
+    def handle(
+        self,
+        *args,
+        tables: list[str] | None,
+        vacuum: bool,
+        reindex: bool,
+        jobs: int,
+        **options,
+    ) -> None:
+        statements = []
+        if vacuum:
+            statements.append("VACUUM (ANALYZE) {table};")
+        if reindex:
+            statements.append("REINDEX TABLE CONCURRENTLY {table};")
+        if not statements:
+            raise CommandError("Nothing to do: pass --vacuum and/or --reindex")
+
+        with connection.cursor() as cursor:
+            targets = [
+                partition
+                for name in tables or partitioning.LINK_TABLES
+                for partition in partitioning.partition_names(cursor, name) or [name]
+            ]
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            durations = executor.map(_run, targets, [statements] * len(targets))
+            for partition, duration in zip(targets, durations):
+                self.stdout.write(f"{partition}: {duration:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"{len(targets)} relations maintained"))
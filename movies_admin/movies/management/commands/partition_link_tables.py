@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from movies import cache, partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Онлайн-перенос таблиц связей в секционированные по хешу film_work_id "
+        "(или обратно) с копированием пачками"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--table",
+            choices=sorted(partitioning.LINK_TABLES),
+            action="append",
+            dest="tables",
+            help="Таблица связей (по умолчанию обе)",
+        )
+        parser.add_argument(
+            "--partitions", type=int, default=settings.LINK_TABLE_PARTITIONS
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--unpartition",
+            action="store_true",
+            help="Вернуть обычную несекционированную таблицу",
+        )
+        parser.add_argument(
+            "--drop-old",
+            action="store_true",
+            help="Удалить исходную таблицу <table>_old после переключения",
+        )
+
+    def handle(
+        self,
+        *args,
+        tables: list[str] | None,
+        partitions: int,
+        batch_size: int,
+        unpartition: bool,
+        drop_old: bool,
+        **options,
+    ) -> None:
+        partitions = None if unpartition or not partitions else partitions
+        for name in tables or partitioning.LINK_TABLES:
+            converted = partitioning.convert(
+                partitioning.LINK_TABLES[name],
+                partitions,
+                batch_size=batch_size,
+                drop_old=drop_old,
+                progress=lambda copied: self.stdout.write(
+                    f"{name}: {copied} rows copied"
+                ),
+            )
+            if converted:
+                self.stdout.write(self.style.SUCCESS(f"{name} switched"))
+            else:
+                self.stdout.write(f"{name} is already in the requested layout")
+        cache.invalidate_on_commit(cache.FILM_SEARCH)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from movies import counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики фильмов у персон и жанров и участников у фильмов"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--table",
+            choices=sorted(counters.RECOUNTED),
+            action="append",
+            dest="tables",
+            help="Таблица со счетчиками (по умолчанию все)",
+        )
+
+    def handle(self, *args, tables: list[str] | None, **options) -> None:
+        for table, fixed in counters.recount(tables).items():
+            self.stdout.write(f"{table}: {fixed} rows fixed")
+        self.stdout.write(self.style.SUCCESS("Counters recounted"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies import cache
+from movies.models import FilmworkSearch
+
+
+class Command(BaseCommand):
+    help = "Обновляет материализованное представление поисковых документов фильмов"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--no-concurrently",
+            action="store_false",
+            dest="concurrently",
+            help="Обновить с блокировкой чтения (быстрее, нужно для первой загрузки)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Повторять обновление каждые N секунд (0 - выполнить один раз)",
+        )
+
+    def handle(self, *args, concurrently: bool, interval: int, **options) -> None:
+        while True:
+            started = time.monotonic()
+            FilmworkSearch.refresh(concurrently=concurrently)
+            cache.invalidate_on_commit(cache.FILM_SEARCH)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"film_work_search refreshed in {time.monotonic() - started:.2f}s"
+                )
+            )
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from movies import jobs
+from movies.deletion import run_delete
+from movies.models import DeleteJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет задачи удаления (по умолчанию задачи в очереди и брошенные, "
+        "прогресс которых не менялся дольше JOB_STALE_AFTER)"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "job_ids",
+            nargs="*",
+            help="UUID задач удаления; упавшая задача продолжается с места остановки",
+        )
+
+    def handle(self, *args, job_ids: list[str], **options) -> None:
+        if job_ids:
+            jobs_to_run = DeleteJob.objects.filter(pk__in=job_ids)
+        else:
+            jobs_to_run = jobs.runnable(DeleteJob)
+        for job_id in jobs_to_run.order_by("created_at").values_list("pk", flat=True):
+            if not run_delete(job_id, retry_failed=bool(job_ids)):
+                self.stdout.write(f"{job_id}: skipped, already taken or finished")
+                continue
+            job = DeleteJob.objects.get(pk=job_id)
+            self.stdout.write(
+                f"{job}: {job.get_status_display()}, "
+                f"{job.processed_rows} of {job.total_rows} rows"
+            )
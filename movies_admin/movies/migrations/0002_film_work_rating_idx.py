@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=models.Index(fields=["rating"], name="film_work_rating_idx"),
+        ),
+    ]
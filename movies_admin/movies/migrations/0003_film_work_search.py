@@ -0,0 +1,144 @@
+# Generated by Django 5.1 on 2026-10-19 12:09
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+CREATE_VIEW = f"""
+CREATE MATERIALIZED VIEW {SCHEMA}.film_work_search AS
+SELECT
+    fw.id,
+    fw.title,
+    fw.description,
+    fw.creation_date,
+    fw.rating,
+    fw.type,
+    COALESCE(g.genre_ids, '{{}}') AS genre_ids,
+    COALESCE(g.genres, '{{}}') AS genres,
+    COALESCE(p.actors, '{{}}') AS actors,
+    COALESCE(p.directors, '{{}}') AS directors,
+    COALESCE(p.writers, '{{}}') AS writers,
+    setweight(to_tsvector('{settings.SEARCH_CONFIG}', fw.title), 'A')
+    || setweight(
+        to_tsvector(
+            '{settings.SEARCH_CONFIG}',
+            array_to_string(
+                COALESCE(p.actors, '{{}}')
+                || COALESCE(p.directors, '{{}}')
+                || COALESCE(p.writers, '{{}}'),
+                ' '
+            )
+        ),
+        'B'
+    )
+    || setweight(
+        to_tsvector(
+            '{settings.SEARCH_CONFIG}',
+            array_to_string(COALESCE(g.genres, '{{}}'), ' ')
+        ),
+        'C'
+    )
+    || setweight(
+        to_tsvector('{settings.SEARCH_CONFIG}', COALESCE(fw.description, '')), 'D'
+    ) AS search
+FROM {SCHEMA}.film_work fw
+LEFT JOIN LATERAL (
+    SELECT array_agg(DISTINCT gn.id) AS genre_ids,
+           array_agg(DISTINCT gn.name) AS genres
+    FROM {SCHEMA}.genre_film_work gfw
+    JOIN {SCHEMA}.genre gn ON gn.id = gfw.genre_id
+    WHERE gfw.film_work_id = fw.id
+) g ON TRUE
+LEFT JOIN LATERAL (
+    SELECT array_agg(DISTINCT pn.full_name) FILTER (WHERE pfw.role = 'actor') AS actors,
+           array_agg(DISTINCT pn.full_name) FILTER (WHERE pfw.role = 'director') AS directors,
+           array_agg(DISTINCT pn.full_name) FILTER (WHERE pfw.role = 'writer') AS writers
+    FROM {SCHEMA}.person_film_work pfw
+    JOIN {SCHEMA}.person pn ON pn.id = pfw.person_id
+    WHERE pfw.film_work_id = fw.id
+) p ON TRUE
+WITH DATA;
+
+-- Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX film_work_search_id_idx ON {SCHEMA}.film_work_search (id);
+CREATE INDEX film_work_search_search_idx
+    ON {SCHEMA}.film_work_search USING GIN (search);
+CREATE INDEX film_work_search_genre_ids_idx
+    ON {SCHEMA}.film_work_search USING GIN (genre_ids);
+CREATE INDEX film_work_search_type_rating_idx
+    ON {SCHEMA}.film_work_search (type, rating);
+CREATE INDEX film_work_search_rating_idx ON {SCHEMA}.film_work_search (rating);
+"""
+
+DROP_VIEW = f"DROP MATERIALIZED VIEW IF EXISTS {SCHEMA}.film_work_search;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0002_film_work_rating_idx"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+        migrations.CreateModel(
+            name="FilmworkSearch",
+            fields=[
+                ("id", models.UUIDField(primary_key=True, serialize=False)),
+                ("title", models.CharField(max_length=255, verbose_name="Название")),
+                ("description", models.TextField(verbose_name="Описание")),
+                (
+                    "creation_date",
+                    models.DateField(null=True, verbose_name="Дата создания фильма"),
+                ),
+                ("rating", models.FloatField(null=True, verbose_name="Рейтинг")),
+                (
+                    "type",
+                    models.CharField(
+                        max_length=255, null=True, verbose_name="Тип кинопроизведения"
+                    ),
+                ),
+                (
+                    "genre_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.UUIDField(), size=None
+                    ),
+                ),
+                (
+                    "genres",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255), size=None
+                    ),
+                ),
+                (
+                    "actors",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255), size=None
+                    ),
+                ),
+                (
+                    "directors",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255), size=None
+                    ),
+                ),
+                (
+                    "writers",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=255), size=None
+                    ),
+                ),
+                ("search", django.contrib.postgres.search.SearchVectorField()),
+            ],
+            options={
+                "verbose_name": "Поисковый документ кинопроизведения",
+                "verbose_name_plural": "Поисковые документы кинопроизведений",
+                "db_table": f'{SCHEMA}"."film_work_search',
+                "managed": False,
+            },
+        ),
+    ]
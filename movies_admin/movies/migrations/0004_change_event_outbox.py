@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import migrations
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+# Таблица -> (сущность в событии, колонка с id сущности)
+TRACKED_TABLES = {
+    "film_work": ("film_work", "id"),
+    "genre": ("genre", "id"),
+    "person": ("person", "id"),
+    "genre_film_work": ("film_work", "film_work_id"),
+    "person_film_work": ("film_work", "film_work_id"),
+}
+
+CREATE_OUTBOX = f"""
+CREATE TABLE {SCHEMA}.change_event (
+    id bigserial PRIMARY KEY,
+    entity text NOT NULL,
+    entity_id uuid NOT NULL,
+    op text NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+-- Изменение связей фиксируется как UPDATE связанного кинопроизведения
+CREATE FUNCTION {SCHEMA}.capture_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb := to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END);
+BEGIN
+    INSERT INTO {SCHEMA}.change_event (entity, entity_id, op)
+    VALUES (
+        TG_ARGV[0],
+        (row_data ->> TG_ARGV[1])::uuid,
+        CASE WHEN TG_ARGV[0] = TG_TABLE_NAME THEN TG_OP ELSE 'UPDATE' END
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""" + "".join(
+    f"""
+CREATE TRIGGER {table}_capture_change
+AFTER INSERT OR UPDATE OR DELETE ON {SCHEMA}.{table}
+FOR EACH ROW EXECUTE FUNCTION {SCHEMA}.capture_change('{entity}', '{column}');
+"""
+    for table, (entity, column) in TRACKED_TABLES.items()
+)
+
+DROP_OUTBOX = "".join(
+    f"DROP TRIGGER IF EXISTS {table}_capture_change ON {SCHEMA}.{table};\n"
+    for table in TRACKED_TABLES
+) + (
+    f"DROP FUNCTION IF EXISTS {SCHEMA}.capture_change();\n"
+    f"DROP TABLE IF EXISTS {SCHEMA}.change_event;\n"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0003_film_work_search"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_OUTBOX, DROP_OUTBOX),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.1 on 2026-10-19 12:14
+
+import uuid
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0004_change_event_outbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[
+                            ("film_work", "Кинопроизведения"),
+                            ("person", "Персоны"),
+                            ("genre", "Жанры"),
+                            ("genre_film_work", "Жанры кинопроизведений"),
+                            ("person_film_work", "Участники кинопроизведений"),
+                        ],
+                        max_length=32,
+                        verbose_name="Сущность",
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("csv", "CSV"), ("ndjson", "NDJSON")],
+                        default="csv",
+                        max_length=16,
+                        verbose_name="Формат",
+                    ),
+                ),
+                ("file", models.FileField(upload_to="imports/", verbose_name="Файл")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Завершен"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "total_rows",
+                    models.PositiveBigIntegerField(
+                        null=True, verbose_name="Всего строк"
+                    ),
+                ),
+                (
+                    "processed_rows",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Обработано строк"
+                    ),
+                ),
+                (
+                    "invalid_rows",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Отклонено строк"
+                    ),
+                ),
+                ("errors", models.TextField(blank=True, verbose_name="Ошибки")),
+            ],
+            options={
+                "verbose_name": "Импорт",
+                "verbose_name_plural": "Импорты",
+                "db_table": f'{SCHEMA}"."import_job',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-19 12:21
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0005_import_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=models.Index(
+                fields=["creation_date"], name="film_work_creation_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "title", "description", config=settings.SEARCH_CONFIG
+                ),
+                name="film_work_search_vector_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "full_name", config="simple"
+                ),
+                name="person_full_name_search_idx",
+            ),
+        ),
+    ]
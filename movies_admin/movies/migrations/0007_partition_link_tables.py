@@ -0,0 +1,49 @@
+import logging
+
+from django.conf import settings
+from django.db import migrations
+
+from movies import partitioning
+
+
+logger = logging.getLogger(__name__)
+
+
+def partition(apps, schema_editor) -> None:
+    """Секционирует таблицы связей; большие только готовит к онлайн-переносу."""
+    if not settings.LINK_TABLE_PARTITIONS:
+        return
+    connection = schema_editor.connection
+    for link in partitioning.LINK_TABLES.values():
+        with connection.cursor() as cursor:
+            rows = partitioning.estimated_rows(cursor, link.name)
+        if rows <= settings.PARTITION_INLINE_MAX_ROWS:
+            partitioning.convert(
+                link, settings.LINK_TABLE_PARTITIONS, drop_old=True, using=connection
+            )
+        elif partitioning.prepare(link, settings.LINK_TABLE_PARTITIONS, connection):
+            logger.warning(
+                "%s has ~%s rows: run 'manage.py partition_link_tables' "
+                "to finish partitioning online",
+                link.name,
+                rows,
+            )
+
+
+def unpartition(apps, schema_editor) -> None:
+    for link in partitioning.LINK_TABLES.values():
+        partitioning.convert(link, None, drop_old=True, using=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    # Перенос выполняется отдельными транзакциями, как и в команде
+    atomic = False
+
+    dependencies = [
+        ("movies", "0006_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,212 @@
+# Generated by Django 5.1 on 2026-10-19 12:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+from movies import counters
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+# Изменения связей для statement-триггеров с таблицами переходов
+CHANGES = {
+    "INSERT": "SELECT *, 1 AS sign FROM new_rows",
+    "DELETE": "SELECT *, -1 AS sign FROM old_rows",
+    "UPDATE": "SELECT *, 1 AS sign FROM new_rows "
+    "UNION ALL SELECT *, -1 AS sign FROM old_rows",
+}
+
+# Таблица связей -> [(таблица счетчиков, колонка связи, {счетчик: условие})].
+# Фильмы блокируются раньше персон: сохранение фильма в админке сначала обновляет
+# строку film_work и только потом пишет связи, обратный порядок в триггере
+# приводил бы к взаимоблокировкам с ним
+COUNTERS = {
+    "person_film_work": [
+        ("film_work", "film_work_id", {"persons_count": "true"}),
+        (
+            "person",
+            "person_id",
+            {f"{role}_films_count": f"role = '{role}'" for role in counters.ROLES},
+        ),
+    ],
+    "genre_film_work": [
+        ("genre", "genre_id", {"films_count": "true"}),
+    ],
+}
+
+# Колонки, изменение которых попадает в change_event: обновление одних
+# счетчиков не должно переиндексировать фильмы и персоны
+CAPTURED_COLUMNS = {
+    "film_work": (
+        "id, title, description, creation_date, certificate, file_path, "
+        "rating, type, created_at, updated_at"
+    ),
+    "person": "id, full_name, birth_date, created_at, updated_at",
+    "genre": "id, name, description, created_at, updated_at",
+}
+
+
+def apply_changes(table: str, key: str, columns: dict[str, str], changes: str) -> str:
+    """Прибавляет к счетчикам суммы знаков измененных связей.
+
+    Строки сначала блокируются в порядке id, чтобы параллельные загрузки
+    связей не взаимоблокировались на популярных жанрах и персонах. Счетчики
+    не ограничиваются снизу: расхождение после загрузки в обход триггеров
+    исправляет recount_counters, а не молчаливый ноль.
+    """
+    sums = ", ".join(
+        f"sum(CASE WHEN {condition} THEN sign ELSE 0 END) AS {column}"
+        for column, condition in columns.items()
+    )
+    updates = ", ".join(f"{column} = t.{column} + d.{column}" for column in columns)
+    changed = " OR ".join(f"d.{column} <> 0" for column in columns)
+    return f"""
+        PERFORM 1 FROM {SCHEMA}.{table} t
+        WHERE t.id IN (SELECT {key} FROM ({changes}) c)
+        ORDER BY t.id
+        FOR NO KEY UPDATE;
+        UPDATE {SCHEMA}.{table} t SET {updates}
+        FROM (
+            SELECT {key} AS id, {sums} FROM ({changes}) c GROUP BY {key}
+        ) d
+        WHERE t.id = d.id AND ({changed});
+    """
+
+
+CREATE_COUNTERS = (
+    "".join(
+        f"""
+CREATE FUNCTION {SCHEMA}.{link}_counters() RETURNS trigger AS $$
+BEGIN
+"""
+        + "".join(
+            f"""    IF TG_OP = '{op}' THEN
+"""
+            + "".join(apply_changes(*target, changes) for target in targets)
+            + """
+    END IF;
+"""
+            for op, changes in CHANGES.items()
+        )
+        + f"""    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {link}_counters_insert AFTER INSERT ON {SCHEMA}.{link}
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION {SCHEMA}.{link}_counters();
+CREATE TRIGGER {link}_counters_update AFTER UPDATE ON {SCHEMA}.{link}
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION {SCHEMA}.{link}_counters();
+CREATE TRIGGER {link}_counters_delete AFTER DELETE ON {SCHEMA}.{link}
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION {SCHEMA}.{link}_counters();
+"""
+        for link, targets in COUNTERS.items()
+    )
+    + "".join(
+        f"""
+DROP TRIGGER {table}_capture_change ON {SCHEMA}.{table};
+CREATE TRIGGER {table}_capture_change
+AFTER INSERT OR DELETE OR UPDATE OF {columns} ON {SCHEMA}.{table}
+FOR EACH ROW EXECUTE FUNCTION {SCHEMA}.capture_change('{table}', 'id');
+"""
+        for table, columns in CAPTURED_COLUMNS.items()
+    )
+)
+
+DROP_COUNTERS = (
+    "".join(
+        f"""
+DROP TRIGGER IF EXISTS {link}_counters_insert ON {SCHEMA}.{link};
+DROP TRIGGER IF EXISTS {link}_counters_update ON {SCHEMA}.{link};
+DROP TRIGGER IF EXISTS {link}_counters_delete ON {SCHEMA}.{link};
+DROP FUNCTION IF EXISTS {SCHEMA}.{link}_counters();
+"""
+        for link in COUNTERS
+    )
+    + "".join(
+        f"""
+DROP TRIGGER {table}_capture_change ON {SCHEMA}.{table};
+CREATE TRIGGER {table}_capture_change
+AFTER INSERT OR UPDATE OR DELETE ON {SCHEMA}.{table}
+FOR EACH ROW EXECUTE FUNCTION {SCHEMA}.capture_change('{table}', 'id');
+"""
+        for table in CAPTURED_COLUMNS
+    )
+)
+
+
+def recount(apps, schema_editor) -> None:
+    counters.recount(using=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0007_partition_link_tables"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="filmwork",
+            name="persons_count",
+            field=models.PositiveIntegerField(
+                db_default=0, editable=False, verbose_name="Участников"
+            ),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="films_count",
+            field=models.PositiveIntegerField(
+                db_default=0, editable=False, verbose_name="Кинопроизведений"
+            ),
+        ),
+        migrations.AddField(
+            model_name="person",
+            name="actor_films_count",
+            field=models.PositiveIntegerField(
+                db_default=0, editable=False, verbose_name="Фильмов актером"
+            ),
+        ),
+        migrations.AddField(
+            model_name="person",
+            name="director_films_count",
+            field=models.PositiveIntegerField(
+                db_default=0, editable=False, verbose_name="Фильмов режиссером"
+            ),
+        ),
+        migrations.AddField(
+            model_name="person",
+            name="writer_films_count",
+            field=models.PositiveIntegerField(
+                db_default=0, editable=False, verbose_name="Фильмов сценаристом"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=models.Index(
+                fields=["persons_count", "id"], name="film_work_persons_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(
+                fields=["actor_films_count", "id"], name="person_actor_films_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(
+                fields=["director_films_count", "id"], name="person_director_films_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(
+                fields=["writer_films_count", "id"], name="person_writer_films_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_COUNTERS, DROP_COUNTERS),
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.1 on 2026-10-19 12:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+# Таблица связей -> (модель, колонка внешнего ключа, индекс обратного поиска)
+REVERSE_INDEXES = {
+    "genre_film_work": (
+        "genrefilmwork",
+        "genre_id",
+        models.Index(fields=["genre", "film_work"], name="genre_film_work_genre_idx"),
+    ),
+    "person_film_work": (
+        "personfimwork",
+        "person_id",
+        models.Index(fields=["person", "role"], name="person_film_work_person_idx"),
+    ),
+}
+
+
+def create_indexes(apps, schema_editor) -> None:
+    """Создает индексы обратного поиска вместо одноколоночных индексов FK.
+
+    Секционирование из 0007 уже создает эти индексы, поэтому IF NOT EXISTS.
+    AlterField(db_index=False) старые индексы FK не удаляет, а их имя зависит
+    от истории таблицы (Django или секционирование), поэтому они ищутся
+    в каталоге.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        for table, (model_name, column, index) in REVERSE_INDEXES.items():
+            columns = ", ".join(
+                apps.get_model("movies", model_name)._meta.get_field(field).column
+                for field in index.fields
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index.name} "
+                f"ON {SCHEMA}.{table} ({columns});"
+            )
+            cursor.execute(
+                """
+                SELECT c.relname
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_attribute a
+                    ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                WHERE i.indrelid = %s::regclass
+                    AND i.indnatts = 1 AND NOT i.indisunique
+                    AND a.attname = %s AND c.relname <> %s
+                """,
+                (f"{SCHEMA}.{table}", column, index.name),
+            )
+            for (name,) in cursor.fetchall():
+                cursor.execute(f"DROP INDEX {SCHEMA}.{name};")
+
+
+def drop_indexes(apps, schema_editor) -> None:
+    # Одноколоночные индексы FK восстанавливает обратный AlterField
+    with schema_editor.connection.cursor() as cursor:
+        for _model_name, _column, index in REVERSE_INDEXES.values():
+            cursor.execute(f"DROP INDEX IF EXISTS {SCHEMA}.{index.name};")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0008_link_counters"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, _column, index in REVERSE_INDEXES.values()
+            ],
+            database_operations=[
+                migrations.RunPython(create_indexes, drop_indexes),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="genrefilmwork",
+            name="genre",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="genre_filmworks",
+                to="movies.genre",
+                verbose_name="Жанр кинопроизведения",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="personfimwork",
+            name="person",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="person_roles",
+                to="movies.person",
+                verbose_name="Тип кинопроизведения",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-19 13:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0009_link_reverse_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector("title", config="simple"),
+                name="film_work_title_words_idx",
+            ),
+        ),
+    ]
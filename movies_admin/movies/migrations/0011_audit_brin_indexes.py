@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 13:20
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0010_autocomplete_prefix_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                autosummarize=True,
+                fields=["created_at"],
+                name="film_work_created_at_brin",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="filmwork",
+            index=models.Index(fields=["updated_at"], name="film_work_updated_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                autosummarize=True,
+                fields=["created_at"],
+                name="person_created_at_brin",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="person",
+            index=models.Index(fields=["updated_at"], name="person_updated_at_idx"),
+        ),
+    ]
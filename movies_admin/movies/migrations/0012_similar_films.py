@@ -0,0 +1,59 @@
+# Generated by Django 5.1 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0011_audit_brin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarFilmwork",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="Место")),
+                ("score", models.FloatField(verbose_name="Близость")),
+                (
+                    "film_work",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_films",
+                        to="movies.filmwork",
+                        verbose_name="Кинопроизведение",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="movies.filmwork",
+                        verbose_name="Похожее кинопроизведение",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожее кинопроизведение",
+                "verbose_name_plural": "Похожие кинопроизведения",
+                "db_table": f'{SCHEMA}"."film_work_similar',
+                "unique_together": {("film_work", "rank")},
+            },
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.1 on 2026-10-19 13:50
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0012_similar_films"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeleteJob",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[
+                            ("film_work", "Кинопроизведения"),
+                            ("person", "Персоны"),
+                            ("genre", "Жанры"),
+                            ("genre_film_work", "Жанры кинопроизведений"),
+                            ("person_film_work", "Участники кинопроизведений"),
+                        ],
+                        max_length=32,
+                        verbose_name="Сущность",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Завершен"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "total_rows",
+                    models.PositiveBigIntegerField(
+                        null=True, verbose_name="Всего строк"
+                    ),
+                ),
+                (
+                    "processed_rows",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Обработано строк"
+                    ),
+                ),
+                ("errors", models.TextField(blank=True, verbose_name="Ошибки")),
+            ],
+            options={
+                "verbose_name": "Удаление",
+                "verbose_name_plural": "Удаления",
+                "db_table": f'{SCHEMA}"."delete_job',
+            },
+        ),
+        migrations.CreateModel(
+            name="DeleteJobItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.UUIDField(verbose_name="UUID записи")),
+                (
+                    "job",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="movies.deletejob",
+                        verbose_name="Удаление",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись к удалению",
+                "verbose_name_plural": "Записи к удалению",
+                "db_table": f'{SCHEMA}"."delete_job_item',
+                "unique_together": {("job", "object_id")},
+            },
+        ),
+    ]
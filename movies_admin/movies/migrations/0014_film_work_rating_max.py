@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-19 14:53
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0013_delete_job"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="filmwork",
+            name="rating",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(10),
+                ],
+                verbose_name="Рейтинг",
+            ),
+        ),
+    ]
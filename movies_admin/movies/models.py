@@ -1,12 +1,21 @@
 import uuid
 
 from django.conf import settings
-from django.core.validators import MinValueValidator
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import DatabaseError, connection, models, router, transaction
 from django.utils.translation import gettext_lazy as _
 
 
-from .constants import PersonRoleChoice
+from .constants import (
+    RATING_MAX,
+    ImportEntityChoice,
+    ImportFormatChoice,
+    ImportStatusChoice,
+    PersonRoleChoice,
+)
 
 
 class CreatedMixin(models.Model):
@@ -30,6 +39,45 @@ class CreatedUpdatedMixin(CreatedMixin, UpdatedMixin):
         abstract = True
 
 
+class CountersMixin(models.Model):
+    """Счетчики, которые ведут триггеры на таблицах связей (миграция 0008).
+
+    При сохранении изменений счетчики не записываются, чтобы не затереть значения,
+    обновленные триггерами после чтения объекта. Если строку удалили после чтения,
+    она, как при обычном сохранении Django, создается заново с нулевыми счетчиками:
+    ее связи удалены вместе с ней.
+    """
+
+    counter_fields: tuple[str, ...] = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs) -> None:
+        if self._state.adding or kwargs.get("update_fields") is not None:
+            super().save(*args, **kwargs)
+            return
+        kwargs["update_fields"] = [
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.counter_fields
+        ]
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        try:
+            # Точка сохранения: ошибка save() помечает транзакцию к откату
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+        except DatabaseError:
+            # update_fields без обновленных строк: строки нет или ошибка другая
+            manager = type(self)._base_manager.using(using)
+            if kwargs.get("force_update") or manager.filter(pk=self.pk).exists():
+                raise
+            for field in self.counter_fields:
+                setattr(self, field, 0)
+            kwargs["update_fields"] = None
+            super().save(*args, force_insert=True, **kwargs)
+
+
 class UUIDPrimaryKeyMixin(models.Model):
     id = models.UUIDField(
         verbose_name="UUID", primary_key=True, default=uuid.uuid4, editable=False
@@ -39,14 +87,58 @@ class UUIDPrimaryKeyMixin(models.Model):
         abstract = True
 
 
-class Person(CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
+class Person(CountersMixin, CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
     full_name = models.CharField(_("Полное имя"), max_length=255)
     birth_date = models.DateField(_("Дата рождения"), blank=True, null=True)
+    actor_films_count = models.PositiveIntegerField(
+        _("Фильмов актером"), db_default=0, editable=False
+    )
+    director_films_count = models.PositiveIntegerField(
+        _("Фильмов режиссером"), db_default=0, editable=False
+    )
+    writer_films_count = models.PositiveIntegerField(
+        _("Фильмов сценаристом"), db_default=0, editable=False
+    )
+
+    counter_fields = (
+        "actor_films_count",
+        "director_films_count",
+        "writer_films_count",
+    )
 
     class Meta:
         db_table = f'{settings.CONTENT_SCHEMA}"."person'
         verbose_name = _("Персона")
         verbose_name_plural = _("Персоны")
+        indexes = [
+            # Поиск в админке и автодополнение по началу слов без индекса в памяти
+            GinIndex(
+                SearchVector("full_name", config="simple"),
+                name="person_full_name_search_idx",
+            ),
+            # Выборки по времени создания: строки дописываются в конец таблицы
+            # примерно по времени, и min/max на диапазон страниц отсекает почти всю
+            # таблицу при размере индекса в сотни раз меньше B-tree
+            BrinIndex(
+                fields=["created_at"],
+                name="person_created_at_brin",
+                autosummarize=True,
+            ),
+            # Изменения не следуют порядку строк: HOT-обновление оставляет версию
+            # строки в ее странице, остальные занимают свободное место. B-tree
+            # отбирает диапазон и отдает его в порядке -updated_at без сортировки
+            models.Index(fields=["updated_at"], name="person_updated_at_idx"),
+            # Сортировка списка по размеру фильмографии с id для стабильного порядка
+            models.Index(
+                fields=["actor_films_count", "id"], name="person_actor_films_idx"
+            ),
+            models.Index(
+                fields=["director_films_count", "id"], name="person_director_films_idx"
+            ),
+            models.Index(
+                fields=["writer_films_count", "id"], name="person_writer_films_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.full_name
@@ -64,14 +156,21 @@ class PersonFimwork(CreatedMixin, UUIDPrimaryKeyMixin):
         verbose_name=_("Тип кинопроизведения"),
         related_name="person_roles",
         on_delete=models.CASCADE,
+        db_index=False,
     )
     role = models.CharField(_("Роль"), max_length=255, choices=PersonRoleChoice.choices)
 
     class Meta:
+        # Секционирована по хешу film_work_id (миграция 0007), первичный ключ
+        # в БД - (id, film_work_id)
         db_table = f'{settings.CONTENT_SCHEMA}"."person_film_work'
         verbose_name = _("Участник кинопроизведения")
         verbose_name_plural = _("Участники кинопроизведений")
         unique_together = ("film_work", "person", "role")
+        # Обратный поиск: фильмография персоны, в том числе по роли
+        indexes = [
+            models.Index(fields=["person", "role"], name="person_film_work_person_idx")
+        ]
 
     def __str__(self) -> str:
         return f"{self._meta.verbose_name} #{self.pk}"
@@ -89,21 +188,35 @@ class GenreFilmwork(CreatedMixin, UUIDPrimaryKeyMixin):
         verbose_name=_("Жанр кинопроизведения"),
         related_name="genre_filmworks",
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
     class Meta:
+        # Секционирована по хешу film_work_id (миграция 0007), первичный ключ
+        # в БД - (id, film_work_id)
         db_table = f'{settings.CONTENT_SCHEMA}"."genre_film_work'
         verbose_name = _("Жанр кинопроизведения")
         verbose_name_plural = _("Жанры кинопроизведений")
         unique_together = ("film_work", "genre")
+        # Обратный поиск: кинопроизведения жанра постранично в порядке индекса
+        indexes = [
+            models.Index(
+                fields=["genre", "film_work"], name="genre_film_work_genre_idx"
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self._meta.verbose_name} #{self.pk}"
 
 
-class Genre(CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
+class Genre(CountersMixin, CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
     name = models.CharField(_("Название"), max_length=255)
     description = models.TextField(_("Описание"), max_length=5000, blank=True)
+    films_count = models.PositiveIntegerField(
+        _("Кинопроизведений"), db_default=0, editable=False
+    )
+
+    counter_fields = ("films_count",)
 
     class Meta:
         db_table = f'{settings.CONTENT_SCHEMA}"."genre'
@@ -127,7 +240,7 @@ class FilmworkType(CreatedUpdatedMixin):
         return self.name
 
 
-class Filmwork(CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
+class Filmwork(CountersMixin, CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
     type = models.ForeignKey(
         "FilmworkType",
         verbose_name=_("Тип кинопроизведения"),
@@ -155,13 +268,188 @@ class Filmwork(CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
     certificate = models.TextField(_("Сертификат"), blank=True)
     file_path = models.FileField(_("Файл"), upload_to="film_works/", blank=True)
     rating = models.FloatField(
-        _("Рейтинг"), validators=[MinValueValidator(0)], blank=True, null=True
+        _("Рейтинг"),
+        validators=[MinValueValidator(0), MaxValueValidator(RATING_MAX)],
+        blank=True,
+        null=True,
+    )
+    # Число участий: персона в нескольких ролях считается по разу на роль
+    persons_count = models.PositiveIntegerField(
+        _("Участников"), db_default=0, editable=False
     )
 
+    counter_fields = ("persons_count",)
+
     class Meta:
         db_table = f'{settings.CONTENT_SCHEMA}"."film_work'
         verbose_name = _("Кинопроизведение")
         verbose_name_plural = _("Кинопроизведения")
+        indexes = [
+            models.Index(fields=["rating"], name="film_work_rating_idx"),
+            models.Index(fields=["creation_date"], name="film_work_creation_date_idx"),
+            models.Index(fields=["persons_count", "id"], name="film_work_persons_idx"),
+            GinIndex(
+                SearchVector("title", "description", config=settings.SEARCH_CONFIG),
+                name="film_work_search_vector_idx",
+            ),
+            # Автодополнение по началу слов названия без индекса в памяти
+            GinIndex(
+                SearchVector("title", config="simple"),
+                name="film_work_title_words_idx",
+            ),
+            BrinIndex(
+                fields=["created_at"],
+                name="film_work_created_at_brin",
+                autosummarize=True,
+            ),
+            models.Index(fields=["updated_at"], name="film_work_updated_at_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class SimilarFilmwork(models.Model):
+    """Похожее кинопроизведение, предрассчитанное командой compute_similar_films."""
+
+    film_work = models.ForeignKey(
+        "Filmwork",
+        verbose_name=_("Кинопроизведение"),
+        related_name="similar_films",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    similar = models.ForeignKey(
+        "Filmwork",
+        verbose_name=_("Похожее кинопроизведение"),
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    rank = models.PositiveSmallIntegerField(_("Место"))
+    score = models.FloatField(_("Близость"))
+
+    class Meta:
+        db_table = f'{settings.CONTENT_SCHEMA}"."film_work_similar'
+        verbose_name = _("Похожее кинопроизведение")
+        verbose_name_plural = _("Похожие кинопроизведения")
+        # Соседи фильма по порядку читаются одним диапазоном индекса
+        unique_together = ("film_work", "rank")
+
+    def __str__(self) -> str:
+        return f"{self._meta.verbose_name} #{self.pk}"
+
+
+class ImportJob(CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
+    entity = models.CharField(
+        _("Сущность"), max_length=32, choices=ImportEntityChoice.choices
+    )
+    format = models.CharField(
+        _("Формат"),
+        max_length=16,
+        choices=ImportFormatChoice.choices,
+        default=ImportFormatChoice.CSV,
+    )
+    file = models.FileField(_("Файл"), upload_to="imports/")
+    status = models.CharField(
+        _("Статус"),
+        max_length=16,
+        choices=ImportStatusChoice.choices,
+        default=ImportStatusChoice.PENDING,
+    )
+    total_rows = models.PositiveBigIntegerField(_("Всего строк"), null=True)
+    processed_rows = models.PositiveBigIntegerField(_("Обработано строк"), default=0)
+    invalid_rows = models.PositiveBigIntegerField(_("Отклонено строк"), default=0)
+    errors = models.TextField(_("Ошибки"), blank=True)
+
+    class Meta:
+        db_table = f'{settings.CONTENT_SCHEMA}"."import_job'
+        verbose_name = _("Импорт")
+        verbose_name_plural = _("Импорты")
+
+    def __str__(self) -> str:
+        return f"{self.get_entity_display()} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class DeleteJob(CreatedUpdatedMixin, UUIDPrimaryKeyMixin):
+    """Фоновое удаление выбранных в админке записей пачками."""
+
+    entity = models.CharField(
+        _("Сущность"), max_length=32, choices=ImportEntityChoice.choices
+    )
+    status = models.CharField(
+        _("Статус"),
+        max_length=16,
+        choices=ImportStatusChoice.choices,
+        default=ImportStatusChoice.PENDING,
+    )
+    total_rows = models.PositiveBigIntegerField(_("Всего строк"), null=True)
+    processed_rows = models.PositiveBigIntegerField(_("Обработано строк"), default=0)
+    errors = models.TextField(_("Ошибки"), blank=True)
+
+    class Meta:
+        db_table = f'{settings.CONTENT_SCHEMA}"."delete_job'
+        verbose_name = _("Удаление")
+        verbose_name_plural = _("Удаления")
+
+    def __str__(self) -> str:
+        return f"{self.get_entity_display()} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class DeleteJobItem(models.Model):
+    """Снимок выборки удаления: id еще не удаленных записей."""
+
+    job = models.ForeignKey(
+        "DeleteJob",
+        verbose_name=_("Удаление"),
+        related_name="items",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    object_id = models.UUIDField(_("UUID записи"))
+
+    class Meta:
+        db_table = f'{settings.CONTENT_SCHEMA}"."delete_job_item'
+        verbose_name = _("Запись к удалению")
+        verbose_name_plural = _("Записи к удалению")
+        # Пачки выбираются по порядку диапазонами этого индекса
+        unique_together = ("job", "object_id")
+
+    def __str__(self) -> str:
+        return str(self.object_id)
+
+
+class FilmworkSearch(models.Model):
+    """Денормализованный поисковый документ фильма (материализованное представление)."""
+
+    id = models.UUIDField(primary_key=True)
+    title = models.CharField(_("Название"), max_length=255)
+    description = models.TextField(_("Описание"))
+    creation_date = models.DateField(_("Дата создания фильма"), null=True)
+    rating = models.FloatField(_("Рейтинг"), null=True)
+    type = models.CharField(_("Тип кинопроизведения"), max_length=255, null=True)
+    genre_ids = ArrayField(models.UUIDField())
+    genres = ArrayField(models.CharField(max_length=255))
+    actors = ArrayField(models.CharField(max_length=255))
+    directors = ArrayField(models.CharField(max_length=255))
+    writers = ArrayField(models.CharField(max_length=255))
+    search = SearchVectorField()
+
+    class Meta:
+        managed = False
+        db_table = f'{settings.CONTENT_SCHEMA}"."film_work_search'
+        verbose_name = _("Поисковый документ кинопроизведения")
+        verbose_name_plural = _("Поисковые документы кинопроизведений")
 
     def __str__(self) -> str:
         return self.title
+
+    @classmethod
+    def refresh(cls, concurrently: bool = True) -> None:
+        """Пересчитывает материализованное представление."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "REFRESH MATERIALIZED VIEW {concurrently}{table};".format(
+                    concurrently="CONCURRENTLY " if concurrently else "",
+                    table=connection.ops.quote_name(cls._meta.db_table),
+                )
+            )
@@ -0,0 +1,62 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с оценкой числа строк по плану запроса.
+
+    Точный COUNT(*) по большой таблице - это полное сканирование. Если
+    планировщик оценивает выборку больше ADMIN_EXACT_COUNT_LIMIT строк,
+    используется оценка, иначе выполняется точный подсчет.
+
+    Оценка может быть больше реального числа строк. Если страница за концом
+    выборки оказалась пустой, число строк уточняется COUNT(*) и отдается
+    последняя существующая страница вместо пустой.
+    """
+
+    estimated = False
+
+    def estimate(self) -> int:
+        queryset = self.object_list
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self.estimate()
+        if estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+            self.estimated = True
+            return estimate
+        return self.object_list.count()
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom : bottom + self.per_page])
+        if object_list or number == 1 or not self.estimated:
+            return self._get_page(object_list, number, self)
+        # Оценка завышена: уточняем число строк и берем последнюю страницу
+        self.estimated = False
+        self.count = self.object_list.count()
+        self.__dict__.pop("num_pages", None)
+        return super().page(min(number, self.num_pages))
+
+
+class KnownCountPaginator(Paginator):
+    """Пагинатор с заранее известным числом строк, например из счетчика.
+
+    Страница читается срезом выборки, COUNT(*) не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, count: int, **kwargs) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
@@ -0,0 +1,397 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+
+@dataclass(frozen=True)
+class LinkTable:
+    """Таблица связей, секционируемая хешем film_work_id.
+
+    Уникальные ограничения секционированной таблицы обязаны включать ключ
+    секционирования, поэтому первичный ключ - (id, film_work_id), а
+    уникальность связи задается ограничением, начинающимся с film_work_id.
+    """
+
+    name: str
+    unique: tuple[str, ...]
+    foreign_keys: dict[str, str]
+    # Суффикс имени -> колонки; совпадают с Meta.indexes модели
+    indexes: dict[str, tuple[str, ...]]
+
+
+LINK_TABLES = {
+    table.name: table
+    for table in (
+        LinkTable(
+            name="person_film_work",
+            unique=("film_work_id", "person_id", "role"),
+            foreign_keys={"film_work_id": "film_work", "person_id": "person"},
+            indexes={"person_idx": ("person_id", "role")},
+        ),
+        LinkTable(
+            name="genre_film_work",
+            unique=("film_work_id", "genre_id"),
+            foreign_keys={"film_work_id": "film_work", "genre_id": "genre"},
+            indexes={"genre_idx": ("genre_id", "film_work_id")},
+        ),
+    )
+}
+
+
+def _fetchall(cursor, sql: str, params=()) -> list[tuple]:
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def partition_count(cursor, table: str) -> int | None:
+    """Число секций таблицы или None, если таблица не секционирована."""
+    rows = _fetchall(
+        cursor,
+        """
+        SELECT c.relkind, count(i.inhrelid)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_inherits i ON i.inhparent = c.oid
+        WHERE n.nspname = %s AND c.relname = %s
+        GROUP BY c.relkind
+        """,
+        (SCHEMA, table),
+    )
+    if not rows:
+        raise LookupError(f"{SCHEMA}.{table} does not exist")
+    relkind, partitions = rows[0]
+    return partitions if relkind == "p" else None
+
+
+def partition_names(cursor, table: str) -> list[str]:
+    return [
+        name
+        for (name,) in _fetchall(
+            cursor,
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            ORDER BY c.relname
+            """,
+            (f"{SCHEMA}.{table}",),
+        )
+    ]
+
+
+def _exists(cursor, relation: str) -> bool:
+    (oid,) = _fetchall(cursor, "SELECT to_regclass(%s)", (f"{SCHEMA}.{relation}",))[0]
+    return oid is not None
+
+
+def create_shadow(cursor, link: LinkTable, partitions: int | None) -> str:
+    """Создает пустую копию таблицы связей: секционированную или обычную."""
+    table, shadow = link.name, f"{link.name}_new"
+    if partitions:
+        cursor.execute(
+            f"CREATE TABLE {SCHEMA}.{shadow} (LIKE {SCHEMA}.{table}) "
+            f"PARTITION BY HASH (film_work_id);"
+        )
+        for remainder in range(partitions):
+            cursor.execute(
+                f"CREATE TABLE {SCHEMA}.{shadow}_p{remainder} "
+                f"PARTITION OF {SCHEMA}.{shadow} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder});"
+            )
+        primary_key = "id, film_work_id"
+    else:
+        cursor.execute(f"CREATE TABLE {SCHEMA}.{shadow} (LIKE {SCHEMA}.{table});")
+        primary_key = "id"
+
+    cursor.execute(
+        f"ALTER TABLE {SCHEMA}.{shadow} "
+        f"ADD CONSTRAINT {shadow}_pkey PRIMARY KEY ({primary_key}), "
+        f"ADD CONSTRAINT {shadow}_uniq UNIQUE ({', '.join(link.unique)});"
+    )
+    # film_work_id покрыт уникальным ограничением, остальные ключи - индексами
+    # обратного поиска; при подмене они получат имена из Meta.indexes модели
+    for suffix, columns in link.indexes.items():
+        cursor.execute(
+            f"CREATE INDEX {shadow}_{suffix} "
+            f"ON {SCHEMA}.{shadow} ({', '.join(columns)});"
+        )
+    for column, target in link.foreign_keys.items():
+        cursor.execute(
+            f"ALTER TABLE {SCHEMA}.{shadow} ADD CONSTRAINT {table}_{column}_fk "
+            f"FOREIGN KEY ({column}) REFERENCES {SCHEMA}.{target} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED;"
+        )
+    return shadow
+
+
+def install_sync_trigger(cursor, link: LinkTable) -> None:
+    """Триггер, переносящий изменения исходной таблицы в теневую во время копирования."""
+    table, shadow = link.name, f"{link.name}_new"
+    cursor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {SCHEMA}.{table}_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {SCHEMA}.{shadow}
+                WHERE id = OLD.id AND film_work_id = OLD.film_work_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {SCHEMA}.{shadow} SELECT (NEW).* ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER {table}_sync
+        AFTER INSERT OR UPDATE OR DELETE ON {SCHEMA}.{table}
+        FOR EACH ROW EXECUTE FUNCTION {SCHEMA}.{table}_sync();
+        """
+    )
+
+
+def backfill_batch(cursor, link: LinkTable, after: str | None, size: int):
+    """Копирует следующую пачку строк по возрастанию id.
+
+    FOR SHARE не дает параллельному DELETE/UPDATE проскочить между чтением
+    пачки и ее вставкой: синхронизирующий триггер сработает после копирования.
+    Возвращает последний скопированный id и размер пачки.
+    """
+    table, shadow = link.name, f"{link.name}_new"
+    cursor.execute(
+        f"""
+        WITH batch AS (
+            SELECT * FROM {SCHEMA}.{table}
+            WHERE %s::uuid IS NULL OR id > %s::uuid
+            ORDER BY id
+            LIMIT %s
+            FOR SHARE
+        ), copied AS (
+            INSERT INTO {SCHEMA}.{shadow} SELECT * FROM batch ON CONFLICT DO NOTHING
+        )
+        SELECT (SELECT id FROM batch ORDER BY id DESC LIMIT 1), count(*) FROM batch
+        """,
+        (after, after, size),
+    )
+    return cursor.fetchone()
+
+
+def _rename_indexes(cursor, relation: str, old_prefix: str, new_prefix: str) -> None:
+    for (index,) in _fetchall(
+        cursor,
+        "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+        (SCHEMA, relation),
+    ):
+        if index.startswith(old_prefix):
+            cursor.execute(
+                f"ALTER INDEX {SCHEMA}.{index} "
+                f"RENAME TO {new_prefix}{index[len(old_prefix):]};"
+            )
+
+
+def _dependent_matviews(cursor, table: str) -> list[tuple[str, str, list[str]]]:
+    """Материализованные представления над таблицей: имя, запрос, индексы.
+
+    pg_get_viewdef квалифицирует схемой только имена, не видимые через
+    search_path, поэтому запрос читается с пустым search_path: иначе при
+    search_path со схемой content таблицу в нем нельзя найти и подменить.
+    """
+    (search_path,) = _fetchall(cursor, "SELECT current_setting('search_path')")[0]
+    cursor.execute("SELECT set_config('search_path', '', false);")
+    try:
+        return _read_matviews(cursor, table)
+    finally:
+        cursor.execute("SELECT set_config('search_path', %s, false);", (search_path,))
+
+
+def _read_matviews(cursor, table: str) -> list[tuple[str, str, list[str]]]:
+    return [
+        (
+            name,
+            definition,
+            [
+                indexdef
+                for (indexdef,) in _fetchall(
+                    cursor,
+                    "SELECT indexdef FROM pg_indexes "
+                    "WHERE schemaname = %s AND tablename = %s",
+                    (SCHEMA, name),
+                )
+            ],
+        )
+        for name, definition in _fetchall(
+            cursor,
+            """
+            SELECT DISTINCT v.relname, pg_get_viewdef(v.oid)
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            JOIN pg_class v ON v.oid = r.ev_class
+            WHERE d.refobjid = %s::regclass AND v.relkind = 'm'
+                AND v.oid <> d.refobjid
+            """,
+            (f"{SCHEMA}.{table}",),
+        )
+    ]
+
+
+def build_matviews(cursor, link: LinkTable) -> list[str]:
+    """Строит копии зависимых представлений над теневой таблицей до переключения.
+
+    Представления ссылаются на таблицы по OID, поэтому после переименования
+    старые продолжили бы читать исходную таблицу.
+    """
+    table, shadow = link.name, f"{link.name}_new"
+    pattern = re.compile(rf"\b{SCHEMA}\.{table}\b")
+    built = []
+    for name, definition, indexes in _dependent_matviews(cursor, table):
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {SCHEMA}.{name}_new;")
+        cursor.execute(
+            f"CREATE MATERIALIZED VIEW {SCHEMA}.{name}_new AS "
+            + pattern.sub(f"{SCHEMA}.{shadow}", definition)
+        )
+        for indexdef in indexes:
+            cursor.execute(
+                re.sub(
+                    rf"INDEX (\w+) ON {SCHEMA}\.{name} ",
+                    rf"INDEX \1_new ON {SCHEMA}.{name}_new ",
+                    indexdef,
+                )
+            )
+        built.append(name)
+    return built
+
+
+def swap(cursor, link: LinkTable, matviews: list[str]) -> None:
+    """Подменяет таблицу теневой копией; исходная остается как <table>_old."""
+    table, shadow, old = link.name, f"{link.name}_new", f"{link.name}_old"
+    # Не выстраиваться в очередь за долгими чтениями, блокируя всех за собой
+    cursor.execute(f"SET LOCAL lock_timeout = '{settings.PARTITION_LOCK_TIMEOUT}';")
+    cursor.execute(f"LOCK TABLE {SCHEMA}.{table} IN ACCESS EXCLUSIVE MODE;")
+    cursor.execute(
+        f"DROP TRIGGER {table}_sync ON {SCHEMA}.{table};"
+        f"DROP FUNCTION {SCHEMA}.{table}_sync();"
+    )
+    # Триггеры (change_event, счетчики) переезжают на новую таблицу
+    triggers = _fetchall(
+        cursor,
+        """
+        SELECT tgname, pg_get_triggerdef(oid)
+        FROM pg_trigger
+        WHERE tgrelid = %s::regclass AND NOT tgisinternal AND tgparentid = 0
+        """,
+        (f"{SCHEMA}.{table}",),
+    )
+    for name, _definition in triggers:
+        cursor.execute(f"DROP TRIGGER {name} ON {SCHEMA}.{table};")
+    for name in matviews:
+        cursor.execute(f"DROP MATERIALIZED VIEW {SCHEMA}.{name};")
+        cursor.execute(f"ALTER MATERIALIZED VIEW {SCHEMA}.{name}_new RENAME TO {name};")
+        for (index,) in _fetchall(
+            cursor,
+            "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+            (SCHEMA, name),
+        ):
+            cursor.execute(f"ALTER INDEX {SCHEMA}.{index} RENAME TO {index[:-4]};")
+
+    for partition in partition_names(cursor, table):
+        renamed = f"{old}{partition[len(table):]}"
+        cursor.execute(f"ALTER TABLE {SCHEMA}.{partition} RENAME TO {renamed};")
+        _rename_indexes(cursor, renamed, f"{partition}_", f"{renamed}_")
+    cursor.execute(f"ALTER TABLE {SCHEMA}.{table} RENAME TO {old};")
+    _rename_indexes(cursor, old, f"{table}_", f"{old}_")
+    for partition in partition_names(cursor, shadow):
+        renamed = f"{table}{partition[len(shadow):]}"
+        cursor.execute(f"ALTER TABLE {SCHEMA}.{partition} RENAME TO {renamed};")
+        _rename_indexes(cursor, renamed, f"{partition}_", f"{renamed}_")
+    cursor.execute(f"ALTER TABLE {SCHEMA}.{shadow} RENAME TO {table};")
+    _rename_indexes(cursor, table, f"{shadow}_", f"{table}_")
+    for _name, definition in triggers:
+        cursor.execute(definition)
+
+
+def estimated_rows(cursor, table: str) -> int:
+    (rows,) = _fetchall(
+        cursor,
+        "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = %s::regclass",
+        (f"{SCHEMA}.{table}",),
+    )[0]
+    return rows
+
+
+def prepare(link: LinkTable, partitions: int | None, using=connection) -> bool:
+    """Создает теневую таблицу и триггер синхронизации.
+
+    Теневая таблица с другой схемой секционирования пересоздается.
+    Возвращает False, если таблица уже в нужном виде.
+    """
+    shadow = f"{link.name}_new"
+    with using.cursor() as cursor, transaction.atomic(using=using.alias):
+        done = partition_count(cursor, link.name) == partitions
+        if _exists(cursor, shadow) and (
+            done or partition_count(cursor, shadow) != partitions
+        ):
+            discard(cursor, link)
+        if done:
+            return False
+        if not _exists(cursor, shadow):
+            create_shadow(cursor, link, partitions)
+        install_sync_trigger(cursor, link)
+    return True
+
+
+def discard(cursor, link: LinkTable) -> None:
+    """Удаляет теневую таблицу прерванного или отмененного переноса."""
+    cursor.execute(
+        f"DROP TRIGGER IF EXISTS {link.name}_sync ON {SCHEMA}.{link.name};"
+        f"DROP FUNCTION IF EXISTS {SCHEMA}.{link.name}_sync();"
+        f"DROP TABLE IF EXISTS {SCHEMA}.{link.name}_new;"
+    )
+
+
+def convert(
+    link: LinkTable,
+    partitions: int | None,
+    batch_size: int = 10000,
+    drop_old: bool = False,
+    using=connection,
+    progress: Callable[[int], None] | None = None,
+) -> bool:
+    """Переводит таблицу связей в секционированную (или обратно) без простоя.
+
+    Каждый шаг - отдельная транзакция: теневая таблица и триггер синхронизации,
+    копирование пачками, сборка зависимых представлений и короткое переключение
+    под ACCESS EXCLUSIVE. Прерванный перенос продолжается с начала копирования.
+    """
+    if not prepare(link, partitions, using):
+        logger.info("%s is already in the requested layout", link.name)
+        return False
+
+    with using.cursor() as cursor:
+        after, copied = None, 0
+        while True:
+            with transaction.atomic(using=using.alias):
+                last_id, count = backfill_batch(cursor, link, after, batch_size)
+            if not count:
+                break
+            after, copied = last_id, copied + count
+            logger.info("%s: copied %s rows", link.name, copied)
+            if progress:
+                progress(copied)
+
+        with transaction.atomic(using=using.alias):
+            matviews = build_matviews(cursor, link)
+        with transaction.atomic(using=using.alias):
+            swap(cursor, link, matviews)
+            if drop_old:
+                cursor.execute(f"DROP TABLE {SCHEMA}.{link.name}_old;")
+        cursor.execute(f"ANALYZE {SCHEMA}.{link.name};")
+    return True
@@ -0,0 +1,18 @@
+import csv
+import io
+from typing import Iterable
+
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+
+def copy_rows(cursor, table: str, columns: Iterable[str], rows: list[tuple]) -> None:
+    """Записывает строки в таблицу одним COPY ... FROM STDIN в формате CSV."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    if is_psycopg3:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+    else:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocomplete, cache
+from .models import Filmwork, FilmworkType, Genre, GenreFilmwork, Person, PersonFimwork
+
+
+@receiver(post_save, sender=Filmwork)
+@receiver(post_delete, sender=Filmwork)
+def invalidate_filmwork(sender, instance: Filmwork, **kwargs) -> None:
+    cache.invalidate_films_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=GenreFilmwork)
+@receiver(post_delete, sender=GenreFilmwork)
+@receiver(post_save, sender=PersonFimwork)
+@receiver(post_delete, sender=PersonFimwork)
+def invalidate_film_link(sender, instance, **kwargs) -> None:
+    cache.invalidate_films_on_commit([instance.film_work_id])
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def invalidate_genre(sender, instance: Genre, **kwargs) -> None:
+    cache.invalidate_on_commit(cache.GENRE_LIST)
+    cache.invalidate_films_on_commit(
+        GenreFilmwork.objects.filter(genre=instance).values_list(
+            "film_work_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Person)
+@receiver(pre_delete, sender=Person)
+def invalidate_person(sender, instance: Person, **kwargs) -> None:
+    cache.invalidate_films_on_commit(
+        PersonFimwork.objects.filter(person=instance).values_list(
+            "film_work_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=FilmworkType)
+@receiver(pre_delete, sender=FilmworkType)
+def invalidate_filmwork_type(sender, instance: FilmworkType, **kwargs) -> None:
+    cache.invalidate_on_commit(cache.TYPE_LIST)
+    cache.invalidate_films_on_commit(
+        Filmwork.objects.filter(type=instance).values_list("id", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Filmwork.genres.through)
+@receiver(m2m_changed, sender=Filmwork.persons.through)
+def invalidate_film_relations(
+    sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs
+) -> None:
+    if not reverse:
+        if action.startswith("post_"):
+            cache.invalidate_films_on_commit([instance.pk])
+        return
+    # Обратная сторона связи: instance - жанр или персона, pk_set - фильмы
+    if action == "pre_clear":
+        related_field = "genre" if sender is GenreFilmwork else "person"
+        pk_set = sender.objects.filter(**{related_field: instance}).values_list(
+            "film_work_id", flat=True
+        )
+        cache.invalidate_films_on_commit(pk_set)
+    elif action in ("post_add", "post_remove"):
+        cache.invalidate_films_on_commit(pk_set)
+
+
+@receiver(post_save, sender=Filmwork)
+def index_filmwork_title(sender, instance: Filmwork, **kwargs) -> None:
+    entry = (autocomplete.FILM, instance.pk, instance.title, instance.rating or 0.0)
+    transaction.on_commit(lambda: autocomplete.registry.put(*entry))
+
+
+@receiver(post_save, sender=Person)
+def index_person_name(sender, instance: Person, **kwargs) -> None:
+    rank = (
+        instance.actor_films_count
+        + instance.director_films_count
+        + instance.writer_films_count
+    )
+    entry = (autocomplete.PERSON, instance.pk, instance.full_name, rank)
+    transaction.on_commit(lambda: autocomplete.registry.put(*entry))
+
+
+@receiver(post_delete, sender=Filmwork)
+@receiver(post_delete, sender=Person)
+def unindex_autocomplete(sender, instance, **kwargs) -> None:
+    # После удаления pk экземпляра обнуляется, поэтому берется сразу
+    kind = autocomplete.FILM if sender is Filmwork else autocomplete.PERSON
+    entry = (kind, instance.pk)
+    transaction.on_commit(lambda: autocomplete.registry.remove(*entry))
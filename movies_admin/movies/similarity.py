@@ -0,0 +1,226 @@
+import array
+import logging
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from scipy import sparse
+
+from . import cache
+from .models import Filmwork, GenreFilmwork, PersonFimwork, SimilarFilmwork
+from .pgcopy import copy_rows
+
+
+logger = logging.getLogger(__name__)
+
+# Доля группы признаков в близости: каждая группа нормируется отдельно,
+# поэтому жанры не перевешивают из-за числа участников или слов описания
+FEATURE_WEIGHTS = {"genre": 1.0, "person": 1.0, "type": 0.5, "term": 1.0}
+# Признак одного фильма ни с кем не сближает, а слово из половины описаний
+# сближает всех
+MIN_DF = 2
+MAX_TERM_DF_SHARE = 0.5
+
+_TERM_RE = re.compile(r"[^\W\d_]{3,}")
+_CHUNK_SIZE = 10000
+
+
+def terms(text: str) -> Counter:
+    """Слова описания от трех букв в нижнем регистре с числом вхождений."""
+    return Counter(_TERM_RE.findall(text.casefold()))
+
+
+class _Group:
+    """Разреженная матрица группы признаков в координатном формате.
+
+    Координаты копятся в типизированных буферах по 4 байта на значение
+    (список Python держит объект на каждое) и без копирования становятся
+    массивами numpy при сборке матрицы.
+    """
+
+    def __init__(self) -> None:
+        self.columns: dict = {}
+        self.rows = array.array("i")
+        self.cols = array.array("i")
+        self.data = array.array("f")
+
+    def add(self, row: int, feature, value: float = 1.0) -> None:
+        self.rows.append(row)
+        self.cols.append(self.columns.setdefault(feature, len(self.columns)))
+        self.data.append(value)
+
+    def matrix(self, films: int, max_df: float = 1.0) -> sparse.csr_matrix:
+        """TF-IDF с нормированными строками; редкие и частые признаки отбрасываются."""
+        matrix = sparse.csr_matrix(
+            (
+                np.frombuffer(self.data, dtype=np.float32),
+                (
+                    np.frombuffer(self.rows, dtype=np.int32),
+                    np.frombuffer(self.cols, dtype=np.int32),
+                ),
+            ),
+            shape=(films, len(self.columns)),
+            dtype=np.float32,
+        )
+        # Повторы пары (фильм, признак) при сборке складываются
+        matrix.sum_duplicates()
+        df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        keep = (df >= MIN_DF) & (df <= max_df * films)
+        matrix = matrix[:, np.flatnonzero(keep)]
+        idf = np.log((1 + films) / (1 + df[keep])) + 1
+        matrix = matrix @ sparse.diags(idf.astype(np.float32))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+@dataclass
+class Features:
+    film_ids: list
+    # Строка на фильм, строки нормированы: скалярное произведение - косинус
+    matrix: sparse.csr_matrix
+
+
+def load_features() -> Features:
+    """Векторы признаков всех фильмов: жанры, персоны по ролям, тип, описание."""
+    groups = {name: _Group() for name in FEATURE_WEIGHTS}
+    film_ids = []
+    positions = {}
+    films = Filmwork.objects.order_by("id").values_list("id", "type", "description")
+    for position, (film_id, film_type, description) in enumerate(
+        films.iterator(chunk_size=_CHUNK_SIZE)
+    ):
+        film_ids.append(film_id)
+        positions[film_id] = position
+        if film_type is not None:
+            groups["type"].add(position, film_type)
+        for term, count in terms(description or "").items():
+            groups["term"].add(position, term, 1 + math.log(count))
+    # Связи фильмов, добавленных после чтения списка, пропускаются
+    for film_id, genre_id in GenreFilmwork.objects.values_list(
+        "film_work_id", "genre_id"
+    ).iterator(chunk_size=_CHUNK_SIZE):
+        if film_id in positions:
+            groups["genre"].add(positions[film_id], genre_id)
+    for film_id, person_id, role in PersonFimwork.objects.values_list(
+        "film_work_id", "person_id", "role"
+    ).iterator(chunk_size=_CHUNK_SIZE):
+        if film_id in positions:
+            groups["person"].add(positions[film_id], (person_id, role))
+
+    blocks = [
+        groups[name].matrix(len(film_ids), MAX_TERM_DF_SHARE if name == "term" else 1.0)
+        * np.float32(math.sqrt(weight / sum(FEATURE_WEIGHTS.values())))
+        for name, weight in FEATURE_WEIGHTS.items()
+    ]
+    matrix = sparse.hstack(blocks, format="csr", dtype=np.float32)
+    # У фильма без части признаков остальные группы весят больше
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = (sparse.diags((1 / norms).astype(np.float32)) @ matrix).tocsr()
+    return Features(film_ids, matrix)
+
+
+def top_neighbours(
+    matrix: sparse.csr_matrix, top_k: int, batch_size: int
+) -> Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Лучшие top_k соседей для пачек строк: (начало пачки, строка, сосед, близость, место).
+
+    Общие тип и жанры делают близость пачки со всем каталогом почти плотной,
+    поэтому пачка разворачивается в плотный массив, и близость считается
+    произведением разреженной матрицы каталога на плотную: сразу массив
+    float32 (число фильмов x размер пачки) без промежуточной разреженной
+    матрицы. top_k всех строк отбирается argpartition по самому массиву
+    за линейное время без цикла по фильмам.
+    """
+    top_k = min(top_k, matrix.shape[0] - 1)
+    if top_k <= 0:
+        return
+    for start in range(0, matrix.shape[0], batch_size):
+        scores = (matrix @ matrix[start : start + batch_size].toarray().T).T
+        batch = np.arange(scores.shape[0])
+        scores[batch, batch + start] = 0
+        cols = np.argpartition(scores, -top_k, axis=1)[:, -top_k:]
+        data = np.take_along_axis(scores, cols, axis=1)
+        # При равной близости порядок по соседу, чтобы пересчет был стабильным
+        order = np.lexsort((cols, -data), axis=1)
+        cols = np.take_along_axis(cols, order, axis=1)
+        data = np.take_along_axis(data, order, axis=1)
+        rows = np.broadcast_to(batch[:, None], cols.shape)
+        ranks = np.broadcast_to(np.arange(top_k), cols.shape)
+        # Нулевая близость сортируется последней, места остаются подряд
+        keep = data > 0
+        yield start, rows[keep], cols[keep], data[keep], ranks[keep]
+
+
+def _store(film_ids: list, batch_ids: list, rows, cols, scores, ranks) -> int:
+    """Заменяет соседей пачки фильмов в одной короткой транзакции через COPY."""
+    records = list(
+        zip(
+            [batch_ids[row] for row in rows.tolist()],
+            [film_ids[col] for col in cols.tolist()],
+            (ranks + 1).tolist(),
+            np.round(scores, 4).tolist(),
+        )
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        SimilarFilmwork.objects.filter(film_work_id__in=batch_ids).delete()
+        copy_rows(
+            cursor,
+            connection.ops.quote_name(SimilarFilmwork._meta.db_table),
+            ("film_work_id", "similar_id", "rank", "score"),
+            records,
+        )
+    return len(records)
+
+
+def compute(top_k: int | None = None, batch_size: int | None = None) -> int:
+    """Пересчитывает похожие фильмы всего каталога, возвращает число записей.
+
+    Пачки записываются отдельными транзакциями: читатели видят старых соседей
+    до замены, таблица не блокируется на время расчета.
+    """
+    top_k = top_k or settings.SIMILAR_FILMS_TOP_K
+    batch_size = batch_size or settings.SIMILAR_FILMS_BATCH_SIZE
+    started = time.monotonic()
+    features = load_features()
+    logger.info(
+        "Similarity features: %s films x %s features, %s non-zero in %.1fs",
+        *features.matrix.shape,
+        features.matrix.nnz,
+        time.monotonic() - started,
+    )
+    stored = 0
+    for start, rows, cols, scores, ranks in top_neighbours(
+        features.matrix, top_k, batch_size
+    ):
+        batch_ids = features.film_ids[start : start + batch_size]
+        try:
+            stored += _store(features.film_ids, batch_ids, rows, cols, scores, ranks)
+        except IntegrityError:
+            # Фильм удален после чтения признаков: пачка пересчитается в следующий раз
+            logger.warning("Similar films of batch at %s skipped", start)
+    # Таблица переписана целиком: статистика нужна планировщику сразу
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ANALYZE {connection.ops.quote_name(SimilarFilmwork._meta.db_table)};"
+        )
+    cache.invalidate_on_commit(cache.FILM_SIMILAR)
+    logger.info("Similar films computed in %.1fs", time.monotonic() - started)
+    return stored
+
+
+def similar_films(film_id, limit: int | None = None) -> QuerySet:
+    """Похожие фильмы по убыванию близости."""
+    return (
+        SimilarFilmwork.objects.filter(film_work_id=film_id)
+        .select_related("similar")
+        .order_by("rank")[: limit or settings.SIMILAR_FILMS_TOP_K]
+    )
@@ -0,0 +1,126 @@
+import datetime
+import random
+import uuid
+
+from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import connection
+
+from .constants import PersonRoleChoice
+from .models import Filmwork, FilmworkType, Genre, GenreFilmwork, Person, PersonFimwork
+
+
+WORDS = (
+    "star war space night dark return empire love city last king river "
+    "ghost shadow story summer winter blood game house road secret"
+).split()
+FILM_TYPES = {"movie": "Фильм", "tv_show": "Сериал"}
+
+
+def _title(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate_catalog(
+    films: int = 10000,
+    persons: int = 20000,
+    genres: int = 30,
+    genres_per_film: int = 2,
+    persons_per_film: int = 6,
+    batch_size: int = 5000,
+    seed: int = 0,
+    history_days: int = 3650,
+) -> None:
+    """Заполняет content синтетическим каталогом и обновляет статистику планировщика.
+
+    Время создания фильмов и персон растягивается на history_days последних дней
+    в порядке строк в таблице, как у накопленной истории, время изменения
+    случайно между созданием и текущим моментом.
+    """
+    rnd = random.Random(seed)
+
+    film_types = [
+        FilmworkType.objects.get_or_create(slug=slug, defaults={"name": name})[0]
+        for slug, name in FILM_TYPES.items()
+    ]
+    genre_objs = Genre.objects.bulk_create(
+        Genre(id=uuid.UUID(int=rnd.getrandbits(128)), name=f"Genre {i}")
+        for i in range(genres)
+    )
+    person_objs = Person.objects.bulk_create(
+        (
+            Person(
+                id=uuid.UUID(int=rnd.getrandbits(128)),
+                full_name=f"{_title(rnd, 1)} {_title(rnd, 1)}son {i}",
+            )
+            for i in range(persons)
+        ),
+        batch_size=batch_size,
+    )
+    film_objs = Filmwork.objects.bulk_create(
+        (
+            Filmwork(
+                id=uuid.UUID(int=rnd.getrandbits(128)),
+                title=f"{_title(rnd, 3)} {i}",
+                description=_title(rnd, 12),
+                creation_date=datetime.date(1950, 1, 1)
+                + datetime.timedelta(days=rnd.randrange(365 * 70)),
+                rating=round(rnd.uniform(0, 10), 1),
+                type=rnd.choice(film_types),
+            )
+            for i in range(films)
+        ),
+        batch_size=batch_size,
+    )
+    GenreFilmwork.objects.bulk_create(
+        (
+            GenreFilmwork(film_work=film, genre=genre)
+            for film in film_objs
+            for genre in rnd.sample(genre_objs, min(genres_per_film, len(genre_objs)))
+        ),
+        batch_size=batch_size,
+    )
+    PersonFimwork.objects.bulk_create(
+        (
+            PersonFimwork(
+                film_work=film, person=person, role=rnd.choice(PersonRoleChoice.values)
+            )
+            for film in film_objs
+            for person in rnd.sample(person_objs, persons_per_film)
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    created_at = "s.start + s.span * ((ctid::text::point)[0] / s.pages)"
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT setseed(%s);", [rnd.uniform(-1, 1)])
+        for model in (Filmwork, Person):
+            table = connection.ops.quote_name(model._meta.db_table)
+            # UPDATE без соединений идет по страницам, поэтому новые версии строк
+            # сохраняют порядок создания, на который рассчитан BRIN по created_at.
+            # Время изменения - случайный момент после создания, не связанный
+            # с положением строки в таблице, как у правок в рабочей БД
+            cursor.execute(
+                f"""
+                UPDATE {table}
+                SET created_at = {created_at},
+                    updated_at = {created_at} + random() * (now() - ({created_at}))
+                FROM (
+                    SELECT now() - make_interval(days => %s) AS start,
+                        make_interval(days => %s) AS span,
+                        greatest(pg_relation_size(%s::regclass)
+                            / current_setting('block_size')::float, 1) AS pages
+                ) s;
+                """,
+                [history_days, history_days, table],
+            )
+            for index in model._meta.indexes:
+                if isinstance(index, BrinIndex):
+                    cursor.execute(
+                        "SELECT brin_summarize_new_values(%s::regclass);",
+                        [f"{settings.CONTENT_SCHEMA}.{index.name}"],
+                    )
+        for model in (Filmwork, Person, Genre, GenreFilmwork, PersonFimwork):
+            cursor.execute(
+                f"ANALYZE {connection.ops.quote_name(model._meta.db_table)};"
+            )
@@ -0,0 +1,62 @@
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.db import connections
+from django.utils import timezone
+
+
+register = template.Library()
+
+# Крайние значения гистограммы колонки из статистики планировщика
+BOUNDS_SQL = """
+    SELECT bounds[1], bounds[array_upper(bounds, 1)]
+    FROM (
+        SELECT histogram_bounds::text::timestamptz[] AS bounds
+        FROM pg_stats
+        WHERE schemaname = %s AND tablename = %s AND attname = %s
+    ) s
+"""
+
+
+def _planner_years(model, field_name: str, using: str) -> range | None:
+    """Годы между крайними значениями колонки по статистике планировщика."""
+    schema, _, table = model._meta.db_table.rpartition('"."')
+    column = model._meta.get_field(field_name).column
+    with connections[using].cursor() as cursor:
+        cursor.execute(BOUNDS_SQL, [schema, table, column])
+        row = cursor.fetchone()
+    if row is None or None in row:
+        return None
+    first, last = (timezone.localtime(value) for value in row)
+    return range(first.year, max(last.year, timezone.localtime().year) + 1)
+
+
+@register.inclusion_tag("admin/date_hierarchy.html")
+def audit_date_hierarchy(cl) -> dict:
+    """date_hierarchy, которому не нужен проход по всей таблице.
+
+    Стандартный верхний уровень считает DISTINCT по годам всей выборки, и этот
+    запрос читает всю таблицу. Годы берутся из статистики планировщика
+    (возможны пустые годы), а уровни ниже фильтруются по диапазону дат
+    и читаются по индексу. Без статистики (маленькая или не
+    проанализированная таблица) работает стандартная реализация.
+    """
+    field_name = cl.date_hierarchy
+    if any(cl.params.get(f"{field_name}__{part}") for part in ("year", "month", "day")):
+        return date_hierarchy(cl)
+    years = _planner_years(cl.model, field_name, cl.queryset.db)
+    if years is None:
+        return date_hierarchy(cl)
+    year_field = f"{field_name}__year"
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {
+                "link": cl.get_query_string(
+                    {year_field: str(year)}, [f"{field_name}__"]
+                ),
+                "title": str(year),
+            }
+            for year in years
+        ],
+    }
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from movies.models import Filmwork, FilmworkType, Genre, GenreFilmwork
+
+
+class FilmworkFacetsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        movie = FilmworkType.objects.create(slug="movie", name="Movie")
+        cls.drama, cls.comedy = Genre.objects.bulk_create(
+            [Genre(name="Drama"), Genre(name="Comedy")]
+        )
+        storm, calm, old = Filmwork.objects.bulk_create(
+            [
+                Filmwork(title="Storm", type=movie, rating=7.5),
+                Filmwork(title="Calm sea", rating=5.0),
+                Filmwork(title="Old storm", type=movie, rating=7.2),
+            ]
+        )
+        GenreFilmwork.objects.bulk_create(
+            [
+                GenreFilmwork(film_work=storm, genre=cls.drama),
+                GenreFilmwork(film_work=calm, genre=cls.comedy),
+                GenreFilmwork(film_work=old, genre=cls.drama),
+            ]
+        )
+        Filmwork.objects.filter(pk=old.pk).update(
+            updated_at=timezone.now() - timedelta(days=60)
+        )
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def facets(self, params: str = "") -> dict[str, dict[str, int]]:
+        response = self.client.get(reverse("admin:movies_filmwork_changelist") + params)
+        self.assertEqual(response.status_code, 200)
+        return {
+            facet: {str(item["value"]): item["count"] for item in values}
+            for facet, values in response.context["cl"].facets.items()
+        }
+
+    def test_counts_follow_changelist_filters(self) -> None:
+        drama, comedy = str(self.drama.pk), str(self.comedy.pk)
+        self.assertEqual(self.facets()["genre"], {drama: 2, comedy: 1})
+        # Фильтр «Изменено», поиск и date_hierarchy сужают и счетчики
+        self.assertEqual(self.facets("?changed=7d")["genre"], {drama: 1, comedy: 1})
+        self.assertEqual(self.facets("?q=storm")["genre"], {drama: 2})
+        year = timezone.now().year
+        self.assertEqual(
+            self.facets(f"?changed=7d&q=storm&updated_at__year={year}")["type"],
+            {"movie": 1},
+        )
+
+    def test_selected_facet_keeps_its_other_values(self) -> None:
+        facets = self.facets(f"?changed=7d&genre={self.drama.pk}")
+        self.assertEqual(
+            facets["genre"], {str(self.drama.pk): 1, str(self.comedy.pk): 1}
+        )
+        self.assertEqual(facets["rating"], {"7": 1})
@@ -0,0 +1,266 @@
+import datetime
+import json
+import os
+import re
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from movies import similarity
+from movies.models import Filmwork, FilmworkType, Genre, Person
+from movies.synthetic import generate_catalog
+
+
+FIXTURE_FILMS = int(os.environ.get("PERF_FIXTURE_FILMS", 20000))
+
+# Таблицы, на которых последовательное сканирование считается регрессией
+INDEXED_TABLES = {
+    "film_work",
+    "person",
+    "person_film_work",
+    "genre_film_work",
+    "film_work_similar",
+}
+# Счетчики фасетов агрегируют всю отфильтрованную выборку: Seq Scan допустим,
+# но каждая таблица читается один раз, а не на каждую строку (assertBoundedPlan)
+FACETS_MARKER = "GROUP BY GROUPING SETS"
+# Секции таблиц связей (person_film_work_p0, ...)
+PARTITION_SUFFIX_RE = re.compile(r"_p\d+$")
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def _repeated_nodes(plan: dict, repeated: bool = False):
+    """Узлы плана, выполняемые на каждую строку внешнего узла.
+
+    Такие узлы - внутренняя сторона Nested Loop и коррелированные SubPlan.
+    """
+    if repeated:
+        yield plan
+    for child in plan.get("Plans", ()):
+        relationship = child.get("Parent Relationship")
+        yield from _repeated_nodes(
+            child,
+            repeated
+            or relationship == "SubPlan"
+            or (plan["Node Type"] == "Nested Loop" and relationship == "Inner"),
+        )
+
+
+@tag("performance")
+class AdminPerformanceTest(TestCase):
+    """Верхние границы числа запросов и отсутствие Seq Scan на страницах админки.
+
+    Каталог генерируется один раз на класс (PERF_FIXTURE_FILMS фильмов),
+    после загрузки обновляется статистика планировщика.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        generate_catalog(films=FIXTURE_FILMS, persons=FIXTURE_FILMS * 2)
+        similarity.compute()
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        cls.film = Filmwork.objects.order_by("id").first()
+        cls.person = Person.objects.order_by("id").first()
+        cls.genre = Genre.objects.order_by("id").first()
+        cls.film_type = FilmworkType.objects.order_by("slug").first()
+
+    @property
+    def person_term(self) -> str:
+        # Имя и фамилия без порядкового номера: достаточно селективно для индекса
+        return self.person.full_name.rsplit(" ", 1)[0]
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def explain(self, sql: str) -> dict:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    def seq_scans(self, sql: str) -> set[str]:
+        return {
+            node["Relation Name"]
+            for node in _plan_nodes(self.explain(sql))
+            if node["Node Type"] == "Seq Scan"
+        }
+
+    def assertNoSeqScan(self, sql: str) -> None:
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return
+        if FACETS_MARKER in sql:
+            self.assertBoundedPlan(sql)
+            return
+        for relation in self.seq_scans(sql):
+            self.assertNotIn(
+                PARTITION_SUFFIX_RE.sub("", relation),
+                INDEXED_TABLES,
+                f"Seq Scan on {relation}:\n{sql}",
+            )
+
+    def assertBoundedPlan(self, sql: str) -> None:
+        """Seq Scan только однократный: время растет линейно с выборкой."""
+        for node in _repeated_nodes(self.explain(sql)):
+            if node["Node Type"] == "Seq Scan":
+                self.assertNotIn(
+                    PARTITION_SUFFIX_RE.sub("", node["Relation Name"]),
+                    INDEXED_TABLES,
+                    f"Seq Scan on {node['Relation Name']} per outer row:\n{sql}",
+                )
+
+    def assertPagePerformance(self, url: str, max_queries: int) -> None:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if hasattr(response, "streaming_content"):
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        queries = [query["sql"] for query in context.captured_queries]
+        self.assertLessEqual(
+            len(queries),
+            max_queries,
+            f"{url}: {len(queries)} queries\n" + "\n".join(queries),
+        )
+        for sql in queries:
+            with self.subTest(url=url, sql=sql[:200]):
+                self.assertNoSeqScan(sql)
+
+    def test_changelists(self) -> None:
+        for model, max_queries in (
+            ("filmwork", 10),
+            ("person", 8),
+            ("genre", 8),
+            ("filmworktype", 8),
+        ):
+            with self.subTest(model=model):
+                self.assertPagePerformance(
+                    reverse(f"admin:movies_{model}_changelist"), max_queries
+                )
+
+    def test_counter_ordering(self) -> None:
+        # Номер колонки list_display, минус - по убыванию
+        for model, order in (
+            ("person", "-2"),
+            ("person", "-3"),
+            ("person", "4"),
+            ("genre", "-2"),
+            ("filmwork", "-6"),
+        ):
+            with self.subTest(model=model, order=order):
+                self.assertPagePerformance(
+                    reverse(f"admin:movies_{model}_changelist") + f"?o={order}", 10
+                )
+
+    def test_filmwork_search_and_filters(self) -> None:
+        url = reverse("admin:movies_filmwork_changelist")
+        title_word = self.film.title.split()[0]
+        for params in (
+            f"q={title_word}",
+            f"q={self.film.id}",
+            f"genre={self.genre.id}",
+            f"type={self.film_type.slug}",
+            "rating=7",
+            "year=1999",
+            f"genre={self.genre.id}&type={self.film_type.slug}&rating=5",
+            f"q={title_word}&genre={self.genre.id}&year=1980",
+        ):
+            with self.subTest(params=params):
+                self.assertPagePerformance(f"{url}?{params}", 10)
+
+    def test_audit_dates(self) -> None:
+        # Каталог растянут на 10 лет: месяц и неделя - малая доля таблиц
+        month_ago = timezone.now() - datetime.timedelta(days=30)
+        month = f"updated_at__year={month_ago.year}&updated_at__month={month_ago.month}"
+        for model in ("filmwork", "person"):
+            url = reverse(f"admin:movies_{model}_changelist")
+            for params in (
+                "changed=7d",
+                month,
+                f"{month}&updated_at__day={month_ago.day}",
+            ):
+                with self.subTest(model=model, params=params):
+                    self.assertPagePerformance(f"{url}?{params}", 10)
+
+        # Годы верхнего уровня берутся из статистики, без прохода по таблице
+        response = self.client.get(reverse("admin:movies_filmwork_changelist"))
+        self.assertContains(response, f"updated_at__year={timezone.now().year}")
+
+    def test_person_search(self) -> None:
+        url = reverse("admin:movies_person_changelist")
+        self.assertPagePerformance(f"{url}?{urlencode({'q': self.person_term})}", 8)
+
+    def test_change_forms(self) -> None:
+        # Виджет автокомплита читает подпись выбранной персоны для каждой строки,
+        # похожие фильмы читаются одним запросом с фильмами
+        film_persons = self.film.persons.count()
+        for model, obj, max_queries in (
+            ("filmwork", self.film, 11 + film_persons),
+            ("person", self.person, 8),
+            ("genre", self.genre, 8),
+        ):
+            with self.subTest(model=model):
+                self.assertPagePerformance(
+                    reverse(f"admin:movies_{model}_change", args=[obj.pk]), max_queries
+                )
+
+    def test_related_films(self) -> None:
+        # Самая длинная фильмография: страница не должна зависеть от ее размера
+        person = Person.objects.order_by(
+            (
+                F("actor_films_count")
+                + F("director_films_count")
+                + F("writer_films_count")
+            ).desc()
+        ).first()
+        person_url = reverse("admin:movies_person_change", args=[person.pk])
+        genre_url = reverse("admin:movies_genre_change", args=[self.genre.pk])
+        for url in (
+            person_url,
+            f"{person_url}?films_page=2",
+            f"{person_url}?films_role=actor",
+            f"{person_url}?films_role=director&films_page=999",
+            genre_url,
+            f"{genre_url}?films_page=3",
+        ):
+            with self.subTest(url=url):
+                self.assertPagePerformance(url, 8)
+
+        response = self.client.get(f"{person_url}?films_role=actor")
+        page = response.context["related_films"]
+        self.assertEqual(page.paginator.count, person.actor_films_count)
+        self.assertTrue(all(link.role == "actor" for link in page))
+        link = page[0]
+        self.assertContains(
+            response, reverse("admin:movies_filmwork_change", args=[link.film_work_id])
+        )
+
+    def test_add_forms(self) -> None:
+        for model, max_queries in (("filmwork", 10), ("person", 8), ("genre", 8)):
+            with self.subTest(model=model):
+                self.assertPagePerformance(
+                    reverse(f"admin:movies_{model}_add"), max_queries
+                )
+
+    def test_person_autocomplete(self) -> None:
+        url = reverse("admin:autocomplete")
+        params = urlencode(
+            {
+                "term": self.person_term,
+                "app_label": "movies",
+                "model_name": "personfimwork",
+                "field_name": "person",
+            }
+        )
+        self.assertPagePerformance(f"{url}?{params}", 6)
@@ -0,0 +1,170 @@
+import uuid
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from movies import cache
+from movies.api.v1.views import JsonApiMixin
+from movies.constants import PersonRoleChoice
+from movies.models import (
+    Filmwork,
+    FilmworkSearch,
+    FilmworkType,
+    Genre,
+    GenreFilmwork,
+    Person,
+    PersonFimwork,
+)
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+class MoviesApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.film = Filmwork.objects.create(title="Harbour")
+        drama, comedy = Genre.objects.bulk_create(
+            [Genre(name="Drama"), Genre(name="Comedy")]
+        )
+        GenreFilmwork.objects.bulk_create(
+            [
+                GenreFilmwork(film_work=cls.film, genre=genre)
+                for genre in (drama, comedy)
+            ]
+        )
+        # Два разных человека с одним именем
+        namesakes = Person.objects.bulk_create(
+            [Person(full_name="John Smith"), Person(full_name="John Smith")]
+        )
+        PersonFimwork.objects.bulk_create(
+            [
+                PersonFimwork(
+                    film_work=cls.film, person=person, role=PersonRoleChoice.ACTOR
+                )
+                for person in namesakes
+            ]
+        )
+
+    def test_detail_keeps_namesakes(self) -> None:
+        response = self.client.get(reverse("movies-detail", args=[self.film.pk]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["actors"], ["John Smith", "John Smith"])
+        self.assertEqual(sorted(data["genres"]), ["Comedy", "Drama"])
+        self.assertEqual(data["directors"], [])
+
+    def test_missing_objects_are_json_404(self) -> None:
+        for name in ("movies-detail", "movies-similar"):
+            response = self.client.get(reverse(name, args=[uuid.uuid4()]))
+            self.assertEqual(response.status_code, 404)
+            self.assertIn("error", response.json())
+
+    def test_cache_invalidated_after_commit(self) -> None:
+        url = reverse("movies-detail", args=[self.film.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Filmwork.objects.filter(pk=self.film.pk).update(title="Harbour II")
+            self.film.refresh_from_db()
+            self.film.save()
+            # До коммита в кеше остается старый ответ
+            self.assertIsNotNone(cache.load(cache.film_key(self.film.pk)))
+        self.assertTrue(callbacks)
+        self.assertIsNone(cache.load(cache.film_key(self.film.pk)))
+        self.assertEqual(self.client.get(url).json()["title"], "Harbour II")
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+class MoviesSearchApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Filmwork.objects.bulk_create(
+            [Filmwork(title=f"Storm {number}") for number in range(5)]
+            + [Filmwork(title="Storm storm storm"), Filmwork(title="Calm sea")]
+        )
+        FilmworkSearch.refresh(concurrently=False)
+
+    def pages(self, **params) -> list[list[str]]:
+        pages, cursor = [], None
+        for _ in range(10):
+            query = {**params, "page_size": 2}
+            if cursor is not None:
+                query["cursor"] = cursor
+            data = self.client.get(reverse("movies-search"), query).json()
+            pages.append([result["title"] for result in data["results"]])
+            cursor = data["next"]
+            if cursor is None:
+                return pages
+        self.fail("Cursor does not advance")
+
+    def test_keyset_pages_by_rank(self) -> None:
+        pages = self.pages(query="storm")
+        titles = [title for page in pages for title in page]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(titles[0], "Storm storm storm")
+        self.assertEqual(len(set(titles)), 6)
+
+    def test_keyset_pages_without_query(self) -> None:
+        titles = [title for page in self.pages() for title in page]
+        self.assertEqual(len(set(titles)), 7)
+
+    def test_invalid_cursor(self) -> None:
+        response = self.client.get(
+            reverse("movies-search"), {"query": "storm", "cursor": "bad"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+class MoviesFacetsApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        movie, show = FilmworkType.objects.bulk_create(
+            [
+                FilmworkType(slug="movie", name="Movie"),
+                FilmworkType(slug="show", name="Show"),
+            ]
+        )
+        cls.drama, cls.comedy = Genre.objects.bulk_create(
+            [Genre(name="Drama"), Genre(name="Comedy")]
+        )
+        films = Filmwork.objects.bulk_create(
+            [
+                Filmwork(title="A", type=movie, rating=7.5),
+                Filmwork(title="B", type=movie, rating=7.1),
+                Filmwork(title="C", type=show, rating=5.0),
+            ]
+        )
+        GenreFilmwork.objects.bulk_create(
+            [
+                GenreFilmwork(film_work=films[0], genre=cls.drama),
+                GenreFilmwork(film_work=films[1], genre=cls.comedy),
+                GenreFilmwork(film_work=films[2], genre=cls.drama),
+            ]
+        )
+
+    def facets(self, **params) -> dict:
+        data = self.client.get(reverse("movies-facets"), params).json()
+        return {
+            facet: {str(item["value"]): item["count"] for item in values}
+            for facet, values in data.items()
+        }
+
+    def test_selected_facet_keeps_its_other_values(self) -> None:
+        facets = self.facets(genre=str(self.drama.pk))
+        # Свой фасет считается без своего выбора, остальные - с ним
+        self.assertEqual(
+            facets["genre"], {str(self.drama.pk): 2, str(self.comedy.pk): 1}
+        )
+        self.assertEqual(facets["type"], {"movie": 1, "show": 1})
+        self.assertEqual(facets["rating"], {"7": 1, "5": 1})
+
+    def test_combined_selection(self) -> None:
+        facets = self.facets(genre=str(self.drama.pk), type="movie")
+        self.assertEqual(
+            facets["genre"], {str(self.drama.pk): 1, str(self.comedy.pk): 1}
+        )
+        self.assertEqual(facets["type"], {"movie": 1, "show": 1})
+        self.assertEqual(facets["rating"], {"7": 1})
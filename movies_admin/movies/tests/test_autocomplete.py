@@ -0,0 +1,112 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse_lazy
+
+from movies import autocomplete
+from movies.api.v1.views import JsonApiMixin
+from movies.models import Filmwork
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.index = autocomplete.PrefixIndex(
+            [
+                autocomplete.Entry("1", "Star Wars", 8.6),
+                autocomplete.Entry("2", "Star Trek", 7.9),
+                autocomplete.Entry("3", "Starship Troopers", 7.2),
+                autocomplete.Entry("4", "Café Wars", 1.0),
+            ],
+            memo_size=2,
+        )
+
+    def ids(self, query: str, limit: int = 10) -> list[str]:
+        return [entry.id for entry in self.index.search(query, limit)]
+
+    def test_prefix_of_any_word_ranked(self) -> None:
+        self.assertEqual(self.ids("STAR"), ["1", "2"])
+        self.assertEqual(self.ids("star t"), ["2"])
+        self.assertEqual(self.ids("wars"), ["1", "4"])
+        self.assertEqual(self.ids("cafe"), ["4"])
+        self.assertEqual(self.ids("sta", limit=1), ["1"])
+        self.assertEqual(self.ids("  "), [])
+
+    def test_long_ranges_left_to_caller(self) -> None:
+        self.assertIsNone(self.index.search("star", 10, max_scan=2))
+        self.assertEqual(self.ids("star"), ["1", "2"])
+        # Запомненный ответ отдается без разбора диапазона
+        self.assertEqual(len(self.index.search("star", 10, max_scan=0)), 2)
+
+    def test_changes_reset_memoized_prefixes(self) -> None:
+        self.assertEqual(self.ids("sta"), ["1", "2"])
+        self.index.put(autocomplete.Entry("5", "Stargate", 9.0))
+        self.assertEqual(self.ids("sta"), ["5", "1"])
+        self.index.remove("1")
+        self.assertEqual(self.ids("sta"), ["5", "2"])
+        self.index.put(autocomplete.Entry("5", "Gate", 9.0))
+        self.assertEqual(self.ids("sta"), ["2", "3"])
+        self.assertEqual(self.ids("gate"), ["5"])
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+@override_settings(AUTOCOMPLETE_ENABLED=False)
+class AutocompleteApiTest(TestCase):
+    url = reverse_lazy("autocomplete")
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.films = Filmwork.objects.bulk_create(
+            [
+                Filmwork(title="Star Wars", rating=8.6),
+                Filmwork(title="Star Trek", rating=7.9),
+                Filmwork(title="Lone Star", rating=6.0),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        autocomplete.registry.indexes = {}
+
+    def titles(self, response) -> list[str]:
+        self.assertEqual(response.status_code, 200)
+        return [result["title"] for result in response.json()["results"]]
+
+    def test_database_fallback(self) -> None:
+        # В БД, как и в памяти, ищется начало любого слова
+        response = self.client.get(self.url, {"query": "star"})
+        self.assertEqual(self.titles(response), ["Star Wars", "Star Trek", "Lone Star"])
+        response = self.client.get(self.url, {"query": "lone s"})
+        self.assertEqual(self.titles(response), ["Lone Star"])
+        response = self.client.get(self.url, {"query": "star l"})
+        self.assertEqual(self.titles(response), [])
+
+    @override_settings(AUTOCOMPLETE_ENABLED=True, AUTOCOMPLETE_MAX_AGE=3600)
+    def test_memory_index_and_signals(self) -> None:
+        autocomplete.registry.indexes = {
+            kind: autocomplete._load(kind) for kind in autocomplete.KINDS
+        }
+        autocomplete.registry.built_at = time.monotonic()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"query": "star"})
+        self.assertEqual(self.titles(response), ["Star Wars", "Star Trek", "Lone Star"])
+        with override_settings(AUTOCOMPLETE_MAX_LOOP_SCAN=0):
+            response = self.client.get(self.url, {"query": "lone s"})
+        self.assertEqual(self.titles(response), ["Lone Star"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Filmwork.objects.create(title="Stardust", rating=9.0)
+            self.films[0].delete()
+        response = self.client.get(self.url, {"query": "star", "page_size": 2})
+        self.assertEqual(self.titles(response), ["Stardust", "Star Trek"])
+
+    def test_rebuild_after_fork(self) -> None:
+        registry = autocomplete.Registry()
+        registry.building, registry.built_at = True, time.monotonic()
+        registry.after_fork()
+        self.assertFalse(registry.building)
+        self.assertEqual(registry.built_at, 0.0)
+
+    def test_invalid_kind(self) -> None:
+        response = self.client.get(self.url, {"query": "star", "kind": "genre"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from movies import cache
+from movies.admin import FilmworkAdmin
+from movies.api.v1.views import JsonApiMixin
+from movies.constants import PersonRoleChoice
+from movies.models import (
+    Filmwork,
+    FilmworkType,
+    Genre,
+    GenreFilmwork,
+    Person,
+    PersonFimwork,
+)
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+class FilmworkBulkActionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        cls.films = Filmwork.objects.bulk_create(
+            [Filmwork(title=f"Film {number}", rating=5.0) for number in range(3)]
+        )
+        cls.genres = Genre.objects.bulk_create(
+            [Genre(name="Drama"), Genre(name="Comedy")]
+        )
+        cls.person = Person.objects.create(full_name="Actor")
+        cls.type = FilmworkType.objects.create(slug="movie", name="Movie")
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def post_action(self, action: str, selected: list, query: str = "", **data):
+        return self.client.post(
+            reverse("admin:movies_filmwork_changelist") + query,
+            {
+                "action": action,
+                helpers.ACTION_CHECKBOX_NAME: [str(obj.pk) for obj in selected],
+                "apply": "1",
+                **data,
+            },
+        )
+
+    def test_assign_genres_and_attach_person(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_action(
+                "assign_genres",
+                self.films[:2],
+                genres=[str(genre.pk) for genre in self.genres],
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(GenreFilmwork.objects.count(), 4)
+        # Повтор не дублирует связи
+        self.post_action(
+            "assign_genres", self.films[:2], genres=[str(self.genres[0].pk)]
+        )
+        self.assertEqual(GenreFilmwork.objects.count(), 4)
+
+        self.post_action(
+            "attach_person",
+            self.films,
+            person=str(self.person.pk),
+            role=PersonRoleChoice.ACTOR,
+            select_across="1",
+        )
+        self.assertEqual(
+            PersonFimwork.objects.filter(role=PersonRoleChoice.ACTOR).count(), 3
+        )
+        self.person.refresh_from_db()
+        self.assertEqual(self.person.actor_films_count, 3)
+
+    def test_update_actions(self) -> None:
+        self.post_action("change_type", self.films[:2], type="movie")
+        self.post_action("adjust_rating", self.films[1:], delta="-7")
+        self.assertEqual(
+            list(Filmwork.objects.order_by("title").values_list("type", "rating")),
+            [("movie", 5.0), ("movie", 0.0), (None, 0.0)],
+        )
+
+    def test_adjust_rating_keeps_missing_and_bounds(self) -> None:
+        Filmwork.objects.filter(pk=self.films[0].pk).update(rating=None)
+        self.post_action("adjust_rating", self.films, delta="7")
+        self.assertEqual(
+            list(Filmwork.objects.order_by("title").values_list("rating", flat=True)),
+            [None, 10.0, 10.0],
+        )
+
+    def test_filtered_selection_flushes_film_cache(self) -> None:
+        show = FilmworkType.objects.create(slug="show", name="Show")
+        Filmwork.objects.filter(pk=self.films[0].pk).update(type=self.type)
+        url = reverse("movies-detail", args=[self.films[0].pk])
+        self.assertEqual(self.client.get(url).json()["type"], "movie")
+        with self.captureOnCommitCallbacks(execute=True):
+            # После изменения фильм выпадает из фильтра списка
+            self.post_action(
+                "change_type", self.films[:1], query="?type=movie", type=show.slug
+            )
+        self.assertEqual(self.client.get(url).json()["type"], "show")
+
+    def test_large_selection_flushes_film_cache(self) -> None:
+        version = cache.get_version(cache.FILM_DETAIL)
+        with mock.patch.object(FilmworkAdmin, "invalidate_ids_limit", 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post_action("change_type", self.films, type="movie")
+        self.assertNotEqual(cache.get_version(cache.FILM_DETAIL), version)
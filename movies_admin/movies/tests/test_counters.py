@@ -0,0 +1,91 @@
+from django.db import connection
+from django.test import TestCase
+
+from movies import counters
+from movies.constants import PersonRoleChoice
+from movies.models import Filmwork, Genre, GenreFilmwork, Person, PersonFimwork
+
+
+class CountersTest(TestCase):
+    """Счетчики на персонах, жанрах и фильмах ведутся триггерами таблиц связей."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.film = Filmwork.objects.create(title="Film")
+        cls.other_film = Filmwork.objects.create(title="Other film")
+        cls.person = Person.objects.create(full_name="Person")
+        cls.genre = Genre.objects.create(name="Genre")
+
+    def counts(self, obj, *fields: str) -> tuple:
+        return tuple(type(obj).objects.values_list(*fields).get(pk=obj.pk))
+
+    def test_person_links(self) -> None:
+        PersonFimwork.objects.bulk_create(
+            [
+                PersonFimwork(
+                    film_work=self.film, person=self.person, role=PersonRoleChoice.ACTOR
+                ),
+                PersonFimwork(
+                    film_work=self.film,
+                    person=self.person,
+                    role=PersonRoleChoice.WRITER,
+                ),
+                PersonFimwork(
+                    film_work=self.other_film,
+                    person=self.person,
+                    role=PersonRoleChoice.ACTOR,
+                ),
+            ]
+        )
+        fields = ("actor_films_count", "director_films_count", "writer_films_count")
+        self.assertEqual(self.counts(self.person, *fields), (2, 0, 1))
+        self.assertEqual(self.counts(self.film, "persons_count"), (2,))
+
+        PersonFimwork.objects.filter(role=PersonRoleChoice.WRITER).update(
+            role=PersonRoleChoice.DIRECTOR
+        )
+        self.assertEqual(self.counts(self.person, *fields), (2, 1, 0))
+
+        PersonFimwork.objects.filter(film_work=self.film).delete()
+        self.assertEqual(self.counts(self.person, *fields), (1, 0, 0))
+        self.assertEqual(self.counts(self.film, "persons_count"), (0,))
+
+    def test_genre_links(self) -> None:
+        self.film.genres.add(self.genre)
+        self.other_film.genres.add(self.genre)
+        self.assertEqual(self.counts(self.genre, "films_count"), (2,))
+        GenreFilmwork.objects.filter(film_work=self.film).delete()
+        self.assertEqual(self.counts(self.genre, "films_count"), (1,))
+
+    def test_save_keeps_counters(self) -> None:
+        person = Person.objects.get(pk=self.person.pk)
+        PersonFimwork.objects.create(
+            film_work=self.film, person=self.person, role=PersonRoleChoice.ACTOR
+        )
+        person.full_name = "Renamed"
+        person.save()
+        self.assertEqual(
+            self.counts(self.person, "full_name", "actor_films_count"), ("Renamed", 1)
+        )
+
+    def test_save_after_concurrent_delete(self) -> None:
+        PersonFimwork.objects.create(
+            film_work=self.film, person=self.person, role=PersonRoleChoice.ACTOR
+        )
+        person = Person.objects.get(pk=self.person.pk)
+        Person.objects.filter(pk=self.person.pk).delete()
+        person.full_name = "Restored"
+        person.save()
+        self.assertEqual(
+            self.counts(self.person, "full_name", "actor_films_count"), ("Restored", 0)
+        )
+
+    def test_recount(self) -> None:
+        self.film.genres.add(self.genre)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {counters.SCHEMA}.genre SET films_count = 5 WHERE id = %s",
+                [self.genre.pk],
+            )
+        self.assertEqual(counters.recount(["genre"]), {"genre": 1})
+        self.assertEqual(self.counts(self.genre, "films_count"), (1,))
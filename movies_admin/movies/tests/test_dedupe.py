@@ -0,0 +1,108 @@
+import datetime
+
+from django.test import SimpleTestCase, TestCase
+
+from movies import dedupe
+from movies.constants import PersonRoleChoice
+from movies.models import Filmwork, Person, PersonFimwork
+
+
+class FindDuplicatesTest(SimpleTestCase):
+    def candidate(self, person_id: str, name: str, birth_date=None, films=0):
+        return dedupe.Candidate(
+            person_id,
+            name,
+            birth_date,
+            films,
+            dedupe.trigrams(dedupe.normalize_name(name)),
+        )
+
+    def test_normalize_name(self) -> None:
+        self.assertEqual(dedupe.normalize_name("Lucas,  George"), "george lucas")
+        self.assertEqual(dedupe.normalize_name("Пенелопа Крус"), "krus penelopa")
+        self.assertEqual(dedupe.normalize_name("Penélope Cruz"), "cruz penelope")
+
+    def test_pairs(self) -> None:
+        born = datetime.date(1944, 5, 14)
+        candidates = [
+            self.candidate("1", "George Lucas", born, films=10),
+            self.candidate("2", "Lucas, George", films=1),
+            self.candidate("3", "George Lukas"),
+            self.candidate("4", "George Lucas", datetime.date(1950, 1, 1)),
+            self.candidate("5", "Steven Spielberg"),
+        ]
+        pairs = {
+            (pair.keep.person_id, pair.duplicate.person_id)
+            for pair in dedupe.find_duplicates(candidates, min_score=0.6)
+        }
+        self.assertIn(("1", "2"), pairs)
+        self.assertNotIn(("1", "4"), pairs)
+        self.assertFalse(any("5" in pair for pair in pairs))
+
+    def test_resolve_chains(self) -> None:
+        self.assertEqual(
+            dedupe.resolve([("a", "b"), ("b", "c"), ("d", "a")]),
+            {"a": "d", "b": "d", "c": "d"},
+        )
+
+    def test_resolve_skips_conflicting_birth_dates(self) -> None:
+        birth_dates = {
+            "a": datetime.date(1944, 5, 14),
+            "c": datetime.date(1950, 1, 1),
+        }
+        self.assertEqual(
+            dedupe.resolve([("a", "b"), ("b", "c")], birth_dates), {"b": "a"}
+        )
+
+
+class MergeTest(TestCase):
+    def test_merge_respects_link_uniqueness(self) -> None:
+        film, other_film = Filmwork.objects.bulk_create(
+            [Filmwork(title="Film"), Filmwork(title="Other film")]
+        )
+        keep = Person.objects.create(full_name="George Lucas")
+        duplicate = Person.objects.create(
+            full_name="Lucas George", birth_date=datetime.date(1944, 5, 14)
+        )
+        PersonFimwork.objects.bulk_create(
+            [
+                PersonFimwork(film_work=film, person=keep, role=PersonRoleChoice.ACTOR),
+                PersonFimwork(
+                    film_work=film, person=duplicate, role=PersonRoleChoice.ACTOR
+                ),
+                PersonFimwork(
+                    film_work=film, person=duplicate, role=PersonRoleChoice.WRITER
+                ),
+                PersonFimwork(
+                    film_work=other_film,
+                    person=duplicate,
+                    role=PersonRoleChoice.DIRECTOR,
+                ),
+            ]
+        )
+
+        self.assertEqual(dedupe.merge([(str(keep.pk), str(duplicate.pk))]), 1)
+
+        self.assertFalse(Person.objects.filter(pk=duplicate.pk).exists())
+        self.assertEqual(
+            set(
+                PersonFimwork.objects.filter(person=keep).values_list(
+                    "film_work__title", "role"
+                )
+            ),
+            {
+                ("Film", PersonRoleChoice.ACTOR),
+                ("Film", PersonRoleChoice.WRITER),
+                ("Other film", PersonRoleChoice.DIRECTOR),
+            },
+        )
+        keep.refresh_from_db()
+        self.assertEqual(keep.birth_date, datetime.date(1944, 5, 14))
+        self.assertEqual(
+            (
+                keep.actor_films_count,
+                keep.director_films_count,
+                keep.writer_films_count,
+            ),
+            (1, 1, 1),
+        )
@@ -0,0 +1,137 @@
+import io
+from datetime import timedelta
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from movies import deletion
+from movies.constants import ImportStatusChoice, PersonRoleChoice
+from movies.models import (
+    DeleteJob,
+    DeleteJobItem,
+    Filmwork,
+    Genre,
+    GenreFilmwork,
+    Person,
+    PersonFimwork,
+    SimilarFilmwork,
+)
+
+
+@override_settings(BULK_DELETE_IN_BACKGROUND=False, BULK_DELETE_CHUNK_SIZE=2)
+class BulkDeleteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        cls.films = Filmwork.objects.bulk_create(
+            [Filmwork(title=f"Film {number}") for number in range(5)]
+        )
+        cls.genre = Genre.objects.create(name="Drama")
+        cls.person = Person.objects.create(full_name="Actor")
+        GenreFilmwork.objects.bulk_create(
+            [GenreFilmwork(film_work=film, genre=cls.genre) for film in cls.films]
+        )
+        PersonFimwork.objects.bulk_create(
+            [
+                PersonFimwork(
+                    film_work=film, person=cls.person, role=PersonRoleChoice.ACTOR
+                )
+                for film in cls.films
+            ]
+        )
+        SimilarFilmwork.objects.bulk_create(
+            [
+                SimilarFilmwork(film_work=film, similar=similar, rank=1, score=0.5)
+                for film, similar in zip(cls.films, cls.films[1:])
+            ]
+        )
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def post_action(self, model: str, selected: list, **data):
+        return self.client.post(
+            reverse(f"admin:movies_{model}_changelist"),
+            {
+                "action": "bulk_delete",
+                helpers.ACTION_CHECKBOX_NAME: [str(obj.pk) for obj in selected],
+                **data,
+            },
+        )
+
+    def test_replaces_delete_selected(self) -> None:
+        response = self.client.get(reverse("admin:movies_filmwork_changelist"))
+        self.assertContains(response, 'value="bulk_delete"')
+        self.assertNotContains(response, 'value="delete_selected"')
+
+    def test_confirmation_shows_counts(self) -> None:
+        response = self.post_action("filmwork", self.films[:3])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context["summary"],
+            [
+                ("Кинопроизведения", 3),
+                ("Участники кинопроизведений", 3),
+                ("Жанры кинопроизведений", 3),
+                # Соседи удаляемых фильмов и ссылки на них из соседей других
+                ("Похожие кинопроизведения", 3),
+            ],
+        )
+        self.assertFalse(DeleteJob.objects.exists())
+
+    def test_delete_films_in_chunks(self) -> None:
+        response = self.post_action("filmwork", self.films[:3], apply="1")
+        self.assertEqual(response.status_code, 302)
+        job = DeleteJob.objects.get()
+        self.assertEqual(job.total_rows, 3)
+
+        deletion.run_delete(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_rows), (ImportStatusChoice.DONE, 3))
+        self.assertFalse(DeleteJobItem.objects.exists())
+        self.assertEqual(
+            list(Filmwork.objects.order_by("title").values_list("title", flat=True)),
+            ["Film 3", "Film 4"],
+        )
+        self.assertEqual(PersonFimwork.objects.count(), 2)
+        self.assertEqual(SimilarFilmwork.objects.count(), 1)
+        self.person.refresh_from_db()
+        self.genre.refresh_from_db()
+        self.assertEqual(self.person.actor_films_count, 2)
+        self.assertEqual(self.genre.films_count, 2)
+
+    def test_delete_person_keeps_films(self) -> None:
+        # Все записи списка: отмечена одна, выбраны все
+        self.post_action("person", [self.person], apply="1", select_across="1")
+        deletion.run_delete(DeleteJob.objects.get().pk)
+
+        self.assertFalse(Person.objects.exists())
+        self.assertEqual(Filmwork.objects.count(), 5)
+        self.assertEqual(
+            set(Filmwork.objects.values_list("persons_count", flat=True)), {0}
+        )
+
+    def test_stale_job_is_resumed(self) -> None:
+        self.post_action("filmwork", self.films[:3], apply="1")
+        job = DeleteJob.objects.get()
+        DeleteJob.objects.filter(pk=job.pk).update(status=ImportStatusChoice.RUNNING)
+        # Задачу уже выполняет другой процесс
+        self.assertFalse(deletion.run_delete(job.pk))
+        out = io.StringIO()
+        call_command("run_bulk_delete", stdout=out)
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(Filmwork.objects.count(), 5)
+
+        # Брошенная задача забирается командой без аргументов
+        DeleteJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        call_command("run_bulk_delete", stdout=out)
+        self.assertIn("3 of 3 rows", out.getvalue())
+        self.assertEqual(Filmwork.objects.count(), 2)
+        self.assertFalse(deletion.run_delete(job.pk))
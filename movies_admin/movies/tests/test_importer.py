@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from movies import cache
+from movies.api.v1.views import JsonApiMixin
+from movies.constants import (
+    ImportEntityChoice,
+    ImportFormatChoice,
+    ImportStatusChoice,
+)
+from movies.importer import run_import
+from movies.models import Filmwork, FilmworkType, ImportJob
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+class ImporterTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.settings.disable()
+        shutil.rmtree(cls.media_root)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        FilmworkType.objects.create(slug="movie", name="Movie")
+
+    def create_job(self, *lines: str) -> ImportJob:
+        job = ImportJob(
+            entity=ImportEntityChoice.FILM_WORK, format=ImportFormatChoice.NDJSON
+        )
+        job.file.save("films.ndjson", ContentFile("\n".join(lines)), save=False)
+        job.save()
+        return job
+
+    def test_invalid_lines_are_reported(self) -> None:
+        valid = uuid.uuid4()
+        job = self.create_job(
+            f'{{"id": "{valid}", "title": "Harbour", "type": "movie"}}',
+            "",
+            '{"id": ',
+            f'{{"id": "{uuid.uuid4()}", "title": "{"x" * 300}"}}',
+            f'{{"id": "{uuid.uuid4()}", "title": "Storm", "type": "serial"}}',
+        )
+        self.assertTrue(run_import(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportStatusChoice.DONE)
+        self.assertEqual((job.processed_rows, job.invalid_rows), (4, 3))
+        errors = job.errors.splitlines()
+        self.assertTrue(errors[0].startswith("line 3: invalid JSON"))
+        self.assertEqual(
+            errors[1:],
+            [
+                "line 4: 'title' is longer than 255 characters",
+                "line 5: unknown type 'serial'",
+            ],
+        )
+        self.assertEqual(
+            list(Filmwork.objects.values_list("id", "type")), [(valid, "movie")]
+        )
+
+    def test_job_is_claimed_once(self) -> None:
+        job = self.create_job(f'{{"id": "{uuid.uuid4()}", "title": "Harbour"}}')
+        ImportJob.objects.filter(pk=job.pk).update(status=ImportStatusChoice.RUNNING)
+        # Задачу уже выполняет другой процесс
+        self.assertFalse(run_import(job.pk))
+        self.assertFalse(Filmwork.objects.exists())
+
+        # Брошенная задача продолжается после обработанных строк
+        ImportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertTrue(run_import(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportStatusChoice.DONE)
+        self.assertEqual(Filmwork.objects.count(), 1)
+        self.assertFalse(run_import(job.pk))
+
+    def test_import_flushes_cache(self) -> None:
+        film = Filmwork.objects.create(title="Harbour")
+        detail_url = reverse("movies-detail", args=[film.pk])
+        self.client.get(detail_url)
+        self.client.get(reverse("movies-list"))
+        list_version = cache.get_version(cache.FILM_LIST)
+        self.assertIsNotNone(cache.load(cache.film_key(film.pk)))
+
+        job = self.create_job(f'{{"id": "{film.pk}", "title": "Harbour II"}}')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(run_import(job.pk))
+
+        self.assertIsNone(cache.load(cache.film_key(film.pk)))
+        self.assertNotEqual(cache.get_version(cache.FILM_LIST), list_version)
+        self.assertEqual(self.client.get(detail_url).json()["title"], "Harbour II")
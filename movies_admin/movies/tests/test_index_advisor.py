@@ -0,0 +1,104 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from movies import index_advisor
+from movies.models import Person
+
+
+class IndexAdvisorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Person.objects.bulk_create(
+            Person(full_name=f"Person {number}") for number in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {index_advisor.SCHEMA}.person")
+
+    def test_redundant_indexes(self) -> None:
+        schema = index_advisor.SCHEMA
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX person_name_a ON {schema}.person (full_name);"
+                f"CREATE INDEX person_name_b ON {schema}.person (full_name);"
+                f"CREATE INDEX person_name_birth ON {schema}.person "
+                f"(full_name, birth_date);"
+            )
+            redundant = {
+                item.index.name: (item.covered_by.name, item.exact)
+                for item in index_advisor.redundant_indexes(
+                    index_advisor.index_definitions(cursor)
+                )
+            }
+        self.assertEqual(
+            redundant[f"{schema}.person_name_b"], (f"{schema}.person_name_a", True)
+        )
+        self.assertEqual(redundant[f"{schema}.person_name_a"][1:], (False,))
+        self.assertNotIn(f"{schema}.person_name_birth", redundant)
+
+    def test_candidate_validated_with_explain(self) -> None:
+        sql = (
+            f"SELECT * FROM {index_advisor.SCHEMA}.person "
+            f"WHERE birth_date = '1980-01-01'"
+        )
+        with connection.cursor() as cursor:
+            (unchecked,) = index_advisor.candidates(
+                cursor, [sql], min_rows=1000, validate_plans=True
+            )
+            (candidate,) = index_advisor.candidates(
+                cursor, [sql], min_rows=1000, validate_plans=True, real_indexes=True
+            )
+        self.assertEqual(
+            candidate.statement,
+            f"CREATE INDEX CONCURRENTLY ON {index_advisor.SCHEMA}.person (birth_date);",
+        )
+        if "validated with a real index, rolled back" not in candidate.notes:
+            self.skipTest("hypopg is installed")
+        # Без hypopg настоящий индекс строится только по явному запросу
+        self.assertIsNone(unchecked.cost_after)
+        self.assertIn("hypopg is not installed", unchecked.notes[0])
+        self.assertEqual(candidate.columns, ("birth_date",))
+        self.assertTrue(candidate.uses_index)
+        self.assertLess(candidate.cost_after, candidate.cost_before)
+        # Проверочный индекс откатывается
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_indexes WHERE indexdef LIKE %s",
+                ["%(birth_date)%"],
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_partitioned_table_statement(self) -> None:
+        table = f"{index_advisor.SCHEMA}.genre_film_work"
+        with connection.cursor() as cursor:
+            candidate = index_advisor.Candidate(
+                table,
+                ("created_at",),
+                "",
+                partitions=index_advisor.partitions(cursor, table),
+            )
+            statements = candidate.statement.splitlines()
+            self.assertEqual(
+                statements[0],
+                f"CREATE INDEX genre_film_work_created_at_idx ON ONLY {table} "
+                f"(created_at);",
+            )
+            self.assertIn("CREATE INDEX CONCURRENTLY", statements[1])
+            # CONCURRENTLY нельзя в транзакции теста, порядок и ATTACH проверяются
+            # обычным построением: после всех секций индекс родителя валиден
+            for statement in statements:
+                cursor.execute(statement.replace(" CONCURRENTLY", ""))
+            cursor.execute(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = %s::regclass",
+                [f"{index_advisor.SCHEMA}.genre_film_work_created_at_idx"],
+            )
+            self.assertTrue(cursor.fetchone()[0])
+
+    def test_command(self) -> None:
+        out = io.StringIO()
+        call_command("index_advisor", "--sql", "SELECT 1", stdout=out)
+        output = out.getvalue()
+        self.assertIn("Candidate indexes", output)
+        self.assertIn("SELECT 1\n    no candidate", output)
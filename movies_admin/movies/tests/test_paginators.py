@@ -0,0 +1,66 @@
+import warnings
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from movies.models import Filmwork, Person
+from movies.paginators import EstimatedCountPaginator
+
+
+@mock.patch.object(EstimatedCountPaginator, "estimate", return_value=10**6)
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Filmwork.objects.bulk_create(
+            [Filmwork(title=f"Film {number:02}") for number in range(25)]
+        )
+
+    def test_overshooting_estimate_is_clamped(self, estimate) -> None:
+        paginator = EstimatedCountPaginator(
+            Filmwork.objects.order_by("title"), per_page=10
+        )
+        self.assertEqual(paginator.num_pages, 10**5)
+        self.assertEqual(len(paginator.page(2)), 10)
+
+        page = paginator.page(50)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page), 5)
+        self.assertEqual((paginator.count, paginator.num_pages), (25, 3))
+        self.assertFalse(page.has_next())
+
+    def test_changelist_page_past_the_end(self, estimate) -> None:
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        )
+        response = self.client.get(
+            reverse("admin:movies_filmwork_changelist"), {"p": 1000}
+        )
+        self.assertEqual(response.status_code, 200)
+        changelist = response.context["cl"]
+        self.assertEqual(changelist.page_num, 1)
+        self.assertEqual(len(changelist.result_list), 25)
+
+    def test_autocomplete_pages_are_ordered(self, estimate) -> None:
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        )
+        Person.objects.bulk_create(
+            [Person(full_name=f"John Smith {number}") for number in range(25)]
+        )
+        params = {
+            "term": "John",
+            "app_label": "movies",
+            "model_name": "personfimwork",
+            "field_name": "person",
+        }
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            first = self.client.get(reverse("admin:autocomplete"), params).json()
+            second = self.client.get(
+                reverse("admin:autocomplete"), {**params, "page": 2}
+            ).json()
+        ids = [item["id"] for page in (first, second) for item in page["results"]]
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(ids, sorted(ids))
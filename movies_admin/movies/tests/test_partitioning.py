@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from movies import partitioning
+from movies.models import Filmwork, FilmworkSearch, Genre, GenreFilmwork
+
+
+SCHEMA = settings.CONTENT_SCHEMA
+
+
+class ConvertLinkTableTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        film = Filmwork.objects.create(title="Harbour")
+        GenreFilmwork.objects.create(
+            film_work=film, genre=Genre.objects.create(name="Drama")
+        )
+
+    def dependent_matviews(self) -> dict[str, list[str]]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT v.relname, array_agg(DISTINCT i.relname ORDER BY i.relname)
+                FROM pg_depend d
+                JOIN pg_rewrite r ON r.oid = d.objid
+                JOIN pg_class v ON v.oid = r.ev_class
+                JOIN pg_index x ON x.indrelid = v.oid
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE d.refobjid = %s::regclass AND v.relkind = 'm'
+                GROUP BY v.relname
+                """,
+                (f"{SCHEMA}.genre_film_work",),
+            )
+            return dict(cursor.fetchall())
+
+    def test_matviews_follow_table_with_schema_in_search_path(self) -> None:
+        matviews = self.dependent_matviews()
+        self.assertIn("film_work_search", matviews)
+        with connection.cursor() as cursor:
+            # pg_get_viewdef не квалифицирует схемой имена из search_path
+            cursor.execute(f"SET search_path = {SCHEMA}, public;")
+            try:
+                converted = partitioning.convert(
+                    partitioning.LINK_TABLES["genre_film_work"],
+                    settings.LINK_TABLE_PARTITIONS + 1,
+                )
+                cursor.execute("SHOW search_path;")
+                self.assertEqual(cursor.fetchone()[0], f"{SCHEMA}, public")
+            finally:
+                cursor.execute("RESET search_path;")
+        self.assertTrue(converted)
+        self.assertEqual(self.dependent_matviews(), matviews)
+        FilmworkSearch.refresh(concurrently=False)
+        self.assertEqual(FilmworkSearch.objects.get().genres, ["Drama"])
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from config.middleware import QueryProfilingMiddleware
+
+
+@override_settings(SQL_PROFILING_SAMPLE_RATE=1)
+class ServerTimingTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.middleware = QueryProfilingMiddleware(lambda request: HttpResponse())
+
+    def get(self, user):
+        request = RequestFactory().get("/api/v1/movies/")
+        request.user = user
+        with self.assertLogs("sql_profiling"):
+            return self.middleware(request)
+
+    def test_hidden_from_visitors(self) -> None:
+        self.assertNotIn("Server-Timing", self.get(AnonymousUser()))
+        self.assertNotIn("Server-Timing", self.get(User(is_staff=False)))
+
+    def test_shown_to_staff(self) -> None:
+        self.assertIn("db;dur=", self.get(User(is_staff=True))["Server-Timing"])
+
+    @override_settings(DEBUG=True)
+    def test_shown_in_debug(self) -> None:
+        self.assertIn("Server-Timing", self.get(AnonymousUser()))
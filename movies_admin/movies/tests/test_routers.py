@@ -0,0 +1,200 @@
+from contextvars import copy_context
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from config import routers
+from config.middleware import ReplicaRoutingMiddleware
+from movies import cache
+from movies.export import streaming_export
+from movies.models import Filmwork
+
+
+@override_settings(
+    REPLICA_DATABASES=["replica_1", "replica_2"],
+    REPLICA_MAX_LAG=5,
+    REPLICA_LAG_CHECK_INTERVAL=60,
+)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = routers.PrimaryReplicaRouter()
+        scope = routers.routing_scope()
+        scope.__enter__()
+        self.addCleanup(scope.__exit__, None, None, None)
+
+    def lags(self, **lags) -> mock._patch:
+        return mock.patch.object(
+            self.router.monitor, "measure", side_effect=lambda alias: lags[alias]
+        )
+
+    def test_reads_go_to_fresh_replicas(self) -> None:
+        with self.lags(replica_1=0.0, replica_2=30.0):
+            self.assertEqual(self.router.db_for_read(Filmwork), "replica_1")
+
+    def test_primary_when_replicas_lag_or_fail(self) -> None:
+        with self.lags(replica_1=None, replica_2=30.0):
+            self.assertEqual(self.router.db_for_read(Filmwork), "default")
+
+    def test_lag_is_cached(self) -> None:
+        with self.lags(replica_1=0.0, replica_2=0.0) as measure:
+            for _ in range(5):
+                self.router.db_for_read(Filmwork)
+        self.assertEqual(measure.call_count, 2)
+
+    def test_read_after_write_uses_primary(self) -> None:
+        with self.lags(replica_1=0.0, replica_2=0.0):
+            self.assertEqual(self.router.db_for_write(Filmwork), "default")
+            self.assertEqual(self.router.db_for_read(Filmwork), "default")
+
+    def test_write_pin_ends_with_scope(self) -> None:
+        with self.lags(replica_1=0.0, replica_2=30.0):
+            with routers.routing_scope():
+                self.router.db_for_write(Filmwork)
+                self.assertEqual(self.router.db_for_read(Filmwork), "default")
+            self.assertEqual(self.router.db_for_read(Filmwork), "replica_1")
+
+    def test_reads_outside_scope_use_primary(self) -> None:
+        with self.lags(replica_1=0.0, replica_2=30.0):
+            self.assertEqual(
+                copy_context().run(self.router.db_for_read, Filmwork), "replica_1"
+            )
+            context = copy_context()
+            context.run(routers._scope.set, None)
+            self.assertEqual(context.run(self.router.db_for_read, Filmwork), "default")
+
+    def test_other_apps_are_not_routed(self) -> None:
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_migrations_only_on_primary(self) -> None:
+        self.assertTrue(self.router.allow_migrate("default", "movies"))
+        self.assertFalse(self.router.allow_migrate("replica_1", "movies"))
+
+
+@override_settings(REPLICA_RECEIVER_TIMEOUT=90)
+class ReplicaLagMonitorTest(SimpleTestCase):
+    def measure(self, row: tuple) -> float | None:
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = row
+        with mock.patch.object(routers, "connections") as connections:
+            connections.__getitem__.return_value.cursor.return_value = cursor
+            return routers.ReplicaLagMonitor().measure("replica_1")
+
+    def test_streaming_replica(self) -> None:
+        self.assertEqual(self.measure((True, True, "streaming", 2.0, 0)), 0.0)
+        self.assertEqual(self.measure((True, True, "streaming", 2.0, 7.5)), 7.5)
+
+    def test_unusable_replicas(self) -> None:
+        for row in (
+            # Алиас указывает на primary
+            (False, False, None, None, 0),
+            # WAL receiver остановлен: принятый LSN равен примененному навсегда
+            (True, True, None, None, 0),
+            (True, True, "waiting", 1.0, 0),
+            # Receiver давно ничего не получал от primary
+            (True, True, "streaming", 120.0, 0),
+        ):
+            with self.subTest(row=row), self.assertLogs(routers.logger, "WARNING"):
+                self.assertIsNone(self.measure(row))
+
+
+@override_settings(REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingMiddlewareTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        self.pinned = []
+
+        def view(request):
+            self.pinned.append(routers.use_primary())
+            if request.path == "/write/":
+                routers.pin_primary()
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(view)
+
+    def test_write_pins_and_sets_sticky_cookie(self) -> None:
+        response = self.middleware(self.factory.post("/admin/"))
+        self.assertEqual(self.pinned, [True])
+        self.assertEqual(response.cookies["use_primary"]["max-age"], 10)
+
+    def test_write_in_safe_request_sets_sticky_cookie(self) -> None:
+        response = self.middleware(self.factory.get("/write/"))
+        self.assertEqual(self.pinned, [False])
+        self.assertIn("use_primary", response.cookies)
+
+    def test_sticky_cookie_pins_reads(self) -> None:
+        self.factory.cookies["use_primary"] = "1"
+        self.middleware(self.factory.get("/admin/"))
+        self.assertEqual(self.pinned, [True])
+
+    def test_plain_read_is_not_pinned(self) -> None:
+        response = self.middleware(self.factory.get("/admin/"))
+        self.assertEqual(self.pinned, [False])
+        self.assertNotIn("use_primary", response.cookies)
+
+    @override_settings(REPLICA_DATABASES=["replica_1"], REPLICA_MAX_LAG=5)
+    def test_streamed_export_stays_in_scope(self) -> None:
+        router = routers.PrimaryReplicaRouter()
+
+        def rows():
+            yield {"alias": router.db_for_read(Filmwork)}
+
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: streaming_export(rows(), ("alias",), "csv", "films")
+        )
+        with mock.patch.object(router.monitor, "measure", return_value=0.0):
+            for cookies, alias in (
+                ({}, "replica_1"),
+                ({"use_primary": "1"}, "default"),
+            ):
+                with self.subTest(cookies=cookies):
+                    self.factory.cookies.clear()
+                    for name, value in cookies.items():
+                        self.factory.cookies[name] = value
+                    response = middleware(self.factory.get("/admin/export/csv/"))
+                    # Тело читается после выхода из middleware, как у сервера
+                    content = b"".join(response.streaming_content).decode()
+                    self.assertEqual(content.split(), ["alias", alias])
+                    self.assertIsNone(routers._scope.get())
+
+
+class ReplicaCacheInvalidationTest(TestCase):
+    @override_settings(
+        REPLICA_DATABASES=["replica_1"], REPLICA_MAX_LAG=5, REPLICA_LAG_CHECK_INTERVAL=2
+    )
+    def test_cache_invalidated_again_after_replica_lag(self) -> None:
+        film = Filmwork.objects.create(title="Harbour")
+        version = cache.get_version(cache.FILM_LIST)
+        with (
+            mock.patch.object(cache, "_repeat", cache._RepeatInvalidation()) as repeat,
+            mock.patch("movies.cache.threading.Timer") as timer,
+            mock.patch("movies.cache.time.monotonic", return_value=100.0) as clock,
+        ):
+            # Коммиты пачек ждут одного таймера, а не поток на коммит
+            for _ in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    cache.invalidate_on_commit(cache.FILM_LIST)
+            clock.return_value = 101.0
+            with self.captureOnCommitCallbacks(execute=True):
+                cache.invalidate_films_on_commit([film.pk])
+            self.assertNotEqual(cache.get_version(cache.FILM_LIST), version)
+            self.assertEqual(timer.call_count, 1)
+            self.assertEqual(timer.call_args.args, (7, repeat.run))
+
+            # Ответ, собранный с отстающей реплики, сбрасывается повторным вызовом
+            cache.store(cache.film_key(film.pk), {"title": "stale"})
+            version = cache.get_version(cache.FILM_LIST)
+            clock.return_value = 107.0
+            repeat.run()
+            self.assertNotEqual(cache.get_version(cache.FILM_LIST), version)
+            self.assertIsNone(cache.load(cache.film_key(film.pk)))
+            # Срок последнего коммита еще не наступил
+            self.assertEqual(len(repeat.pending), 1)
+            self.assertEqual(timer.call_args.args, (1, repeat.run))
+
+            clock.return_value = 108.0
+            repeat.run()
+            self.assertEqual(repeat.pending, [])
+            self.assertIsNone(repeat.timer)
+            self.assertEqual(timer.call_count, 2)
@@ -0,0 +1,130 @@
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from scipy import sparse
+
+from movies import similarity
+from movies.api.v1.views import JsonApiMixin
+from movies.constants import PersonRoleChoice
+from movies.models import (
+    Filmwork,
+    Genre,
+    GenreFilmwork,
+    Person,
+    PersonFimwork,
+    SimilarFilmwork,
+)
+
+
+class TopNeighboursTest(SimpleTestCase):
+    def test_batches_exclude_self_and_keep_top_k(self) -> None:
+        matrix = sparse.csr_matrix(
+            np.array(
+                [[1, 0, 0], [0.8, 0.6, 0], [0, 1, 0], [0, 0, 1], [0.6, 0.8, 0]],
+                dtype=np.float32,
+            )
+        )
+        neighbours = {}
+        for start, rows, cols, scores, ranks in similarity.top_neighbours(
+            matrix, top_k=2, batch_size=2
+        ):
+            for row, col, rank in zip(rows, cols, ranks):
+                neighbours.setdefault(start + row, {})[rank] = col
+        self.assertEqual(neighbours[0], {0: 1, 1: 4})
+        self.assertEqual(neighbours[1], {0: 4, 1: 0})
+        self.assertEqual(neighbours[2], {0: 4, 1: 1})
+        # Без общих признаков соседей нет
+        self.assertNotIn(3, neighbours)
+
+
+# Тестовые данные видны только соединению основного потока
+@mock.patch.object(JsonApiMixin, "thread_sensitive", True)
+class SimilarFilmsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "pwd")
+        drama, comedy = Genre.objects.bulk_create(
+            [Genre(name="Drama"), Genre(name="Comedy")]
+        )
+        director, actor = Person.objects.bulk_create(
+            [Person(full_name="Director"), Person(full_name="Actor")]
+        )
+        cls.films = Filmwork.objects.bulk_create(
+            [
+                Filmwork(title="Harbour", description="Lighthouse keeper storm"),
+                Filmwork(title="Harbour II", description="Lighthouse keeper returns"),
+                Filmwork(title="Quiet town", description="Family dinner"),
+                Filmwork(title="Laughs", description="Family dinner party"),
+                Filmwork(title="Alone", description="Nothing shared"),
+            ]
+        )
+        harbour, sequel, town, laughs, _alone = cls.films
+        GenreFilmwork.objects.bulk_create(
+            [
+                GenreFilmwork(film_work=harbour, genre=drama),
+                GenreFilmwork(film_work=sequel, genre=drama),
+                GenreFilmwork(film_work=town, genre=drama),
+                GenreFilmwork(film_work=laughs, genre=comedy),
+                GenreFilmwork(film_work=town, genre=comedy),
+            ]
+        )
+        PersonFimwork.objects.bulk_create(
+            [
+                PersonFimwork(
+                    film_work=film, person=director, role=PersonRoleChoice.DIRECTOR
+                )
+                for film in (harbour, sequel)
+            ]
+            + [
+                PersonFimwork(film_work=film, person=actor, role=PersonRoleChoice.ACTOR)
+                for film in (sequel, laughs)
+            ]
+        )
+
+    def titles(self, film: Filmwork) -> list[str]:
+        return [link.similar.title for link in similarity.similar_films(film.pk)]
+
+    def test_compute(self) -> None:
+        harbour, sequel, town, laughs, alone = self.films
+        similarity.compute(top_k=2, batch_size=2)
+        self.assertEqual(self.titles(harbour), ["Harbour II", "Quiet town"])
+        # С обоими «Harbour» общий только жанр: близость равна
+        self.assertEqual(self.titles(town)[0], "Laughs")
+        self.assertIn(self.titles(town)[1], ("Harbour", "Harbour II"))
+        self.assertEqual(self.titles(alone), [])
+
+        # Пересчет заменяет соседей, удаление фильма удаляет его связи
+        sequel.delete()
+        similarity.compute(top_k=2, batch_size=2)
+        self.assertEqual(self.titles(harbour), ["Quiet town"])
+        self.assertFalse(SimilarFilmwork.objects.filter(similar=sequel.pk).exists())
+
+    def test_api_and_admin(self) -> None:
+        harbour, _sequel, _town, _laughs, alone = self.films
+        similarity.compute()
+
+        response = self.client.get(reverse("movies-similar", args=[harbour.pk]))
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["title"], "Harbour II")
+        self.assertGreater(results[0]["score"], results[-1]["score"])
+
+        response = self.client.get(reverse("movies-similar", args=[alone.pk]))
+        self.assertEqual(response.json(), {"results": []})
+        harbour_id = harbour.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            harbour.delete()
+        response = self.client.get(reverse("movies-similar", args=[harbour_id]))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("admin:movies_filmwork_change", args=[self.films[1].pk])
+        )
+        self.assertContains(response, 'id="similar-films"')
+        self.assertContains(
+            response, reverse("admin:movies_filmwork_change", args=[self.films[3].pk])
+        )
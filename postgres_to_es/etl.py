@@ -0,0 +1,179 @@
+import contextlib
+import logging
+import time
+import uuid
+from typing import Iterable
+
+import psycopg2
+from psycopg2.extensions import connection as _connection
+from psycopg2.extras import register_uuid
+
+from settings import (
+    BATCH_SIZE,
+    CONTENT_SCHEMA,
+    INDEX_NAME,
+    POLL_INTERVAL,
+    POSTGRES_DB,
+    POSTGRES_HOST,
+    POSTGRES_PASSWORD,
+    POSTGRES_PORT,
+    POSTGRES_USER,
+    SINK_FILE,
+)
+from schemas import ChangeEvent, FilmDocument
+from sinks import BulkFileSink, Sink
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxExtractor:
+    def __init__(self, connection: _connection) -> None:
+        self.connection = connection
+        register_uuid()
+
+    def fetch_events(self, limit: int) -> list[ChangeEvent]:
+        """Пачка необработанных событий, заблокированная до конца транзакции.
+
+        События забираются по строкам, а не по позиции в журнале: id выдается
+        при вставке, а виден после коммита, поэтому событие долгой транзакции
+        появляется с id меньше уже обработанных. SKIP LOCKED пропускает
+        события, которые обрабатывает параллельный экземпляр ETL.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT id, entity, entity_id, op
+                FROM {CONTENT_SCHEMA}.change_event
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED;
+                """,
+                (limit,),
+            )
+            return [ChangeEvent(*row) for row in cursor.fetchall()]
+
+    def resolve_film_ids(self, events: Iterable[ChangeEvent]) -> set[uuid.UUID]:
+        """Кинопроизведения, затронутые событиями, одним запросом."""
+        ids = {"film_work": set(), "genre": set(), "person": set()}
+        for event in events:
+            ids[event.entity].add(event.entity_id)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT unnest(%(films)s::uuid[])
+                UNION
+                SELECT film_work_id FROM {CONTENT_SCHEMA}.genre_film_work
+                WHERE genre_id = ANY(%(genres)s::uuid[])
+                UNION
+                SELECT film_work_id FROM {CONTENT_SCHEMA}.person_film_work
+                WHERE person_id = ANY(%(persons)s::uuid[]);
+                """,
+                {
+                    "films": list(ids["film_work"]),
+                    "genres": list(ids["genre"]),
+                    "persons": list(ids["person"]),
+                },
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def fetch_documents(self, film_ids: Iterable[uuid.UUID]) -> list[FilmDocument]:
+        """Денормализованные документы: фильм, жанры и участники по ролям."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT
+                    fw.id, fw.title, fw.description, fw.creation_date, fw.rating,
+                    fw.type,
+                    COALESCE(g.genres, '{{}}'),
+                    COALESCE(p.actors, '{{}}'),
+                    COALESCE(p.directors, '{{}}'),
+                    COALESCE(p.writers, '{{}}')
+                FROM {CONTENT_SCHEMA}.film_work fw
+                LEFT JOIN LATERAL (
+                    SELECT array_agg(DISTINCT gn.name) AS genres
+                    FROM {CONTENT_SCHEMA}.genre_film_work gfw
+                    JOIN {CONTENT_SCHEMA}.genre gn ON gn.id = gfw.genre_id
+                    WHERE gfw.film_work_id = fw.id
+                ) g ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT
+                        array_agg(DISTINCT pn.full_name)
+                            FILTER (WHERE pfw.role = 'actor') AS actors,
+                        array_agg(DISTINCT pn.full_name)
+                            FILTER (WHERE pfw.role = 'director') AS directors,
+                        array_agg(DISTINCT pn.full_name)
+                            FILTER (WHERE pfw.role = 'writer') AS writers
+                    FROM {CONTENT_SCHEMA}.person_film_work pfw
+                    JOIN {CONTENT_SCHEMA}.person pn ON pn.id = pfw.person_id
+                    WHERE pfw.film_work_id = fw.id
+                ) p ON TRUE
+                WHERE fw.id = ANY(%s::uuid[]);
+                """,
+                (list(film_ids),),
+            )
+            return [FilmDocument(*row) for row in cursor.fetchall()]
+
+    def acknowledge(self, events: Iterable[ChangeEvent]) -> None:
+        """Удаляет обработанные события по id."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {CONTENT_SCHEMA}.change_event WHERE id = ANY(%s);",
+                ([event.id for event in events],),
+            )
+
+
+class IncrementalIndexer:
+    def __init__(self, extractor: OutboxExtractor, sink: Sink) -> None:
+        self.extractor = extractor
+        self.sink = sink
+
+    def process_batch(self, batch_size: int) -> int:
+        """Переносит в sink одну пачку событий, возвращает их количество."""
+        try:
+            events = self.extractor.fetch_events(batch_size)
+            if not events:
+                self.extractor.connection.commit()
+                return 0
+
+            film_ids = self.extractor.resolve_film_ids(events)
+            documents = self.extractor.fetch_documents(film_ids)
+            deleted_ids = film_ids - {document.id for document in documents}
+            self.sink.write(documents, deleted_ids)
+
+            # События удаляются только после записи в sink: доставка at-least-once
+            self.extractor.acknowledge(events)
+            self.extractor.connection.commit()
+        except BaseException:
+            # Блокировки событий снимаются, пачка достанется следующей попытке
+            self.extractor.connection.rollback()
+            raise
+        logger.info(
+            "Processed %s events: %s indexed, %s deleted",
+            len(events),
+            len(documents),
+            len(deleted_ids),
+        )
+        return len(events)
+
+    def run(self, batch_size: int, poll_interval: float) -> None:
+        while True:
+            if self.process_batch(batch_size) < batch_size:
+                time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    dsl = {
+        "dbname": POSTGRES_DB,
+        "user": POSTGRES_USER,
+        "password": POSTGRES_PASSWORD,
+        "host": POSTGRES_HOST,
+        "port": POSTGRES_PORT,
+    }
+    with contextlib.closing(psycopg2.connect(**dsl)) as pg_connection:
+        indexer = IncrementalIndexer(
+            OutboxExtractor(pg_connection),
+            BulkFileSink(SINK_FILE, INDEX_NAME),
+        )
+        indexer.run(BATCH_SIZE, POLL_INTERVAL)
@@ -0,0 +1,26 @@
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    __slots__ = ("id", "entity", "entity_id", "op")
+    id: int
+    entity: str
+    entity_id: uuid.UUID
+    op: str
+
+
+@dataclass(frozen=True)
+class FilmDocument:
+    id: uuid.UUID
+    title: str
+    description: str = ""
+    creation_date: date | None = None
+    rating: float | None = None
+    type: str | None = None
+    genres: list[str] = field(default_factory=list)
+    actors: list[str] = field(default_factory=list)
+    directors: list[str] = field(default_factory=list)
+    writers: list[str] = field(default_factory=list)
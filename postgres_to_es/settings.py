@@ -0,0 +1,19 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+POSTGRES_USER = os.environ.get("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.environ.get("POSTGRES_PASSWORD", "postgres")
+POSTGRES_DB = os.environ.get("POSTGRES_DB", "postgres")
+POSTGRES_HOST = os.environ.get("POSTGRES_HOST", "127.0.0.1")
+POSTGRES_PORT = int(os.environ.get("POSTGRES_PORT", 5432))
+CONTENT_SCHEMA = os.environ.get("CONTENT_SCHEMA", "content")
+
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", 1000))
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", 5))
+
+SINK_FILE = os.environ.get("SINK_FILE", "movies.ndjson")
+INDEX_NAME = os.environ.get("INDEX_NAME", "movies")
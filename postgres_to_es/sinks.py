@@ -0,0 +1,38 @@
+import json
+import os
+import uuid
+from dataclasses import asdict
+from typing import Iterable, Protocol
+
+from schemas import FilmDocument
+
+
+class Sink(Protocol):
+    def write(
+        self, documents: Iterable[FilmDocument], deleted_ids: Iterable[uuid.UUID]
+    ) -> None: ...
+
+
+class BulkFileSink:
+    """Пишет изменения в NDJSON-файл в формате Elasticsearch Bulk API."""
+
+    def __init__(self, file_path: str, index: str) -> None:
+        self.file_path = file_path
+        self.index = index
+
+    def _lines(
+        self, documents: Iterable[FilmDocument], deleted_ids: Iterable[uuid.UUID]
+    ) -> Iterable[str]:
+        for document in documents:
+            yield json.dumps({"index": {"_index": self.index, "_id": str(document.id)}})
+            yield json.dumps(asdict(document), default=str, ensure_ascii=False)
+        for id_ in deleted_ids:
+            yield json.dumps({"delete": {"_index": self.index, "_id": str(id_)}})
+
+    def write(
+        self, documents: Iterable[FilmDocument], deleted_ids: Iterable[uuid.UUID]
+    ) -> None:
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.writelines(f"{line}\n" for line in self._lines(documents, deleted_ids))
+            file.flush()
+            os.fsync(file.fileno())
@@ -0,0 +1,109 @@
+"""Тестовая база PostgreSQL: схема из schema_design/init.sql и журнал изменений."""
+
+import contextlib
+import os
+import pathlib
+import unittest
+
+import psycopg2
+from psycopg2.sql import SQL, Identifier
+
+from settings import (
+    CONTENT_SCHEMA,
+    POSTGRES_DB,
+    POSTGRES_HOST,
+    POSTGRES_PASSWORD,
+    POSTGRES_PORT,
+    POSTGRES_USER,
+)
+
+
+# Тесты с базой запускаются только с POSTGRES_TESTS=True: они создают и удаляют
+# базу <POSTGRES_DB>_test на сервере из настроек подключения
+DB_TESTS = os.environ.get("POSTGRES_TESTS", "False") == "True"
+DSL = {
+    "dbname": POSTGRES_DB,
+    "user": POSTGRES_USER,
+    "password": POSTGRES_PASSWORD,
+    "host": POSTGRES_HOST,
+    "port": POSTGRES_PORT,
+}
+TEST_DSL = {**DSL, "dbname": f"{POSTGRES_DB}_test"}
+INIT_SQL = pathlib.Path(__file__).resolve().parents[2] / "schema_design" / "init.sql"
+# Таблица журнала из миграции movies.0004_change_event_outbox, без триггеров:
+# тесты пишут события сами
+CONTENT_TABLES = (
+    "change_event",
+    "genre_film_work",
+    "person_film_work",
+    "film_work",
+    "genre",
+    "person",
+)
+OUTBOX_SQL = f"""
+CREATE TABLE {CONTENT_SCHEMA}.change_event (
+    id bigserial PRIMARY KEY,
+    entity text NOT NULL,
+    entity_id uuid NOT NULL,
+    op text NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now()
+);
+"""
+
+
+def _server_execute(statement: SQL) -> None:
+    # CREATE/DROP DATABASE не выполняются внутри транзакции
+    with contextlib.closing(psycopg2.connect(**DSL)) as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(statement)
+
+
+def _schema_sql() -> str:
+    # Создание базы и переключение на нее - команды psql, база создается здесь
+    return INIT_SQL.read_text(encoding="utf-8").split("\\c movies;", 1)[1]
+
+
+@unittest.skipUnless(DB_TESTS, "POSTGRES_TESTS=True enables PostgreSQL tests")
+class PostgresTestCase(unittest.TestCase):
+    """База создается на класс, журнал и таблицы очищаются перед каждым тестом."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        name = Identifier(TEST_DSL["dbname"])
+        _server_execute(SQL("DROP DATABASE IF EXISTS {};").format(name))
+        _server_execute(SQL("CREATE DATABASE {};").format(name))
+        with contextlib.closing(psycopg2.connect(**TEST_DSL)) as connection:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(_schema_sql())
+                cursor.execute(OUTBOX_SQL)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        _server_execute(
+            SQL("DROP DATABASE IF EXISTS {};").format(Identifier(TEST_DSL["dbname"]))
+        )
+        super().tearDownClass()
+
+    def connect(self):
+        connection = psycopg2.connect(**TEST_DSL)
+        self.addCleanup(connection.close)
+        return connection
+
+    def setUp(self) -> None:
+        self.connection = self.connect()
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(
+                SQL("TRUNCATE {} RESTART IDENTITY;").format(
+                    SQL(", ").join(
+                        Identifier(CONTENT_SCHEMA, table) for table in CONTENT_TABLES
+                    )
+                )
+            )
+
+    def fetch(self, query: str, params=None) -> list[tuple]:
+        """Запрос в отдельной транзакции тестового соединения."""
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall() if cursor.description else []
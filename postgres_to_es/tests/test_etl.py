@@ -0,0 +1,128 @@
+import uuid
+from unittest import mock
+
+from etl import IncrementalIndexer, OutboxExtractor
+from tests.db import PostgresTestCase
+
+
+class RecordingSink:
+    """Запоминает записанные пачки; on_write вызывается до записи."""
+
+    def __init__(self, on_write=None) -> None:
+        self.on_write = on_write
+        self.batches = []
+
+    def write(self, documents, deleted_ids) -> None:
+        if self.on_write is not None:
+            self.on_write()
+        self.batches.append(({document.id for document in documents}, set(deleted_ids)))
+
+
+class OutboxConsumerTest(PostgresTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.films = [self.add_film(f"Film {number}") for number in range(5)]
+        for film_id in self.films:
+            self.add_event(film_id)
+
+    def add_film(self, title: str) -> uuid.UUID:
+        film_id = uuid.uuid4()
+        self.fetch(
+            "INSERT INTO content.film_work "
+            "(id, title, description, certificate, file_path, type) "
+            "VALUES (%s, %s, '', '', '', 'movie');",
+            (str(film_id), title),
+        )
+        return film_id
+
+    def add_event(self, film_id: uuid.UUID, op: str = "update") -> int:
+        ((event_id,),) = self.fetch(
+            "INSERT INTO content.change_event (entity, entity_id, op) "
+            "VALUES ('film_work', %s, %s) RETURNING id;",
+            (str(film_id), op),
+        )
+        return event_id
+
+    def outbox(self) -> list[int]:
+        return [
+            row[0]
+            for row in self.fetch("SELECT id FROM content.change_event ORDER BY id;")
+        ]
+
+    def worker(self, sink: RecordingSink) -> tuple[IncrementalIndexer, mock.Mock]:
+        """Экземпляр ETL на своем соединении и запись подтвержденных событий."""
+        extractor = OutboxExtractor(self.connect())
+        acknowledge = mock.patch.object(
+            extractor, "acknowledge", wraps=extractor.acknowledge
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        return IncrementalIndexer(extractor, sink), acknowledge
+
+    @staticmethod
+    def acknowledged(acknowledge: mock.Mock) -> list[list[int]]:
+        return [[event.id for event in call.args[0]] for call in acknowledge.mock_calls]
+
+    def test_workers_take_disjoint_batches_in_order(self) -> None:
+        second_sink = RecordingSink()
+        second, second_ack = self.worker(second_sink)
+        seen = {}
+
+        def concurrent_batch() -> None:
+            # Первый экземпляр держит блокировки событий 1-2: второй их
+            # пропускает, а не ждет, и забирает следующие по порядку
+            seen["processed"] = second.process_batch(2)
+            seen["outbox"] = self.outbox()
+            seen["late_event"] = self.add_event(self.films[0])
+
+        first_sink = RecordingSink(on_write=concurrent_batch)
+        first, first_ack = self.worker(first_sink)
+
+        self.assertEqual(first.process_batch(2), 2)
+        self.assertEqual(seen["processed"], 2)
+        self.assertEqual(self.acknowledged(second_ack), [[3, 4]])
+        self.assertEqual(seen["outbox"], [1, 2, 5])
+        self.assertEqual(self.acknowledged(first_ack), [[1, 2]])
+        self.assertEqual(first_sink.batches, [(set(self.films[:2]), set())])
+        self.assertEqual(second_sink.batches, [(set(self.films[2:4]), set())])
+
+        # Удалены только подтвержденные события: событие, записанное во время
+        # обработки, ждет следующей пачки вместе с необработанным
+        self.assertEqual(self.outbox(), [5, seen["late_event"]])
+        first_sink.on_write = None
+        self.assertEqual(first.process_batch(10), 2)
+        self.assertEqual(self.acknowledged(first_ack)[-1], [5, 6])
+        self.assertEqual(self.outbox(), [])
+
+    def test_failed_write_keeps_events(self) -> None:
+        def fail() -> None:
+            raise ConnectionError("bulk request failed")
+
+        failing, failing_ack = self.worker(RecordingSink(on_write=fail))
+        with self.assertRaises(ConnectionError):
+            failing.process_batch(3)
+
+        failing_ack.assert_not_called()
+        self.assertEqual(self.outbox(), [1, 2, 3, 4, 5])
+        # Блокировки сняты откатом: пачку забирает другой экземпляр
+        sink = RecordingSink()
+        worker, acknowledge = self.worker(sink)
+        self.assertEqual(worker.process_batch(3), 3)
+        self.assertEqual(self.acknowledged(acknowledge), [[1, 2, 3]])
+        self.assertEqual(self.outbox(), [4, 5])
+
+    def test_failed_write_keeps_only_own_events(self) -> None:
+        second, second_ack = self.worker(RecordingSink())
+
+        def concurrent_batch_then_fail() -> None:
+            second.process_batch(2)
+            raise ConnectionError("bulk request failed")
+
+        first, first_ack = self.worker(
+            RecordingSink(on_write=concurrent_batch_then_fail)
+        )
+        with self.assertRaises(ConnectionError):
+            first.process_batch(2)
+
+        first_ack.assert_not_called()
+        self.assertEqual(self.acknowledged(second_ack), [[3, 4]])
+        self.assertEqual(self.outbox(), [1, 2, 5])
@@ -34,25 +34,64 @@ CREATE TABLE IF NOT EXISTS content.person (
     created_at timestamp with time zone,
     updated_at timestamp with time zone
 );
+-- Автодополнение по началу слов названия и имени: tsquery 'lone <-> st:*'
+CREATE INDEX IF NOT EXISTS film_work_title_words_idx
+ON content.film_work USING gin (to_tsvector('simple'::regconfig, COALESCE(title, '')));
+CREATE INDEX IF NOT EXISTS person_full_name_search_idx
+ON content.person USING gin (to_tsvector('simple'::regconfig, COALESCE(full_name, '')));
+-- Выборки по времени создания: BRIN хранит min/max на 128 страниц
+CREATE INDEX IF NOT EXISTS film_work_created_at_brin
+ON content.film_work USING brin (created_at) WITH (autosummarize = on);
+CREATE INDEX IF NOT EXISTS person_created_at_brin
+ON content.person USING brin (created_at) WITH (autosummarize = on);
+-- Время изменения не следует порядку строк в таблице, для него B-tree
+CREATE INDEX IF NOT EXISTS film_work_updated_at_idx ON content.film_work (updated_at);
+CREATE INDEX IF NOT EXISTS person_updated_at_idx ON content.person (updated_at);
+-- m2m-таблицы секционируются хешем film_work_id: связи одного фильма лежат в одной секции,
+-- VACUUM, REINDEX и массовая загрузка выполняются по секциям параллельно.
+-- Уникальные ограничения секционированной таблицы обязаны включать ключ секционирования,
+-- поэтому первичный ключ - (id, film_work_id)
 -- m2m-таблица для связывания кинопроизведений с жанрами
 CREATE TABLE IF NOT EXISTS content.genre_film_work (
-    id uuid PRIMARY KEY,
+    id uuid NOT NULL,
     film_work_id uuid NOT NULL,
     genre_id uuid NOT NULL,
-    created_at timestamp with time zone
-);
+    created_at timestamp with time zone,
+    PRIMARY KEY (id, film_work_id)
+) PARTITION BY HASH (film_work_id);
 -- Обязательно проверяется уникальность жанра и кинопроизведения, чтобы не появлялось дублей
 CREATE UNIQUE INDEX IF NOT EXISTS film_work_genre
 ON content.genre_film_work(film_work_id, genre_id);
+-- Обратный поиск: фильмы жанра постранично в порядке индекса
+CREATE INDEX IF NOT EXISTS genre_film_work_genre_idx
+ON content.genre_film_work (genre_id, film_work_id);
 -- m2m-таблица для связывания кинопроизведений с участниками
 CREATE TABLE IF NOT EXISTS content.person_film_work (
-    id uuid PRIMARY KEY,
+    id uuid NOT NULL,
     film_work_id uuid NOT NULL,
     person_id uuid NOT NULL,
     role TEXT NOT NULL,
-    created_at timestamp with time zone
-);
+    created_at timestamp with time zone,
+    PRIMARY KEY (id, film_work_id)
+) PARTITION BY HASH (film_work_id);
 -- Обязательно проверяется уникальность кинопроизведения, человека и роли человека, чтобы не появлялось дублей
 -- Один человек может быть сразу в нескольких ролях (например, сценарист и режиссёр)
 CREATE UNIQUE INDEX IF NOT EXISTS film_work_person_role
 ON content.person_film_work (film_work_id, person_id, role);
+-- Обратный поиск: фильмография персоны, в том числе по роли
+CREATE INDEX IF NOT EXISTS person_film_work_person_idx
+ON content.person_film_work (person_id, role);
+-- По 8 секций на таблицу связей
+DO $$
+BEGIN
+    FOR remainder IN 0..7 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS content.genre_film_work_p%1$s PARTITION OF content.genre_film_work '
+            'FOR VALUES WITH (MODULUS 8, REMAINDER %1$s)', remainder
+        );
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS content.person_film_work_p%1$s PARTITION OF content.person_film_work '
+            'FOR VALUES WITH (MODULUS 8, REMAINDER %1$s)', remainder
+        );
+    END LOOP;
+END $$;
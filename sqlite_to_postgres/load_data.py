@@ -1,22 +1,29 @@
 import contextlib
+import io
 import itertools
+import json
 import logging
+import uuid
 from dataclasses import asdict, astuple, fields
 from typing import Iterable
 
 import sqlite3
 import psycopg2
+import psycopg2.errors
 from psycopg2.extensions import connection as _connection, cursor as _cursor
 from psycopg2.extras import DictCursor, register_uuid
 
 from settings import (
     BULK_SIZE,
-    POSTGRES_DB,
+    DSL,
+    POST_LOAD_MAINTENANCE,
     POSTGRES_HOST,
     POSTGRES_INIT,
     POSTGRES_PASSWORD,
     POSTGRES_PORT,
     POSTGRES_USER,
+    QUARANTINE_FILE,
+    QUARANTINE_LIMIT,
     SQLITE_DATABASE,
 )
 from schemas import (
@@ -29,12 +36,18 @@ from schemas import (
     GenreFilmWorkPg,
     PersonFilmWorkPg,
     PYTHON_2_PG_TYPE_MAPPING,
+    link_id,
 )
 from utils import current_datetime
 
 
 logger = logging.getLogger(__name__)
 
+ROLE_KEYS = ("film_actors", "film_directors", "film_writers")
+# Ошибки данных строки: нарушение ограничений, неверное значение. Ошибки
+# соединения и синтаксиса не зависят от строк и прерывают загрузку
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError, ValueError, TypeError)
+
 
 class SQLiteExtractor:
     def __init__(self, connection: sqlite3.Connection) -> None:
@@ -145,6 +158,46 @@ class SQLiteToPgTransformer:
         return (PersonPg(**asdict(record)) for record in data)
 
 
+def _split(data: dict) -> tuple[dict, dict]:
+    """Делит пачку по фильмам, жанры и роли идут за своим фильмом.
+
+    Персоны - в половину, фильмы которой на них ссылаются, персоны без
+    известной роли - в первую половину.
+    """
+    referenced = {
+        person_id
+        for key in ROLE_KEYS
+        for person_ids in data[key].values()
+        for person_id in person_ids
+    }
+    middle = len(data["films"]) // 2
+    halves = []
+    for films in (data["films"][:middle], data["films"][middle:]):
+        film_ids = {film.id for film in films}
+        half = {"films": films}
+        for key in ("genres", *ROLE_KEYS):
+            half[key] = {
+                film_id: items
+                for film_id, items in data[key].items()
+                if film_id in film_ids
+            }
+        persons = {
+            person_id
+            for key in ROLE_KEYS
+            for ids in half[key].values()
+            for person_id in ids
+        }
+        if not halves:
+            persons |= data["persons"].keys() - referenced
+        half["persons"] = {
+            person_id: person
+            for person_id, person in data["persons"].items()
+            if person_id in persons
+        }
+        halves.append(half)
+    return halves[0], halves[1]
+
+
 class PostgresLoader:
     def __init__(self, connection: _connection) -> None:
         self.connection = connection
@@ -152,6 +205,9 @@ class PostgresLoader:
 
     def prepare(self) -> None:
         with self.connection.cursor() as cursor:
+            # Отложенные внешние ключи (схема Django) проверяются сразу, иначе
+            # ошибка пачки всплывет только на COMMIT всей загрузки
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE;")
             self._prepare_film_work_query(cursor)
 
     def _prepare_film_work_query(self, cursor: _cursor) -> None:
@@ -190,7 +246,9 @@ class PostgresLoader:
     def _load_genre(self, cursor: _cursor, genres: Iterable[GenrePg]) -> None:
         data = (astuple(item) for item in genres)
         now = current_datetime().isoformat(sep=" ")
-        data = ((*item, now, now) for item in set(data))
+        data = [(*item, now, now) for item in set(data)]
+        if not data:
+            return
 
         args = ", ".join(
             cursor.mogrify("(%s, %s, %s, %s, %s)", item).decode() for item in data
@@ -209,7 +267,9 @@ class PostgresLoader:
 
     def _load_person(self, cursor: _cursor, persons: Iterable[PersonPg]) -> None:
         now = current_datetime().isoformat(sep=" ")
-        persons = ((*astuple(item), now, now) for item in persons)
+        persons = [(*astuple(item), now, now) for item in persons]
+        if not persons:
+            return
 
         args = ", ".join(
             cursor.mogrify("(%s, %s, %s, %s)", item).decode() for item in persons
@@ -222,91 +282,201 @@ class PostgresLoader:
             """
         )
 
-    def _load_genre_film_work(
-        self, cursor: _cursor, data: Iterable[GenreFilmWorkPg]
-    ) -> None:
-        data = (astuple(item) for item in data)
-        now = current_datetime().isoformat(sep=" ")
-        data = ((id_, fw_id, genre_id, now) for fw_id, genre_id, id_ in data)
+    def _existing_link_ids(
+        self, cursor: _cursor, table: str, key: tuple[str, ...], film_ids: list
+    ) -> set[uuid.UUID]:
+        """id уже загруженных связей фильмов пачки, вычисленные по ключу связи.
 
-        args = ", ".join(
-            cursor.mogrify("(%s, %s, %s, %s)", item).decode() for item in data
-        )
+        Читается по уникальному индексу ключа, поэтому связи, загруженные до
+        перехода на детерминированные id, тоже распознаются.
+        """
         cursor.execute(
-            f"""
-            INSERT INTO content.genre_film_work (id, film_work_id, genre_id, created_at)
-            VALUES {args}
-            ON CONFLICT DO NOTHING; 
-            """
+            f"SELECT {', '.join(key)} FROM content.{table} "
+            f"WHERE film_work_id = ANY(%s::uuid[]);",
+            (film_ids,),
         )
+        return {link_id(*row) for row in cursor.fetchall()}
+
+    def _load_links(
+        self,
+        cursor: _cursor,
+        table: str,
+        key: tuple[str, ...],
+        links: Iterable[GenreFilmWorkPg | PersonFilmWorkPg],
+    ) -> None:
+        """Дописывает новые связи через COPY, уже загруженные пропускаются.
+
+        Одинаковые связи в пачке схлопываются по id. Если связь успела
+        появиться параллельно и COPY упал на уникальности, пачка догружается
+        через INSERT ... ON CONFLICT DO NOTHING.
+        """
+        links = {link.id: link for link in links}
+        if not links:
+            return
+        film_ids = list({str(link.film_work_id) for link in links.values()})
+        for id_ in self._existing_link_ids(cursor, table, key, film_ids):
+            links.pop(id_, None)
+        if not links:
+            return
+
+        now = current_datetime().isoformat(sep=" ")
+        columns = ("id", *key, "created_at")
+        rows = [
+            (link.id, *(getattr(link, column) for column in key), now)
+            for link in links.values()
+        ]
+        cursor.execute("SAVEPOINT copy_links;")
+        try:
+            cursor.copy_expert(
+                f"COPY content.{table} ({', '.join(columns)}) FROM STDIN;",
+                io.StringIO("".join("\t".join(map(str, row)) + "\n" for row in rows)),
+            )
+        except psycopg2.errors.UniqueViolation:
+            cursor.execute("ROLLBACK TO SAVEPOINT copy_links;")
+            placeholders = f"({', '.join('%s' for _ in columns)})"
+            args = ", ".join(cursor.mogrify(placeholders, row).decode() for row in rows)
+            cursor.execute(
+                f"""
+                INSERT INTO content.{table} ({', '.join(columns)})
+                VALUES {args}
+                ON CONFLICT DO NOTHING;
+                """
+            )
+        else:
+            cursor.execute("RELEASE SAVEPOINT copy_links;")
+        logger.debug("%s: %s new links", table, len(rows))
+
+    def _load_genre_film_work(
+        self, cursor: _cursor, data: Iterable[GenreFilmWorkPg]
+    ) -> None:
+        self._load_links(cursor, "genre_film_work", ("film_work_id", "genre_id"), data)
 
     def _load_person_film_work(
         self, cursor: _cursor, data: Iterable[PersonFilmWorkPg]
     ) -> None:
-        data = (astuple(item) for item in data)
-        now = current_datetime().isoformat(sep=" ")
-        data = ((id_, fw_id, p_id, role, now) for fw_id, p_id, role, id_ in data)
-
-        args = ", ".join(
-            cursor.mogrify("(%s, %s, %s, %s, %s)", item).decode() for item in data
+        self._load_links(
+            cursor, "person_film_work", ("film_work_id", "person_id", "role"), data
         )
-        cursor.execute(
-            f"""
-            INSERT INTO content.person_film_work (id, film_work_id, person_id, role, created_at)
-            VALUES {args}
-            ON CONFLICT DO NOTHING; 
-            """
+
+    def _load_bulk(self, cursor: _cursor, data: dict) -> None:
+        films = SQLiteToPgTransformer.transform_films(data["films"])
+        self._load_film_work(cursor, films)
+
+        genres = SQLiteToPgTransformer.transform_genres(
+            itertools.chain.from_iterable(data["genres"].values())
         )
+        self._load_genre(cursor, genres)
 
-    def bulk_load(self, data: dict[str, dict]) -> None:
-        with self.connection.cursor() as cursor:
-            films = SQLiteToPgTransformer.transform_films(data["films"])
-            self._load_film_work(cursor, films)
+        persons = SQLiteToPgTransformer.transform_persons(data["persons"].values())
+        self._load_person(cursor, persons)
 
-            genres = SQLiteToPgTransformer.transform_genres(
-                itertools.chain.from_iterable(data["genres"].values())
+        genres_data = itertools.chain.from_iterable(
+            (
+                GenreFilmWorkPg(film_work_id=fw_id, genre_id=genre.id)
+                for genre in genre_list
             )
-            self._load_genre(cursor, genres)
+            for fw_id, genre_list in data["genres"].items()
+        )
+        self._load_genre_film_work(cursor, genres_data)
 
-            persons = SQLiteToPgTransformer.transform_persons(data["persons"].values())
-            self._load_person(cursor, persons)
+        actors = itertools.chain.from_iterable(
+            (PersonFilmWorkPg(fw_id, id_, "actor") for id_ in persons_ids)
+            for fw_id, persons_ids in data["film_actors"].items()
+        )
+        directors = itertools.chain.from_iterable(
+            (PersonFilmWorkPg(fw_id, id_, "director") for id_ in persons_ids)
+            for fw_id, persons_ids in data["film_directors"].items()
+        )
+        writers = itertools.chain.from_iterable(
+            (PersonFilmWorkPg(fw_id, id_, "writer") for id_ in persons_ids)
+            for fw_id, persons_ids in data["film_writers"].items()
+        )
+        self._load_person_film_work(cursor, itertools.chain(actors, directors, writers))
 
-            genres_data = itertools.chain.from_iterable(
-                (
-                    GenreFilmWorkPg(film_work_id=fw_id, genre_id=genre.id)
-                    for genre in genre_list
-                )
-                for fw_id, genre_list in data["genres"].items()
+    def bulk_load(self, data: dict) -> list[tuple[dict, str]]:
+        """Загружает пачку, фильмы с ошибками возвращает с текстом ошибки."""
+        with self.connection.cursor() as cursor:
+            return self._isolate(cursor, data)
+
+    def _isolate(self, cursor: _cursor, data: dict) -> list[tuple[dict, str]]:
+        """Загружает пачку в точке сохранения, упавшую пачку делит пополам.
+
+        Пачка с k плохими фильмами из n загружается за O(k log n) попыток,
+        остальные фильмы уходят в базу целыми пачками. Ошибочный фильм
+        отбрасывается вместе со своими жанрами, персонами и связями.
+        """
+        cursor.execute("SAVEPOINT bulk;")
+        try:
+            self._load_bulk(cursor, data)
+        except ROW_ERRORS as exc:
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk;")
+            cursor.execute("RELEASE SAVEPOINT bulk;")
+            if len(data["films"]) == 1:
+                return [(data, str(exc).strip())]
+            first, second = _split(data)
+            return self._isolate(cursor, first) + self._isolate(cursor, second)
+        cursor.execute("RELEASE SAVEPOINT bulk;")
+        return []
+
+
+class Quarantine:
+    """Фильмы, не прошедшие загрузку: JSON-строка на фильм с ошибкой и данными.
+
+    Файл создается при первой ошибке. После QUARANTINE_LIMIT фильмов загрузка
+    прерывается: столько ошибок - скорее проблема схемы, чем данных.
+    """
+
+    def __init__(self, path: str, limit: int) -> None:
+        self.path = path
+        self.limit = limit
+        self.count = 0
+        self.file = None
+
+    def add(self, data: dict, error: str) -> None:
+        (film,) = data["films"]
+        self.count += 1
+        logger.warning("Film %s quarantined: %s", film.id, error)
+        if self.count > self.limit:
+            raise RuntimeError(
+                f"More than {self.limit} films quarantined, last error: {error}"
             )
-            self._load_genre_film_work(cursor, genres_data)
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        record = {
+            "film_work_id": film.id,
+            "error": error,
+            "film": asdict(film),
+            "genres": [asdict(genre) for genre in data["genres"].get(film.id, [])],
+            "persons": [asdict(person) for person in data["persons"].values()],
+            **{key: data[key].get(film.id, []) for key in ROLE_KEYS},
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
 
-            actors = itertools.chain.from_iterable(
-                (PersonFilmWorkPg(fw_id, id_, "actor") for id_ in persons_ids)
-                for fw_id, persons_ids in data["film_actors"].items()
-            )
-            directors = itertools.chain.from_iterable(
-                (PersonFilmWorkPg(fw_id, id_, "director") for id_ in persons_ids)
-                for fw_id, persons_ids in data["film_directors"].items()
-            )
-            writers = itertools.chain.from_iterable(
-                (PersonFilmWorkPg(fw_id, id_, "writer") for id_ in persons_ids)
-                for fw_id, persons_ids in data["film_writers"].items()
-            )
-            self._load_person_film_work(
-                cursor, itertools.chain(actors, directors, writers)
-            )
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
 
 
-def load_from_sqlite(
-    connection: sqlite3.Connection, pg_connection: _connection
-) -> None:
-    """Основной метод загрузки данных из SQLite в PostgreSQL."""
+def load_from_sqlite(connection: sqlite3.Connection, pg_connection: _connection) -> int:
+    """Основной метод загрузки данных из SQLite в PostgreSQL.
+
+    Возвращает число фильмов, отложенных в карантин, остальные загружаются.
+    """
     postgres_loader = PostgresLoader(pg_connection)
     sqlite_extractor = SQLiteExtractor(connection)
 
     postgres_loader.prepare()
-    for bulk in sqlite_extractor.bulk_generator(bulk_size=BULK_SIZE):
-        postgres_loader.bulk_load(bulk)
+    with contextlib.closing(
+        Quarantine(QUARANTINE_FILE, QUARANTINE_LIMIT)
+    ) as quarantine:
+        for bulk in sqlite_extractor.bulk_generator(bulk_size=BULK_SIZE):
+            for film_data, error in postgres_loader.bulk_load(bulk):
+                quarantine.add(film_data, error)
+        if quarantine.count:
+            logger.warning(
+                "%s films quarantined to %s", quarantine.count, quarantine.path
+            )
+    return quarantine.count
 
 
 if __name__ == "__main__":
@@ -325,16 +495,17 @@ if __name__ == "__main__":
             shell=True,
         ).wait()
 
-    dsl = {
-        "dbname": POSTGRES_DB,
-        "user": POSTGRES_USER,
-        "password": POSTGRES_PASSWORD,
-        "host": POSTGRES_HOST,
-        "port": POSTGRES_PORT,
-    }
     with contextlib.closing(
         sqlite3.connect(SQLITE_DATABASE)
     ) as sqlite_connection, psycopg2.connect(
-        **dsl, cursor_factory=DictCursor
+        **DSL, cursor_factory=DictCursor
     ) as pg_connection:
         load_from_sqlite(sqlite_connection, pg_connection)
+
+    # После коммита загрузки: свежая статистика и без мертвых строк от upsert-ов
+    if POST_LOAD_MAINTENANCE:
+        import maintenance
+
+        logging.basicConfig(level=logging.INFO)
+        maintenance.maintain(DSL)
+        maintenance.print_report(maintenance.report(DSL))
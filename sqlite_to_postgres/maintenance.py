@@ -0,0 +1,200 @@
+"""Обслуживание схемы content после загрузки: CLUSTER, VACUUM (ANALYZE), отчет."""
+
+import argparse
+import contextlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from psycopg2.extensions import cursor as _cursor
+from psycopg2.sql import SQL, Identifier
+
+from settings import DSL, MAINTENANCE_CLUSTER, MAINTENANCE_JOBS
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "content"
+# Таблицы связей, которые упорядочиваются по фильму: связи фильма в одних страницах
+LINK_TABLES = ("genre_film_work", "person_film_work")
+CLUSTER_COLUMN = "film_work_id"
+
+# Листовые таблицы схемы (секции вместо секционированных таблиц) и их родители
+LEAF_TABLES_SQL = """
+    SELECT c.relname, coalesce(parent.relname, c.relname)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+    LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+    WHERE n.nspname = %s AND c.relkind = 'r'
+    ORDER BY pg_relation_size(c.oid) DESC
+"""
+PARTITIONED_TABLES_SQL = """
+    SELECT c.relname FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind = 'p'
+"""
+# Индекс с film_work_id первой колонкой, уникальный предпочтительнее
+CLUSTER_INDEX_SQL = """
+    SELECT ic.relname
+    FROM pg_index x
+    JOIN pg_class ic ON ic.oid = x.indexrelid
+    JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0]
+    WHERE x.indrelid = %s::regclass AND a.attname = %s AND x.indisvalid
+    ORDER BY x.indisunique DESC, x.indnatts
+    LIMIT 1
+"""
+REPORT_SQL = """
+    SELECT
+        c.relname,
+        pg_relation_size(c.oid),
+        pg_indexes_size(c.oid),
+        coalesce(s.n_live_tup, 0),
+        coalesce(s.n_dead_tup, 0),
+        greatest(s.last_vacuum, s.last_autovacuum),
+        greatest(s.last_analyze, s.last_autoanalyze)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE n.nspname = %s AND c.relkind = 'r'
+    ORDER BY pg_total_relation_size(c.oid) DESC
+"""
+# Точная доля свободного места, если установлен pgstattuple
+FREE_SPACE_SQL = "SELECT approx_free_percent FROM pgstattuple_approx(%s::regclass)"
+
+
+def _connect(dsl: dict):
+    connection = psycopg2.connect(**dsl)
+    # VACUUM и CLUSTER не выполняются внутри транзакции
+    connection.autocommit = True
+    return connection
+
+
+def _qualified(table: str) -> Identifier:
+    return Identifier(SCHEMA, table)
+
+
+def _execute(dsl: dict, statements: list[SQL]) -> float:
+    started = time.monotonic()
+    with contextlib.closing(_connect(dsl)) as connection:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    return time.monotonic() - started
+
+
+def _cluster_statement(cursor: _cursor, table: str) -> SQL | None:
+    cursor.execute(CLUSTER_INDEX_SQL, (f"{SCHEMA}.{table}", CLUSTER_COLUMN))
+    row = cursor.fetchone()
+    if row is None:
+        logger.warning("%s: no index on %s, CLUSTER skipped", table, CLUSTER_COLUMN)
+        return None
+    return SQL("CLUSTER {} USING {};").format(_qualified(table), Identifier(row[0]))
+
+
+def plan(cursor: _cursor, cluster: bool) -> dict[str, list[SQL]]:
+    """Команды по листовым таблицам: секции обслуживаются отдельно и параллельно.
+
+    CLUSTER переписывает таблицу с упорядочиванием по фильму и удаляет мертвые
+    строки, после него VACUUM только обновляет карту видимости и статистику.
+    """
+    cursor.execute(LEAF_TABLES_SQL, (SCHEMA,))
+    statements = {}
+    for table, parent in cursor.fetchall():
+        statements[table] = []
+        if cluster and parent in LINK_TABLES:
+            statement = _cluster_statement(cursor, table)
+            if statement is not None:
+                statements[table].append(statement)
+        statements[table].append(SQL("VACUUM (ANALYZE) {};").format(_qualified(table)))
+    return statements
+
+
+def maintain(
+    dsl: dict, jobs: int = MAINTENANCE_JOBS, cluster: bool = MAINTENANCE_CLUSTER
+) -> None:
+    """Параллельно обслуживает таблицы схемы, по таблице на соединение.
+
+    Статистику секционированной таблицы autovacuum не собирает, поэтому после
+    секций выполняется ANALYZE самих секционированных таблиц.
+    """
+    with contextlib.closing(_connect(dsl)) as connection:
+        with connection.cursor() as cursor:
+            statements = plan(cursor, cluster)
+            cursor.execute(PARTITIONED_TABLES_SQL, (SCHEMA,))
+            partitioned = [table for (table,) in cursor.fetchall()]
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        durations = executor.map(_execute, [dsl] * len(statements), statements.values())
+        for table, duration in zip(statements, durations):
+            logger.info("%s: %.2fs", table, duration)
+    for table in partitioned:
+        duration = _execute(dsl, [SQL("ANALYZE {};").format(_qualified(table))])
+        logger.info("%s (partitioned): %.2fs", table, duration)
+    logger.info(
+        "%s tables maintained in %.2fs", len(statements), time.monotonic() - started
+    )
+
+
+def _size(size: int) -> str:
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def report(dsl: dict) -> list[tuple]:
+    """Размеры таблиц и индексов, мертвые строки и свободное место в таблицах."""
+    with contextlib.closing(_connect(dsl)) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'")
+            has_pgstattuple = cursor.fetchone() is not None
+            cursor.execute(REPORT_SQL, (SCHEMA,))
+            tables = cursor.fetchall()
+            rows = []
+            for table, size, indexes, live, dead, vacuumed, analyzed in tables:
+                free = None
+                if has_pgstattuple and size:
+                    cursor.execute(FREE_SPACE_SQL, (f"{SCHEMA}.{table}",))
+                    free = cursor.fetchone()[0]
+                rows.append(
+                    (table, size, indexes, live, dead, free, vacuumed, analyzed)
+                )
+    return rows
+
+
+def print_report(rows: list[tuple]) -> None:
+    print(
+        f"{'table':<32} {'size':>10} {'indexes':>10} {'live':>10} "
+        f"{'dead %':>7} {'free %':>7}  analyzed"
+    )
+    for table, size, indexes, live, dead, free, _vacuumed, analyzed in rows:
+        dead_share = 100 * dead / (live + dead) if live + dead else 0
+        print(
+            f"{table:<32} {_size(size):>10} {_size(indexes):>10} {live:>10} "
+            f"{dead_share:>7.1f} {'-' if free is None else f'{free:.1f}':>7}  "
+            f"{analyzed or 'never'}"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=MAINTENANCE_JOBS)
+    parser.add_argument(
+        "--cluster",
+        action="store_true",
+        default=MAINTENANCE_CLUSTER,
+        help="CLUSTER таблиц связей по film_work_id (блокирует таблицы)",
+    )
+    parser.add_argument(
+        "--report-only", action="store_true", help="Только отчет, без обслуживания"
+    )
+    arguments = parser.parse_args()
+
+    if not arguments.report_only:
+        maintain(DSL, arguments.jobs, arguments.cluster)
+    print_report(report(DSL))
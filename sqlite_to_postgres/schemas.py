@@ -6,6 +6,19 @@ from types import MappingProxyType
 from utils import current_datetime
 
 
+# Пространство имен UUIDv5 для id строк связей: id определяется ключом связи,
+# поэтому повторная загрузка дает те же id
+LINK_NAMESPACE = uuid.UUID("6f1c7c52-3b8e-4d36-9d0a-2f5e4c1b7a90")
+
+
+def link_id(*key) -> uuid.UUID:
+    """UUIDv5 по ключу связи: фильм и жанр или фильм, персона и роль.
+
+    Части ключа приводятся к нижнему регистру, как UUID в тексте из PostgreSQL.
+    """
+    return uuid.uuid5(LINK_NAMESPACE, ":".join(str(part).lower() for part in key))
+
+
 @dataclass(frozen=True)
 class GenreSQLite:
     __slots__ = ("id", "name")
@@ -54,7 +67,11 @@ class GenrePg:
 class GenreFilmWorkPg:
     film_work_id: uuid.UUID
     genre_id: uuid.UUID
-    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    id: uuid.UUID = None
+
+    def __post_init__(self) -> None:
+        if self.id is None:
+            object.__setattr__(self, "id", link_id(self.film_work_id, self.genre_id))
 
 
 @dataclass(frozen=True)
@@ -69,7 +86,13 @@ class PersonFilmWorkPg:
     film_work_id: uuid.UUID
     person_id: uuid.UUID
     role: str
-    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    id: uuid.UUID = None
+
+    def __post_init__(self) -> None:
+        if self.id is None:
+            object.__setattr__(
+                self, "id", link_id(self.film_work_id, self.person_id, self.role)
+            )
 
 
 PYTHON_2_PG_TYPE_MAPPING = MappingProxyType(
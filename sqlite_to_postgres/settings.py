@@ -13,7 +13,25 @@ POSTGRES_DB = os.environ.get("POSTGRES_DB", "postgres")
 POSTGRES_HOST = os.environ.get("POSTGRES_HOST", "127.0.0.1")
 POSTGRES_PORT = int(os.environ.get("POSTGRES_PORT", 5432))
 POSTGRES_INIT = os.environ.get("POSTGRES_INIT", "")
+DSL = {
+    "dbname": POSTGRES_DB,
+    "user": POSTGRES_USER,
+    "password": POSTGRES_PASSWORD,
+    "host": POSTGRES_HOST,
+    "port": POSTGRES_PORT,
+}
 
 BULK_SIZE = int(os.environ.get("BULK_SIZE", 1))
 
 TIMEZONE = os.environ.get("TIMEZONE", "Europe/Moscow")
+
+# Обслуживание после загрузки: VACUUM (ANALYZE) таблиц content в MAINTENANCE_JOBS
+# соединений, CLUSTER таблиц связей по film_work_id и отчет о размерах
+POST_LOAD_MAINTENANCE = os.environ.get("POST_LOAD_MAINTENANCE", "True") == "True"
+MAINTENANCE_JOBS = int(os.environ.get("MAINTENANCE_JOBS", 4))
+MAINTENANCE_CLUSTER = os.environ.get("MAINTENANCE_CLUSTER", "False") == "True"
+
+# Фильмы, на которых падает загрузка пачки, пишутся в QUARANTINE_FILE (JSON-строки),
+# остальные загружаются; больше QUARANTINE_LIMIT таких фильмов прерывают загрузку
+QUARANTINE_FILE = os.environ.get("QUARANTINE_FILE", "quarantine.jsonl")
+QUARANTINE_LIMIT = int(os.environ.get("QUARANTINE_LIMIT", 1000))
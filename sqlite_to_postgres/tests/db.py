@@ -0,0 +1,71 @@
+"""Тестовая база PostgreSQL со схемой content из schema_design/init.sql."""
+
+import contextlib
+import os
+import pathlib
+import unittest
+
+import psycopg2
+from psycopg2.sql import SQL, Identifier
+
+from settings import DSL
+
+
+# Тесты с базой запускаются только с POSTGRES_TESTS=True: они создают и удаляют
+# базу <POSTGRES_DB>_test на сервере из настроек подключения
+DB_TESTS = os.environ.get("POSTGRES_TESTS", "False") == "True"
+TEST_DSL = {**DSL, "dbname": f"{DSL['dbname']}_test"}
+INIT_SQL = pathlib.Path(__file__).resolve().parents[2] / "schema_design" / "init.sql"
+CONTENT_TABLES = ("genre_film_work", "person_film_work", "film_work", "genre", "person")
+
+
+def _server_execute(statement: SQL) -> None:
+    # CREATE/DROP DATABASE не выполняются внутри транзакции
+    with contextlib.closing(psycopg2.connect(**DSL)) as connection:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(statement)
+
+
+def _schema_sql() -> str:
+    # Создание базы и переключение на нее - команды psql, база создается здесь
+    return INIT_SQL.read_text(encoding="utf-8").split("\\c movies;", 1)[1]
+
+
+@unittest.skipUnless(DB_TESTS, "POSTGRES_TESTS=True enables PostgreSQL tests")
+class PostgresTestCase(unittest.TestCase):
+    """База создается на класс, таблицы content очищаются перед каждым тестом."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        name = Identifier(TEST_DSL["dbname"])
+        _server_execute(SQL("DROP DATABASE IF EXISTS {};").format(name))
+        _server_execute(SQL("CREATE DATABASE {};").format(name))
+        with contextlib.closing(psycopg2.connect(**TEST_DSL)) as connection:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(_schema_sql())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        _server_execute(
+            SQL("DROP DATABASE IF EXISTS {};").format(Identifier(TEST_DSL["dbname"]))
+        )
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.connection = psycopg2.connect(**TEST_DSL)
+        self.addCleanup(self.connection.close)
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(
+                SQL("TRUNCATE {};").format(
+                    SQL(", ").join(
+                        Identifier("content", table) for table in CONTENT_TABLES
+                    )
+                )
+            )
+
+    def fetch(self, query: str, params=None) -> list[tuple]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
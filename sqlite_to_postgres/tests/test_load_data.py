@@ -0,0 +1,244 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from dataclasses import replace
+
+import psycopg2.errors
+
+from load_data import ROLE_KEYS, PostgresLoader, Quarantine, _split
+from schemas import FilmWorkSQLite, GenreSQLite, PersonSQLite, link_id
+from tests.db import PostgresTestCase
+
+
+def make_bulk(films: int, bad: tuple[int, ...] = ()) -> dict:
+    """Пачка в формате SQLiteExtractor: у фильма жанр, актер и режиссер.
+
+    Фильмы с номерами из bad без типа: NOT NULL в film_work.type их отклоняет.
+    Последняя персона пачки ни с кем не связана.
+    """
+    data = {"films": [], "genres": {}, "persons": {}, **{key: {} for key in ROLE_KEYS}}
+    genre = GenreSQLite(str(uuid.uuid4()), "Drama")
+    shared = PersonSQLite(str(uuid.uuid4()), "Shared Director")
+    data["persons"][shared.id] = shared
+    for number in range(films):
+        film = FilmWorkSQLite(
+            str(uuid.uuid4()),
+            f"Film {number}",
+            "",
+            5.0,
+            "" if number in bad else "movie",
+        )
+        actor = PersonSQLite(str(uuid.uuid4()), f"Actor {number}")
+        data["films"].append(film)
+        data["genres"][film.id] = [genre]
+        data["persons"][actor.id] = actor
+        data["film_actors"][film.id] = [actor.id]
+        data["film_directors"][film.id] = [shared.id]
+    lonely = PersonSQLite(str(uuid.uuid4()), "Nobody")
+    data["persons"][lonely.id] = lonely
+    return data
+
+
+def upper_ids(data: dict) -> dict:
+    """Та же пачка с id фильмов, жанров и персон в верхнем регистре."""
+    return {
+        "films": [replace(film, id=film.id.upper()) for film in data["films"]],
+        "genres": {
+            film_id.upper(): [replace(genre, id=genre.id.upper()) for genre in genres]
+            for film_id, genres in data["genres"].items()
+        },
+        "persons": {
+            person_id.upper(): replace(person, id=person_id.upper())
+            for person_id, person in data["persons"].items()
+        },
+        **{
+            key: {
+                film_id.upper(): [person_id.upper() for person_id in person_ids]
+                for film_id, person_ids in data[key].items()
+            }
+            for key in ROLE_KEYS
+        },
+    }
+
+
+def referenced_persons(half: dict) -> set[str]:
+    return {
+        person_id
+        for key in ROLE_KEYS
+        for person_ids in half[key].values()
+        for person_id in person_ids
+    }
+
+
+class SplitTest(unittest.TestCase):
+    def test_halves_cover_bulk_without_overlap(self) -> None:
+        for films in range(2, 8):
+            with self.subTest(films=films):
+                data = make_bulk(films)
+                first, second = _split(data)
+                self.assertTrue(first["films"] and second["films"])
+                self.assertEqual(first["films"] + second["films"], data["films"])
+                for key in ("genres", *ROLE_KEYS):
+                    self.assertFalse(first[key].keys() & second[key].keys())
+                    self.assertEqual({**first[key], **second[key]}, data[key])
+                self.assertEqual(
+                    first["persons"].keys() | second["persons"].keys(),
+                    data["persons"].keys(),
+                )
+
+    def test_persons_follow_their_films(self) -> None:
+        data = make_bulk(4)
+        first, second = _split(data)
+        unreferenced = data["persons"].keys() - referenced_persons(data)
+        self.assertEqual(
+            first["persons"].keys(), referenced_persons(first) | unreferenced
+        )
+        self.assertEqual(second["persons"].keys(), referenced_persons(second))
+
+
+class QuarantineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "quarantine.jsonl")
+
+    def single(self, data: dict, number: int) -> dict:
+        bulk = data
+        while len(bulk["films"]) > 1:
+            first, second = _split(bulk)
+            bulk = first if data["films"][number] in first["films"] else second
+        return bulk
+
+    def test_film_is_written_with_its_links(self) -> None:
+        data = make_bulk(3)
+        film_data = self.single(data, 1)
+        quarantine = Quarantine(self.path, limit=10)
+        with self.assertLogs("load_data", "WARNING"):
+            quarantine.add(film_data, "null value in column")
+        quarantine.close()
+
+        with open(self.path, encoding="utf-8") as file:
+            (record,) = [json.loads(line) for line in file]
+        film = data["films"][1]
+        self.assertEqual(record["film_work_id"], film.id)
+        self.assertEqual(record["error"], "null value in column")
+        self.assertEqual(record["film"]["title"], film.title)
+        self.assertEqual(record["film_actors"], data["film_actors"][film.id])
+        self.assertEqual(
+            {person["id"] for person in record["persons"]},
+            set(data["film_actors"][film.id] + data["film_directors"][film.id]),
+        )
+
+    def test_limit_aborts_load(self) -> None:
+        data = make_bulk(2)
+        quarantine = Quarantine(self.path, limit=1)
+        with self.assertLogs("load_data", "WARNING"):
+            quarantine.add(self.single(data, 0), "error")
+            with self.assertRaises(RuntimeError):
+                quarantine.add(self.single(data, 1), "error")
+        quarantine.close()
+
+
+class IsolateTest(PostgresTestCase):
+    def load(self, data: dict) -> list[tuple[dict, str]]:
+        loader = PostgresLoader(self.connection)
+        loader.prepare()
+        return loader.bulk_load(data)
+
+    def test_bad_film_is_isolated(self) -> None:
+        data = make_bulk(5, bad=(3,))
+        failed = self.load(data)
+
+        self.assertEqual(len(failed), 1)
+        film_data, error = failed[0]
+        self.assertEqual(film_data["films"], [data["films"][3]])
+        self.assertIn("type", error)
+        # Точек сохранения пачки не осталось, транзакция загрузки рабочая
+        with self.connection.cursor() as cursor:
+            cursor.execute("SAVEPOINT probe;")
+            with self.assertRaises(psycopg2.errors.InvalidSavepointSpecification):
+                cursor.execute("RELEASE SAVEPOINT bulk;")
+            cursor.execute("ROLLBACK TO SAVEPOINT probe;")
+        self.connection.commit()
+
+        good = {film.id for number, film in enumerate(data["films"]) if number != 3}
+        self.assertEqual(
+            {str(id_) for (id_,) in self.fetch("SELECT id FROM content.film_work")},
+            good,
+        )
+        for table, links in (("genre_film_work", 4), ("person_film_work", 8)):
+            with self.subTest(table=table):
+                rows = self.fetch(f"SELECT film_work_id FROM content.{table}")
+                self.assertEqual(len(rows), links)
+                self.assertEqual({str(id_) for (id_,) in rows}, good)
+        self.assertEqual(
+            self.fetch("SELECT count(*) FROM content.person"), [(len(good) + 2,)]
+        )
+
+    def test_every_film_bad(self) -> None:
+        data = make_bulk(4, bad=(0, 1, 2, 3))
+        failed = self.load(data)
+        self.assertEqual(
+            [film_data["films"] for film_data, _error in failed],
+            [[film] for film in data["films"]],
+        )
+        self.connection.commit()
+        self.assertEqual(self.fetch("SELECT count(*) FROM content.film_work"), [(0,)])
+
+
+class ReloadTest(PostgresTestCase):
+    LINKS_SQL = """
+        SELECT 'genre', id, xmin::text, film_work_id, genre_id::text, ''
+        FROM content.genre_film_work
+        UNION ALL
+        SELECT 'person', id, xmin::text, film_work_id, person_id::text, role
+        FROM content.person_film_work
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.loader = PostgresLoader(self.connection)
+        self.loader.prepare()
+
+    def load(self, data: dict) -> None:
+        self.assertEqual(self.loader.bulk_load(data), [])
+        self.connection.commit()
+
+    def test_second_load_inserts_no_links(self) -> None:
+        data = make_bulk(3)
+        self.load(data)
+        links = self.fetch(self.LINKS_SQL)
+        self.assertEqual(len(links), 9)
+        for kind, id_, _xmin, *key in links:
+            key = key[:2] if kind == "genre" else key
+            self.assertEqual(id_, link_id(*key))
+
+        # Те же id и версии строк: связи не вставлены и не переписаны, в том
+        # числе когда id в SQLite записаны в другом регистре
+        for bulk in (data, upper_ids(data)):
+            self.load(bulk)
+            self.assertCountEqual(self.fetch(self.LINKS_SQL), links)
+
+    def test_links_with_random_ids_are_recognized(self) -> None:
+        data = make_bulk(1)
+        film = data["films"][0]
+        (genre,) = data["genres"][film.id]
+        random_id = uuid.uuid4()
+        with self.connection, self.connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO content.genre_film_work (id, film_work_id, genre_id) "
+                "VALUES (%s, %s, %s);",
+                (random_id, film.id, genre.id),
+            )
+            self.assertEqual(
+                self.loader._existing_link_ids(
+                    cursor, "genre_film_work", ("film_work_id", "genre_id"), [film.id]
+                ),
+                {link_id(film.id, genre.id)},
+            )
+        self.load(data)
+        self.assertEqual(
+            self.fetch("SELECT id FROM content.genre_film_work"), [(random_id,)]
+        )
@@ -0,0 +1,64 @@
+from unittest import mock
+
+import maintenance
+from tests.db import TEST_DSL, PostgresTestCase
+
+
+PARTITIONS = 8
+LINK_PARTITIONS = {
+    f"{table}_p{remainder}"
+    for table in maintenance.LINK_TABLES
+    for remainder in range(PARTITIONS)
+}
+
+
+class MaintenancePlanTest(PostgresTestCase):
+    def plan(self, cluster: bool) -> dict[str, list[str]]:
+        with self.connection.cursor() as cursor:
+            statements = maintenance.plan(cursor, cluster)
+        return {
+            table: [statement.as_string(self.connection) for statement in table_plan]
+            for table, table_plan in statements.items()
+        }
+
+    def test_leaf_tables_are_vacuumed(self) -> None:
+        statements = self.plan(cluster=False)
+        # Секционированные таблицы данных не хранят, вместо них - секции
+        self.assertEqual(
+            statements.keys(), {"film_work", "genre", "person", *LINK_PARTITIONS}
+        )
+        for table, table_plan in statements.items():
+            with self.subTest(table=table):
+                self.assertEqual(table_plan, [f'VACUUM (ANALYZE) "content"."{table}";'])
+
+    def test_link_partitions_are_clustered_by_film(self) -> None:
+        statements = self.plan(cluster=True)
+        for table, table_plan in statements.items():
+            with self.subTest(table=table):
+                if table not in LINK_PARTITIONS:
+                    self.assertEqual(len(table_plan), 1)
+                    continue
+                cluster, vacuum = table_plan
+                self.assertTrue(
+                    cluster.startswith(f'CLUSTER "content"."{table}" USING ')
+                )
+                self.assertTrue(vacuum.startswith("VACUUM (ANALYZE)"))
+
+    def test_each_table_gets_its_own_connection(self) -> None:
+        with mock.patch.object(
+            maintenance, "_execute", wraps=maintenance._execute
+        ) as execute, self.assertLogs("maintenance", "INFO"):
+            maintenance.maintain(TEST_DSL, jobs=4, cluster=True)
+
+        calls = [
+            [statement.as_string(self.connection) for statement in call.args[1]]
+            for call in execute.call_args_list
+        ]
+        # Соединение на листовую таблицу, затем ANALYZE секционированных таблиц
+        self.assertEqual(len(calls), 3 + len(LINK_PARTITIONS) + 2)
+        tables = [statements[-1].split('"')[3] for statements in calls]
+        self.assertEqual(len(set(tables)), len(tables))
+        self.assertCountEqual(
+            [statements for statements in calls if statements[0].startswith("ANALYZE")],
+            [[f'ANALYZE "content"."{table}";'] for table in maintenance.LINK_TABLES],
+        )
@@ -0,0 +1,41 @@
+import unittest
+import uuid
+
+from schemas import GenreFilmWorkPg, PersonFilmWorkPg, link_id
+
+
+FILM = "8a5f1c7e-0d43-4b8e-9d0e-6b2f3c4d5e6f"
+GENRE = "1b2c3d4e-5f60-4a7b-8c9d-0e1f2a3b4c5d"
+
+
+class LinkIdTest(unittest.TestCase):
+    def test_id_is_pinned(self) -> None:
+        # Значение зафиксировано: смена пространства имен или формата ключа
+        # разошлась бы с id связей, загруженных раньше, и с SQL из README
+        self.assertEqual(
+            link_id(FILM, GENRE), uuid.UUID("48c49e1f-55c3-57eb-b852-d49f55f0f160")
+        )
+
+    def test_key_case_and_type_do_not_matter(self) -> None:
+        expected = link_id(FILM, GENRE)
+        self.assertEqual(link_id(FILM.upper(), GENRE), expected)
+        self.assertEqual(link_id(uuid.UUID(FILM), uuid.UUID(GENRE)), expected)
+        self.assertEqual(
+            link_id(FILM, GENRE, "Actor"), link_id(uuid.UUID(FILM), GENRE, "actor")
+        )
+
+    def test_key_parts_are_distinguished(self) -> None:
+        self.assertNotEqual(link_id(FILM, GENRE), link_id(GENRE, FILM))
+        self.assertNotEqual(
+            link_id(FILM, GENRE, "actor"), link_id(FILM, GENRE, "director")
+        )
+
+    def test_link_dataclasses_use_key_ids(self) -> None:
+        self.assertEqual(GenreFilmWorkPg(FILM, GENRE).id, link_id(FILM, GENRE))
+        self.assertEqual(
+            PersonFilmWorkPg(FILM.upper(), GENRE, "writer").id,
+            link_id(FILM, GENRE, "writer"),
+        )
+        # Явный id не заменяется
+        explicit = uuid.uuid4()
+        self.assertEqual(GenreFilmWorkPg(FILM, GENRE, explicit).id, explicit)